@@ -0,0 +1,72 @@
+"""
+Хранилище админского режима: кто из админов сейчас видит админское меню
+"""
+import time
+from abc import ABC, abstractmethod
+from typing import Dict
+
+from database import Database
+
+class AdminSessionStore(ABC):
+    """Интерфейс хранилища админских сессий с ограниченным временем жизни"""
+    
+    def __init__(self, ttl: float = 12 * 3600):
+        self.ttl = ttl
+    
+    @abstractmethod
+    async def is_active(self, telegram_id: int) -> bool:
+        """Включен ли у пользователя админский режим"""
+    
+    @abstractmethod
+    async def set(self, telegram_id: int, active: bool):
+        """Включить (на ttl секунд) или выключить админский режим"""
+    
+    async def close(self):
+        pass
+
+class MemoryAdminSessionStore(AdminSessionStore):
+    """Сессии в памяти процесса (подходит только для одного процесса бота)"""
+    
+    def __init__(self, ttl: float = 12 * 3600):
+        super().__init__(ttl)
+        self._expires_at: Dict[int, float] = {}
+    
+    async def is_active(self, telegram_id: int) -> bool:
+        expires_at = self._expires_at.get(telegram_id)
+        if expires_at is None:
+            return False
+        if expires_at < time.monotonic():
+            del self._expires_at[telegram_id]
+            return False
+        return True
+    
+    async def set(self, telegram_id: int, active: bool):
+        if active:
+            self._expires_at[telegram_id] = time.monotonic() + self.ttl
+        else:
+            self._expires_at.pop(telegram_id, None)
+
+class SQLiteAdminSessionStore(AdminSessionStore):
+    """Сессии в таблице admin_sessions: общие для всех процессов на одной базе"""
+    
+    def __init__(self, db: Database, ttl: float = 12 * 3600):
+        super().__init__(ttl)
+        self.db = db
+    
+    async def is_active(self, telegram_id: int) -> bool:
+        return await self.db.is_admin_session_active(telegram_id, time.time())
+    
+    async def set(self, telegram_id: int, active: bool):
+        now = time.time()
+        if active:
+            await self.db.set_admin_session(telegram_id, now + self.ttl)
+        else:
+            await self.db.delete_admin_session(telegram_id)
+        # Вход/выход редки - заодно убираем истекшие сессии
+        await self.db.delete_expired_admin_sessions(now)
+
+def create_admin_session_store(db: Database, backend: str = 'sqlite', ttl: float = 12 * 3600) -> AdminSessionStore:
+    """Хранилище по настройке ADMIN_SESSIONS"""
+    if backend == 'memory':
+        return MemoryAdminSessionStore(ttl)
+    return SQLiteAdminSessionStore(db, ttl)
@@ -0,0 +1,48 @@
+"""
+Общие утилиты для бенчмарков: временная база и статистика задержек
+"""
+
+import os
+import statistics
+import tempfile
+import time
+from contextlib import contextmanager
+from typing import List
+
+from metrics import percentile
+
+@contextmanager
+def temporary_database_path():
+    """Путь к временному файлу базы, удаляемому после бенчмарка"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        yield os.path.join(tmp_dir, 'bench.db')
+
+class LatencyRecorder:
+    """Сбор задержек отдельных операций"""
+    
+    def __init__(self):
+        self.samples: List[float] = []
+        self.errors = 0
+    
+    @contextmanager
+    def measure(self):
+        started = time.perf_counter()
+        try:
+            yield
+        except Exception:
+            self.errors += 1
+        else:
+            self.samples.append(time.perf_counter() - started)
+    
+    def percentile(self, q: float) -> float:
+        return percentile(self.samples, q)
+    
+    def summary(self, title: str, wall_time: float) -> str:
+        ok = len(self.samples)
+        mean = statistics.mean(self.samples) if self.samples else 0.0
+        return (
+            f"{title}: {ok} ок / {self.errors} ошибок за {wall_time:.2f} с "
+            f"({ok / wall_time:.0f} оп/с) | "
+            f"mean {mean * 1000:.1f} мс, p50 {self.percentile(0.5) * 1000:.1f} мс, "
+            f"p99 {self.percentile(0.99) * 1000:.1f} мс"
+        )
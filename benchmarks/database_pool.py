@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк пула соединений: подключение на каждый запрос против постоянного пула
+
+Имитирует N одновременных апдейтов "записаться на мероприятие":
+get_user -> get_event_by_id -> join_event -> get_event_by_id.
+
+Запуск: python -m benchmarks.database_pool [количество_апдейтов]
+"""
+
+import asyncio
+import sys
+import time
+
+import aiosqlite
+
+from benchmarks.common import LatencyRecorder, temporary_database_path
+from database import Database
+
+EVENTS_COUNT = 20
+
+class ConnectPerCallDatabase:
+    """Старый путь: новое соединение aiosqlite на каждый вызов"""
+    
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+    
+    async def get_user(self, telegram_id: int):
+        async with aiosqlite.connect(self.db_path) as db:
+            db.row_factory = aiosqlite.Row
+            cursor = await db.execute('SELECT * FROM users WHERE telegram_id = ?', (telegram_id,))
+            row = await cursor.fetchone()
+            return dict(row) if row else None
+    
+    async def get_event_by_id(self, event_id: int):
+        async with aiosqlite.connect(self.db_path) as db:
+            db.row_factory = aiosqlite.Row
+            cursor = await db.execute(
+                'SELECT e.*, COUNT(ue.user_id) as participant_count '
+                'FROM events e '
+                'LEFT JOIN user_events ue ON e.id = ue.event_id '
+                'WHERE e.id = ? '
+                'GROUP BY e.id',
+                (event_id,)
+            )
+            row = await cursor.fetchone()
+            return dict(row) if row else None
+    
+    async def join_event(self, user_id: int, event_id: int):
+        async with aiosqlite.connect(self.db_path) as db:
+            await db.execute(
+                'INSERT OR IGNORE INTO user_events (user_id, event_id) VALUES (?, ?)',
+                (user_id, event_id)
+            )
+            await db.commit()
+
+async def prepare_database(db_path: str, users_count: int):
+    """Создать схему и заполнить пользователей и мероприятия"""
+    db = Database(db_path)
+    await db.init_db()
+    async with db.pool.writer() as conn:
+        await conn.executemany(
+            "INSERT INTO users (telegram_id, name, verification_status) VALUES (?, ?, 'approved')",
+            [(100000 + i, f"User {i}") for i in range(users_count)]
+        )
+        await conn.executemany(
+            'INSERT INTO events (name, description, created_by) VALUES (?, ?, 0)',
+            [(f"Event {i}", "Benchmark event") for i in range(EVENTS_COUNT)]
+        )
+    await db.close()
+
+async def simulate_join(db, recorder: LatencyRecorder, index: int):
+    """Один апдейт: нажатие кнопки "Записаться" """
+    with recorder.measure():
+        user = await db.get_user(100000 + index)
+        event_id = index % EVENTS_COUNT + 1
+        await db.get_event_by_id(event_id)
+        await db.join_event(user['id'], event_id)
+        await db.get_event_by_id(event_id)
+
+async def run_scenario(db, updates: int) -> tuple[LatencyRecorder, float]:
+    recorder = LatencyRecorder()
+    started = time.perf_counter()
+    await asyncio.gather(*(simulate_join(db, recorder, i) for i in range(updates)))
+    return recorder, time.perf_counter() - started
+
+async def main(updates: int):
+    print(f"⏱️ Бенчмарк пула соединений: {updates} одновременных апдейтов")
+    print("=" * 60)
+    
+    with temporary_database_path() as db_path:
+        await prepare_database(db_path, updates)
+        recorder, wall_time = await run_scenario(ConnectPerCallDatabase(db_path), updates)
+        print(recorder.summary("Соединение на вызов", wall_time))
+    
+    with temporary_database_path() as db_path:
+        await prepare_database(db_path, updates)
+        db = Database(db_path)
+        await db.init_db()
+        try:
+            recorder, wall_time = await run_scenario(db, updates)
+        finally:
+            await db.close()
+        print(recorder.summary("Пул соединений     ", wall_time))
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 1000))
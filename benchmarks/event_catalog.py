@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк списка мероприятий: каталог в памяти против запросов на каждое открытие
+
+Синтетическая база с активными и неактивными мероприятиями. Пользователи
+открывают /events, жмут "🔄 Обновить" и листают ◀ / ▶; для сравнения та же
+страница собирается как раньше - get_active_events_page + get_events_stats
+и новая клавиатура. Время от времени админ создает мероприятие. Проверяется,
+что страницы каталога совпадают со страницами из базы. Завершается с кодом 1,
+если p99 страницы из каталога выше цели.
+
+Запуск: python -m benchmarks.event_catalog [мероприятий]
+"""
+
+import asyncio
+import random
+import sqlite3
+import sys
+import time
+
+from benchmarks.common import LatencyRecorder, temporary_database_path
+from database import Database
+from event_catalog import EventCatalog
+from handlers.events import render_events_list
+
+VIEWS = 3000
+CREATE_EVERY = 500
+TARGET_P99 = 0.002
+
+def fill_database(db_path: str, events: int):
+    rng = random.Random(21)
+    conn = sqlite3.connect(db_path)
+    conn.executemany(
+        'INSERT INTO events (name, description, created_by, is_active) VALUES (?, ?, ?, ?)',
+        ((f"Мероприятие {i}", "описание", 1, rng.random() < 0.7) for i in range(1, events + 1))
+    )
+    conn.commit()
+    conn.close()
+
+async def database_view(db: Database, cursor, backward):
+    """Страница списка как до каталога: два запроса и новая клавиатура"""
+    events, has_prev, has_next = await db.get_active_events_page(cursor, backward)
+    stats = await db.get_events_stats()
+    return render_events_list(events, stats['active'], has_prev, has_next)
+
+def next_request(rng: random.Random, page) -> tuple:
+    """Обновить (та же страница), вперед, назад или снова с начала"""
+    events, has_prev, has_next = page
+    action = rng.random()
+    if action < 0.4 or not events:
+        return None, False
+    if action < 0.7 and has_next:
+        return events[-1]['id'], False
+    if action < 0.85 and has_prev:
+        return events[0]['id'], True
+    return None, False
+
+async def main(events: int) -> int:
+    print(f"⏱️ Бенчмарк списка мероприятий: {events} мероприятий")
+    print("=" * 60)
+    
+    with temporary_database_path() as db_path:
+        db = Database(db_path)
+        await db.init_db()
+        
+        started = time.perf_counter()
+        fill_database(db_path, events)
+        print(f"📦 База заполнена за {time.perf_counter() - started:.1f} с")
+        
+        catalog = EventCatalog(db, render_events_list, ttl=3600)
+        mismatches = 0
+        try:
+            direct = LatencyRecorder()
+            rng = random.Random(5)
+            cursor, backward = None, False
+            started = time.perf_counter()
+            for _ in range(VIEWS):
+                with direct.measure():
+                    await database_view(db, cursor, backward)
+                cursor, backward = next_request(rng, await db.get_active_events_page(cursor, backward))
+            print(direct.summary("База на каждую страницу", time.perf_counter() - started))
+            
+            cached = LatencyRecorder()
+            rng = random.Random(5)
+            cursor, backward = None, False
+            started = time.perf_counter()
+            for number in range(1, VIEWS + 1):
+                if number % CREATE_EVERY == 0:
+                    await db.create_event(f"Новое мероприятие {number}", "описание", 1)
+                with cached.measure():
+                    view = await catalog.view(cursor, backward)
+                page = catalog.page(cursor, backward)
+                if number % 100 == 0 and view != await database_view(db, cursor, backward):
+                    mismatches += 1
+                cursor, backward = next_request(rng, page)
+            print(cached.summary(f"Каталог (+1 мероприятие на {CREATE_EVERY} страниц)",
+                                 time.perf_counter() - started))
+            stats = catalog.stats()
+            print(f"📊 Загрузок каталога: {stats['loads']}, попаданий в отрисованные страницы: "
+                  f"{stats['views']['hit_rate']:.0%}, расхождений с базой: {mismatches}")
+        finally:
+            await db.close()
+    
+    p99 = cached.percentile(0.99)
+    print(f"🚀 Медиана: x{direct.percentile(0.5) / cached.percentile(0.5):.0f} быстрее запросов к базе")
+    if mismatches or cached.errors or p99 > TARGET_P99:
+        print(f"❌ Цель p99 < {TARGET_P99 * 1000:.0f} мс без расхождений не достигнута")
+        return 1
+    print(f"✅ p99 {p99 * 1000:.2f} мс < {TARGET_P99 * 1000:.0f} мс")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 5000)))
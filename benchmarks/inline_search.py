@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк inline-поиска мероприятий: кэш страниц против FTS5 на каждый запрос
+
+Синтетический каталог мероприятий. Пользователи "набирают" запросы по
+буквам, как в поле "@бот ...": Telegram присылает inline-запрос на каждый
+префикс, популярные слова набирают многие. Одни и те же запросы идут
+напрямую в Database.search_events и через InlineEventSearch; время от
+времени админ создает мероприятие, что сбрасывает кэш. Проверяется, что
+после деактивации мероприятие пропадает из результатов. Завершается с
+кодом 1, если доля попаданий в кэш ниже цели.
+
+Запуск: python -m benchmarks.inline_search [мероприятий]
+"""
+
+import asyncio
+import random
+import sqlite3
+import sys
+import time
+
+from benchmarks.common import LatencyRecorder, temporary_database_path
+from database import Database
+from inline_search import InlineEventSearch
+
+TYPISTS = 300
+CREATE_EVERY = 500
+TARGET_HIT_RATE = 0.7
+
+TOPICS = (
+    "хакатон концерт лекция турнир квиз мастер-класс выставка субботник "
+    "кинопоказ воркшоп митап фестиваль олимпиада экскурсия спартакиада"
+).split()
+WORDS = "ночной весенний студенческий открытый большой осенний первый командный".split()
+
+def fill_database(db_path: str, events: int):
+    rng = random.Random(13)
+    conn = sqlite3.connect(db_path)
+    conn.executemany(
+        'INSERT INTO events (name, description, created_by) VALUES (?, ?, ?)',
+        (
+            (f"{rng.choice(WORDS).capitalize()} {rng.choice(TOPICS)} {i}",
+             ' '.join(rng.sample(TOPICS + WORDS, 5)), 1)
+            for i in range(1, events + 1)
+        )
+    )
+    conn.commit()
+    conn.close()
+
+def make_queries(rng: random.Random) -> list:
+    """Префиксы по буквам; темы выбираются неравномерно (популярные чаще)"""
+    weights = [1 / (rank + 1) for rank in range(len(TOPICS))]
+    queries = []
+    for _ in range(TYPISTS):
+        topic = rng.choices(TOPICS, weights)[0]
+        queries.append('')
+        queries.extend(topic[:length] for length in range(1, len(topic) + 1))
+    return queries
+
+async def main(events: int) -> int:
+    print(f"⏱️ Бенчмарк inline-поиска: {events} мероприятий")
+    print("=" * 60)
+    
+    with temporary_database_path() as db_path:
+        db = Database(db_path)
+        await db.init_db()
+        
+        started = time.perf_counter()
+        fill_database(db_path, events)
+        print(f"📦 База заполнена за {time.perf_counter() - started:.1f} с")
+        
+        queries = make_queries(random.Random(17))
+        search = InlineEventSearch(db)
+        stale = 0
+        try:
+            direct = LatencyRecorder()
+            started = time.perf_counter()
+            for query in queries:
+                with direct.measure():
+                    if query:
+                        await db.search_events(query, limit=search.page_size)
+                    else:
+                        await db.get_active_events_page(limit=search.page_size)
+            print(direct.summary("FTS5 на каждый запрос", time.perf_counter() - started))
+            
+            cached = LatencyRecorder()
+            started = time.perf_counter()
+            for number, query in enumerate(queries, 1):
+                if number % CREATE_EVERY == 0:
+                    await db.create_event(f"Новое мероприятие {number}", "описание", 1)
+                with cached.measure():
+                    await search.search(query)
+            print(cached.summary(f"Кэш страниц (+1 мероприятие на {CREATE_EVERY} запросов)",
+                                 time.perf_counter() - started))
+            stats = search.stats()
+            print(f"📊 Попаданий в кэш: {stats['hits']} из {stats['hits'] + stats['misses']} "
+                  f"({stats['hit_rate']:.0%}), записей: {stats['size']}")
+            
+            # Деактивированное мероприятие сразу пропадает из inline-результатов
+            found, _ = await search.search(TOPICS[0])
+            await db.update_event(found[0]['id'], is_active=False)
+            after, _ = await search.search(TOPICS[0])
+            if any(event['id'] == found[0]['id'] for event in after):
+                stale += 1
+                print("❌ Деактивированное мероприятие осталось в результатах")
+        finally:
+            await db.close()
+    
+    print(f"🚀 Медиана: x{direct.percentile(0.5) / cached.percentile(0.5):.0f} быстрее FTS5 на каждый запрос")
+    if stale or cached.errors or stats['hit_rate'] < TARGET_HIT_RATE:
+        print(f"❌ Цель: доля попаданий от {TARGET_HIT_RATE:.0%} без устаревших результатов")
+        return 1
+    print(f"✅ Доля попаданий {stats['hit_rate']:.0%} >= {TARGET_HIT_RATE:.0%}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 20000)))
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Смоук-проверка входов в меню: кнопки, inline-кнопки menu_* и команды
+
+Собирает диспетчер как bot.py на временной базе и прогоняет каждую точку
+входа меню для пользователей во всех состояниях (новый, черновик, на
+модерации, верифицирован). Запросы к Telegram перехватывает поддельная
+сессия. Хендлеры меню вызывают друг друга напрямую (например, "🚀 Создать
+анкету" -> start_command), поэтому сигнатуры легко разъезжаются - проверка
+ловит такие падения. Отдельно проверяется, что "🚀 Начать" под сообщением
+бота создает анкету нажавшему, а не боту. Завершается с кодом 1, если хоть
+один апдейт упал или проверка не прошла.
+
+Запуск: python -m benchmarks.menu_smoke
+"""
+
+import asyncio
+import itertools
+import os
+import sys
+import traceback
+
+from aiogram import Bot
+from aiogram.client.session.base import BaseSession
+from aiogram.types import Chat, Message, Update, User
+
+from benchmarks.common import temporary_database_path
+
+BOT_ID = 42
+ADMIN_ID = 900
+# Новый пользователь, который начинает только с inline-кнопки "🚀 Начать"
+NEWCOMER_ID = 104
+
+MENU_TEXTS = [
+    "🚀 Создать анкету", "👤 Моя анкета", "✏️ Редактировать", "📤 Подать на верификацию",
+    "🔍 Поиск людей", "🎉 Мероприятия", "📸 Повторная верификация", "ℹ️ Статус верификации",
+    "ℹ️ О боте", "❓ Помощь", "/start", "/menu", "/help",
+]
+MENU_CALLBACKS = [
+    "menu_profile", "menu_edit", "menu_admin", "menu_search", "menu_events",
+    "menu_help", "menu_start", "menu_status",
+]
+
+class RecordingSession(BaseSession):
+    """Сессия без сети: отвечает на запросы бота правдоподобными объектами"""
+    
+    def __init__(self):
+        super().__init__()
+        self.calls = 0
+        self._message_ids = itertools.count(1000)
+    
+    async def close(self):
+        pass
+    
+    async def stream_content(self, *args, **kwargs):
+        yield b''
+    
+    async def make_request(self, bot, method, timeout=None):
+        self.calls += 1
+        if method.__returning__ is Message:
+            chat_id = getattr(method, 'chat_id', None)
+            return Message(message_id=next(self._message_ids), date=0,
+                           chat=Chat(id=chat_id if isinstance(chat_id, int) else 1, type='private'),
+                           text=getattr(method, 'text', None))
+        if method.__returning__ is User:
+            return User(id=BOT_ID, is_bot=True, first_name='UniMeet', username='unimeet_bot')
+        return True
+
+_ids = itertools.count(1)
+
+def message_update(user_id: int, text: str) -> Update:
+    message = {'message_id': next(_ids), 'date': 0, 'chat': {'id': user_id, 'type': 'private'},
+               'from': {'id': user_id, 'is_bot': False, 'first_name': 'Student'}, 'text': text}
+    if text.startswith('/'):
+        message['entities'] = [{'type': 'bot_command', 'offset': 0, 'length': len(text.split()[0])}]
+    return Update(update_id=next(_ids), message=message)
+
+def callback_update(user_id: int, data: str) -> Update:
+    # Как у Telegram: сообщение с inline-кнопкой отправлено ботом
+    return Update(update_id=next(_ids), callback_query={
+        'id': str(next(_ids)), 'chat_instance': 'smoke', 'data': data,
+        'from': {'id': user_id, 'is_bot': False, 'first_name': 'Student'},
+        'message': {'message_id': next(_ids), 'date': 0, 'chat': {'id': user_id, 'type': 'private'},
+                    'from': {'id': BOT_ID, 'is_bot': True, 'first_name': 'UniMeet'}, 'text': 'меню'},
+    })
+
+async def create_users(db) -> dict:
+    """Пользователь в каждом состоянии анкеты: telegram_id по состоянию"""
+    users = {'new': 100, 'draft': 101, 'pending': 102, 'approved': 103}
+    for state, telegram_id in users.items():
+        if state == 'new':
+            continue
+        user_id = await db.create_user(telegram_id)
+        await db.update_user(telegram_id, name=f"Студент {telegram_id}", age=20, course=2,
+                             major='Физика', description='люблю шахматы')
+        if state != 'draft':
+            request_id = await db.create_verification_request(user_id, 'photo')
+            if state == 'approved':
+                await db.process_verification(request_id, 'approved', ADMIN_ID)
+    await db.create_event("Смоук-мероприятие", "описание", ADMIN_ID)
+    return users
+
+async def main() -> int:
+    with temporary_database_path() as db_path:
+        # Роутеры берут путь к базе из config при импорте
+        os.environ['DATABASE_URL'] = db_path
+        from bot import create_dispatcher
+        from database import Database
+        
+        db = Database.shared(db_path)
+        await db.init_db()
+        dp = create_dispatcher(db)
+        session = RecordingSession()
+        bot = Bot(f'{BOT_ID}:SMOKE', session=session)
+        failures = []
+        try:
+            users = await create_users(db)
+            for state, telegram_id in users.items():
+                updates = [message_update(telegram_id, text) for text in MENU_TEXTS]
+                updates += [callback_update(telegram_id, data) for data in MENU_CALLBACKS]
+                for update in updates:
+                    entry = update.message.text if update.message else update.callback_query.data
+                    try:
+                        await dp.feed_update(bot, update)
+                    except Exception:
+                        failures.append((state, entry))
+                        print(f"❌ {state}: {entry}\n{traceback.format_exc()}")
+            
+            # callback.message - сообщение бота: анкету нужно создать по callback.from_user
+            try:
+                await dp.feed_update(bot, callback_update(NEWCOMER_ID, "menu_start"))
+                if await db.get_user(NEWCOMER_ID) is None or await db.get_user(BOT_ID) is not None:
+                    failures.append(('new', 'menu_start'))
+                    print("❌ new: menu_start создал анкету не тому пользователю")
+            except Exception:
+                failures.append(('new', 'menu_start'))
+                print(f"❌ new: menu_start\n{traceback.format_exc()}")
+            print(f"📨 Проверено точек входа: {len(MENU_TEXTS) + len(MENU_CALLBACKS)} x {len(users)} "
+                  f"состояний, запросов к Telegram: {session.calls}")
+        finally:
+            await dp['feed'].stop()
+            await dp['recommendations'].stop()
+            await db.close()
+    
+    if failures:
+        print(f"❌ Упавших апдейтов: {len(failures)}")
+        return 1
+    print("✅ Все входы меню отработали без ошибок")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк очереди исходящих сообщений против отправки напрямую
+
+Эмулятор Telegram API держит те же лимиты, что и сервер (30 сообщений в
+секунду на бота, 1 в секунду на чат с небольшим запасом) и отвечает 429 при
+превышении. Одновременно уходит рассылка по многим чатам и ответы
+пользователям; считаются потерянные сообщения и задержка ответов.
+
+Запуск: python -m benchmarks.outbound [сообщений_рассылки]
+"""
+
+import asyncio
+import sys
+import time
+
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import SendMessage
+
+from middlewares.outbound import PRIORITY_BULK, OutboundQueue, TokenBucket, outbound_priority
+
+REPLIES = 50
+
+class FakeTelegram:
+    """Эмулятор лимитов Telegram: при превышении - TelegramRetryAfter"""
+    
+    def __init__(self):
+        self.bot_bucket = TokenBucket(30, 30)
+        self.chats = {}
+        self.flood_errors = 0
+    
+    async def __call__(self, bot, method):
+        chat = self.chats.setdefault(method.chat_id, TokenBucket(1, 3))
+        for bucket in (chat, self.bot_bucket):
+            if bucket.delay() > 0:
+                self.flood_errors += 1
+                raise TelegramRetryAfter(method, 'Too Many Requests', retry_after=1)
+        chat.take()
+        self.bot_bucket.take()
+        # Сетевая задержка запроса
+        await asyncio.sleep(0.02)
+        return True
+
+async def send(make_request, method, priority=None):
+    """Отправка с замером задержки; ошибка - потерянное сообщение"""
+    started = time.perf_counter()
+    try:
+        if priority is None:
+            await make_request(None, method)
+        else:
+            with outbound_priority(priority):
+                await make_request(None, method)
+    except TelegramRetryAfter:
+        return None
+    return time.perf_counter() - started
+
+def wrap(queue: OutboundQueue, telegram: FakeTelegram):
+    async def make_request(bot, method):
+        return await queue(telegram, bot, method)
+    return make_request
+
+async def run_scenario(bulk: int, queued: bool):
+    telegram = FakeTelegram()
+    queue = OutboundQueue() if queued else None
+    make_request = wrap(queue, telegram) if queued else telegram
+    
+    async def replies():
+        # Пользователи пишут боту, пока идет рассылка
+        results = []
+        for i in range(REPLIES):
+            await asyncio.sleep(bulk / 30 / REPLIES)
+            results.append(await send(make_request, SendMessage(chat_id=10 ** 6 + i, text='reply')))
+        return results
+    
+    started = time.perf_counter()
+    bulk_tasks = [
+        asyncio.create_task(send(make_request, SendMessage(chat_id=i + 1, text='news'), PRIORITY_BULK))
+        for i in range(bulk)
+    ]
+    reply_results = await replies()
+    bulk_results = await asyncio.gather(*bulk_tasks)
+    wall_time = time.perf_counter() - started
+    
+    if queue is not None:
+        await queue.close()
+    
+    delivered = [latency for latency in reply_results if latency is not None]
+    delivered.sort()
+    p99 = delivered[min(len(delivered) - 1, int(0.99 * (len(delivered) - 1)))] if delivered else 0.0
+    lost = sum(result is None for result in bulk_results + reply_results)
+    return wall_time, lost, telegram.flood_errors, p99
+
+async def main(bulk: int):
+    print(f"⏱️ Бенчмарк отправки: рассылка {bulk} сообщений + {REPLIES} ответов пользователям")
+    print("=" * 60)
+    
+    for name, queued in (("Напрямую", False), ("Через OutboundQueue", True)):
+        wall_time, lost, flood_errors, p99 = await run_scenario(bulk, queued)
+        print(f"{name}: {wall_time:.1f} с, потеряно {lost}, ответов 429: {flood_errors}, "
+              f"ответ пользователю p99 {p99 * 1000:.0f} мс")
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 300))
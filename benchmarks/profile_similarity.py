@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк похожести анкет: векторная оценка против цикла по строкам
+
+Синтетическая база как в benchmarks.recommendations, но с разными описаниями
+анкет. Матрица профилей загружается из базы так же, как при старте бота,
+затем замеряются: оценка одного пользователя против всех анкет с отбором
+лучших (ProfileMatrix.score + argpartition), тот же расчет циклом Python по
+строкам и полный рейтинг SharedEventsIndex с профилями. В конце анкета
+меняется через update_user и проверяется, что матрица догнала ее по
+журналу, а отклоненная анкета пропадает из рейтинга в кэше. Завершается
+с кодом 1, если p99 оценки выше цели.
+
+Запуск: python -m benchmarks.profile_similarity [пользователей]
+"""
+
+import asyncio
+import random
+import sqlite3
+import sys
+import time
+
+import numpy as np
+
+from benchmarks.common import LatencyRecorder, temporary_database_path
+from benchmarks.recommendations import fill_database
+from database import Database
+from recommendations import SharedEventsIndex
+from similarity import ProfileMatrix, UNKNOWN, hash_major
+
+REQUESTS = 1000
+LOOP_REQUESTS = 3
+TOP = 100
+TARGET_P99 = 0.010
+
+WORDS = (
+    "музыка гитара футбол баскетбол шахматы программирование python дизайн фотография "
+    "путешествия кино сериалы аниме книги поэзия театр танцы бег йога плавание горы "
+    "настолки квизы волонтерство стартапы наука математика физика химия биология "
+    "кулинария кофе языки английский японский рисование игры robotics hackathon"
+).split()
+
+def fill_descriptions(db_path: str):
+    rng = random.Random(11)
+    conn = sqlite3.connect(db_path)
+    ids = [row[0] for row in conn.execute('SELECT id FROM users')]
+    conn.executemany(
+        'UPDATE users SET description = ? WHERE id = ?',
+        ((' '.join(rng.sample(WORDS, rng.randint(3, 12))), user_id) for user_id in ids)
+    )
+    conn.commit()
+    conn.close()
+
+def vectorized_top(profiles: ProfileMatrix, user_id: int) -> list:
+    scores = profiles.score(user_id)
+    top = np.argpartition(-scores, TOP - 1)[:TOP]
+    return profiles.ids[top[np.argsort(-scores[top], kind='stable')]].tolist()
+
+def loop_top(profiles: ProfileMatrix, user_id: int) -> list:
+    """Тот же расчет по одной строке за раз"""
+    row = profiles.row_of(user_id)
+    words = profiles._words[row].tolist()
+    course, age, major = int(profiles._course[row]), int(profiles._age[row]), int(profiles._major[row])
+    scored = []
+    for other in range(profiles._size):
+        candidate = int(profiles._ids[other])
+        if candidate < 0 or other == row:
+            continue
+        other_words = profiles._words[other].tolist()
+        score = profiles.description_weight * sum(a * b for a, b in zip(words, other_words))
+        if course != UNKNOWN:
+            score += profiles.course_weight * max(0.0, 1 - abs(int(profiles._course[other]) - course) / 4)
+        if age != UNKNOWN:
+            score += profiles.age_weight * max(0.0, 1 - abs(int(profiles._age[other]) - age) / profiles.age_range)
+        if major and int(profiles._major[other]) == major:
+            score += profiles.major_weight
+        scored.append((score, candidate))
+    scored.sort(key=lambda item: -item[0])
+    return [candidate for _, candidate in scored[:TOP]]
+
+async def main(users: int) -> int:
+    print(f"⏱️ Бенчмарк похожести анкет: {users} пользователей")
+    print("=" * 60)
+    
+    with temporary_database_path() as db_path:
+        db = Database(db_path)
+        await db.init_db()
+        
+        started = time.perf_counter()
+        fill_database(db_path, users)
+        fill_descriptions(db_path)
+        print(f"📦 База заполнена за {time.perf_counter() - started:.1f} с")
+        
+        profiles = ProfileMatrix()
+        index = SharedEventsIndex(db, profiles=profiles)
+        try:
+            started = time.perf_counter()
+            await index.start()
+            await index._profiles_task
+            stats = profiles.stats()
+            print(f"🧮 Матрица загружена за {time.perf_counter() - started:.2f} с: "
+                  f"{stats['profiles']} анкет, {stats['megabytes']} МБ")
+            
+            rng = random.Random(7)
+            requesters = rng.sample(profiles.ids[profiles.ids >= 0].tolist(), REQUESTS)
+            
+            vectorized = LatencyRecorder()
+            started = time.perf_counter()
+            for user_id in requesters:
+                with vectorized.measure():
+                    vectorized_top(profiles, user_id)
+            print(vectorized.summary("NumPy, оценка всех анкет", time.perf_counter() - started))
+            
+            loop = LatencyRecorder()
+            started = time.perf_counter()
+            for user_id in requesters[:LOOP_REQUESTS]:
+                with loop.measure():
+                    loop_top(profiles, user_id)
+            print(loop.summary("Цикл Python по строкам", time.perf_counter() - started))
+            
+            # Оценки совпадают с точностью float32 - сверяем множества лучших
+            mismatches = sum(
+                len(set(vectorized_top(profiles, user_id)) ^ set(loop_top(profiles, user_id))) > TOP // 10
+                for user_id in requesters[:LOOP_REQUESTS]
+            )
+            
+            ranking = LatencyRecorder()
+            started = time.perf_counter()
+            for user_id in requesters:
+                with ranking.measure():
+                    await index.get_candidates(user_id)
+            print(ranking.summary("Рейтинг с профилями (общие + похожесть)", time.perf_counter() - started))
+            
+            # Изменение анкеты доходит до матрицы через журнал membership_changes
+            user = await db.get_user_by_id(requesters[0])
+            await db.update_user(user['telegram_id'], major='Совсем новое направление')
+            await index.sync()
+            row = profiles.row_of(requesters[0])
+            if profiles._major[row] != hash_major('Совсем новое направление'):
+                mismatches += 1
+                print("❌ Изменение анкеты не дошло до матрицы")
+            
+            # Без мероприятий рейтинг строится только по похожести анкет; лучший кандидат
+            # теряет верификацию - рейтинг из кэша больше не должен его выдавать
+            requester = requesters[1]
+            for event_id in await db.get_candidate_event_ids(requester):
+                await db.leave_event(requester, event_id)
+            await index.sync()
+            best = (await index.get_candidates(requester))[0][0]
+            rejected = await db.get_user_by_id(best)
+            await db.update_user(rejected['telegram_id'], verification_status='rejected')
+            await index.sync()
+            if any(candidate == best for candidate, _ in await index.get_candidates(requester)):
+                mismatches += 1
+                print("❌ Отклоненная анкета осталась в рейтинге из кэша")
+        finally:
+            await index.stop()
+            await db.close()
+    
+    p99 = vectorized.percentile(0.99)
+    print(f"🚀 Ускорение против цикла: x{loop.percentile(0.5) / vectorized.percentile(0.5):.0f}")
+    if mismatches or vectorized.errors or p99 > TARGET_P99:
+        print(f"❌ Цель p99 < {TARGET_P99 * 1000:.0f} мс без расхождений не достигнута")
+        return 1
+    print(f"✅ p99 {p99 * 1000:.1f} мс < {TARGET_P99 * 1000:.0f} мс")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)))
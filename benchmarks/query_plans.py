@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""
+Проверка планов запросов: ни один SQL-запрос Database не должен делать полный скан таблицы
+
+Скрипт строит синтетическую базу (по умолчанию 500k строк в крупных таблицах),
+вызывает каждый публичный метод Database, перехватывает реальные SQL-запросы
+и выполняет для них EXPLAIN QUERY PLAN. Завершается с кодом 1, если найден
+полный скан или метод Database не покрыт сценарием.
+
+Запуск: python -m benchmarks.query_plans [количество_строк]
+"""
+
+import asyncio
+import inspect
+import random
+import re
+import sqlite3
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+from benchmarks.common import temporary_database_path
+from database import Database
+
+EVENTS_COUNT = 5000
+ADMIN_ID = 1
+
+# Методы жизненного цикла не выполняют прикладных запросов
+SKIPPED_METHODS = {'init_db', 'close'}
+
+# Служебные запросы, для которых план не строится; "-- " - вложенные запросы
+# триггеров и внутренние запросы FTS5, которые SQLite тоже отдает в трассировку
+SKIPPED_STATEMENTS = re.compile(r'^\s*(--|(PRAGMA|BEGIN|COMMIT|ROLLBACK|SAVEPOINT|RELEASE|CREATE|DROP|ANALYZE)\b)', re.I)
+
+# "SCAN users" / "SCAN e" без "USING ... INDEX" - полный проход по таблице
+FULL_SCAN = re.compile(r'^SCAN (\w+)$')
+
+async def process_pending_verification(db: Database):
+    """process_verification доходит до записи в outbox только для заявки в статусе pending"""
+    requests, _, _ = await db.get_pending_verifications_page()
+    await db.process_verification(requests[0]['id'], 'approved', ADMIN_ID)
+
+def build_scenarios(rows: int):
+    """Вызовы всех публичных методов Database с правдоподобными аргументами"""
+    telegram_id = 1000000 + rows // 2
+    user_id = rows // 2
+    event_id = EVENTS_COUNT // 2
+    return {
+        'get_user': lambda db: db.get_user(telegram_id),
+        'get_user_by_id': lambda db: db.get_user_by_id(user_id),
+        'create_user': lambda db: db.create_user(1000000 + rows + 1),
+        'update_user': lambda db: db.update_user(telegram_id, name='Checked', age=20),
+        'create_verification_request': lambda db: db.create_verification_request(user_id, 'photo'),
+        'get_pending_verifications': lambda db: db.get_pending_verifications(),
+        'get_pending_verifications_page': lambda db: db.get_pending_verifications_page(cursor=rows // 2),
+        'count_pending_verifications': lambda db: db.count_pending_verifications(
+            created_since=datetime.now(timezone.utc) - timedelta(hours=1)
+        ),
+        'get_verification_by_id': lambda db: db.get_verification_by_id(rows // 3),
+        'process_verification': process_pending_verification,
+        'add_admin': lambda db: db.add_admin(ADMIN_ID, is_super_admin=True),
+        'is_admin': lambda db: db.is_admin(ADMIN_ID),
+        'create_event': lambda db: db.create_event('Checked event', 'Description', ADMIN_ID),
+        'get_active_events': lambda db: db.get_active_events(),
+        'get_all_events': lambda db: db.get_all_events(),
+        'get_active_events_page': lambda db: db.get_active_events_page(cursor=event_id),
+        'get_all_events_page': lambda db: db.get_all_events_page(cursor=event_id, backward=True),
+        'get_event_by_id': lambda db: db.get_event_by_id(event_id),
+        'update_event': lambda db: db.update_event(event_id, name='Renamed'),
+        'join_event': lambda db: db.join_event(user_id, event_id),
+        'leave_event': lambda db: db.leave_event(user_id, event_id),
+        'is_user_joined_event': lambda db: db.is_user_joined_event(user_id, event_id),
+        'get_user_events': lambda db: db.get_user_events(user_id),
+        'get_user_events_count': lambda db: db.get_user_events_count(user_id),
+        'get_fsm_record': lambda db: db.get_fsm_record(f'42:{telegram_id}:{telegram_id}::default', 0),
+        'save_fsm_records': lambda db: db.save_fsm_records(
+            [(f'42:{telegram_id}:{telegram_id}::default', 'RegistrationStates:name', b'{}', time.time())],
+            ['42:1:1::default']
+        ),
+        'delete_expired_fsm_records': lambda db: db.delete_expired_fsm_records(time.time() - 86400),
+        'is_admin_session_active': lambda db: db.is_admin_session_active(ADMIN_ID, time.time()),
+        'set_admin_session': lambda db: db.set_admin_session(ADMIN_ID, time.time() + 3600),
+        'delete_admin_session': lambda db: db.delete_admin_session(ADMIN_ID),
+        'get_admin_ids_by_usernames': lambda db: db.get_admin_ids_by_usernames(['admin', 'moderator']),
+        'remember_admin_username': lambda db: db.remember_admin_username('admin', ADMIN_ID),
+        'delete_expired_admin_sessions': lambda db: db.delete_expired_admin_sessions(time.time()),
+        'enqueue_notification': lambda db: db.enqueue_notification(
+            f'check:{telegram_id}', telegram_id, 'verification_approved'
+        ),
+        'count_broadcast_recipients': lambda db: db.count_broadcast_recipients('verified'),
+        'get_broadcast_recipients': lambda db: db.get_broadcast_recipients('event', event_id, user_id, 500),
+        'create_broadcast': lambda db: db.create_broadcast('event', event_id, 'News', ADMIN_ID, 10, time.time() + 60),
+        'get_broadcast': lambda db: db.get_broadcast(1),
+        'set_broadcast_progress_message': lambda db: db.set_broadcast_progress_message(1, ADMIN_ID, 100),
+        'claim_broadcasts': lambda db: db.claim_broadcasts(time.time(), time.time() + 60),
+        'save_broadcast_progress': lambda db: db.save_broadcast_progress(1, user_id, 30, 0, time.time() + 60),
+        'finish_broadcast': lambda db: db.finish_broadcast(1, 'cancelled'),
+        'release_broadcast': lambda db: db.release_broadcast(1),
+        'enqueue_notifications': lambda db: db.enqueue_notifications(
+            [(f'check:{ADMIN_ID}:{i}', ADMIN_ID, 'verification_digest', {'since': 0}, time.time() + 60)
+             for i in range(3)]
+        ),
+        'claim_outbox_batch': lambda db: db.claim_outbox_batch(time.time(), 50, 60),
+        'mark_outbox_sent': lambda db: db.mark_outbox_sent([rows // 2], time.time()),
+        'record_outbox_failure': lambda db: db.record_outbox_failure(rows // 3, 'error', time.time() + 5),
+        'count_pending_outbox': lambda db: db.count_pending_outbox(),
+        'delete_sent_outbox': lambda db: db.delete_sent_outbox(time.time() - 86400),
+        'get_last_user_change_id': lambda db: db.get_last_user_change_id(),
+        'get_user_changes': lambda db: db.get_user_changes(rows // 2),
+        'sync_user_cache': lambda db: db.sync_user_cache(),
+        'get_last_membership_change_id': lambda db: db.get_last_membership_change_id(),
+        'get_membership_changes': lambda db: db.get_membership_changes(rows // 2),
+        'get_event_candidate_ids': lambda db: db.get_event_candidate_ids(event_id),
+        'get_candidate_event_ids': lambda db: db.get_candidate_event_ids(user_id),
+        'get_candidate_event_ids_many': lambda db: db.get_candidate_event_ids_many(list(range(1, 200))),
+        'get_verified_profiles_page': lambda db: db.get_verified_profiles_page(user_id, 5000),
+        'get_verified_profiles': lambda db: db.get_verified_profiles([user_id, user_id + 1, user_id + 2]),
+        'add_reaction': lambda db: db.add_reaction(user_id, user_id + 1, True),
+        'get_reacted_user_ids': lambda db: db.get_reacted_user_ids(user_id),
+        'search_users': lambda db: db.search_users('user major', page=1),
+        'search_events': lambda db: db.search_events('event'),
+        'get_users_stats': lambda db: db.get_users_stats(),
+        'get_events_stats': lambda db: db.get_events_stats(),
+    }
+
+def fill_database(db_path: str, rows: int):
+    """Заполнить базу синтетическими данными напрямую через sqlite3"""
+    rng = random.Random(42)
+    statuses = ['not_requested', 'pending', 'approved', 'rejected']
+    
+    conn = sqlite3.connect(db_path)
+    conn.executemany(
+        'INSERT INTO users (telegram_id, name, age, course, major, description, verification_status) '
+        'VALUES (?, ?, ?, ?, ?, ?, ?)',
+        (
+            (1000000 + i, f"User {i}", rng.randint(16, 30), rng.randint(1, 5),
+             f"Major {i % 200}", "Synthetic profile", rng.choice(statuses))
+            for i in range(1, rows + 1)
+        )
+    )
+    conn.executemany(
+        'INSERT INTO events (name, description, is_active, created_by) VALUES (?, ?, ?, ?)',
+        ((f"Event {i}", "Synthetic event", rng.random() < 0.7, ADMIN_ID) for i in range(EVENTS_COUNT))
+    )
+    conn.executemany(
+        'INSERT INTO verification_requests (user_id, student_card_photo, status) VALUES (?, ?, ?)',
+        ((rng.randint(1, rows), 'photo', rng.choice(statuses[1:])) for _ in range(rows))
+    )
+    conn.executemany(
+        'INSERT OR IGNORE INTO user_events (user_id, event_id) VALUES (?, ?)',
+        ((rng.randint(1, rows), rng.randint(1, EVENTS_COUNT)) for _ in range(rows))
+    )
+    conn.executemany(
+        'INSERT INTO membership_changes (user_id, event_id) VALUES (?, ?)',
+        ((rng.randint(1, rows), rng.randint(1, EVENTS_COUNT)) for _ in range(rows))
+    )
+    conn.executemany(
+        'INSERT INTO user_changes (user_id, telegram_id) VALUES (?, ?)',
+        ((user, 1000000 + user) for user in (rng.randint(1, rows) for _ in range(rows)))
+    )
+    conn.executemany(
+        'INSERT OR IGNORE INTO reactions (user_id, target_id, is_like) VALUES (?, ?, ?)',
+        ((rng.randint(1, rows), rng.randint(1, rows), rng.random() < 0.5) for _ in range(rows))
+    )
+    # Встречный лайк: сценарий add_reaction доходит до создания мэтча
+    conn.execute('INSERT OR IGNORE INTO reactions (user_id, target_id, is_like) VALUES (?, ?, 1)',
+                 (rows // 2 + 1, rows // 2))
+    conn.executemany(
+        'INSERT INTO notification_outbox (idempotency_key, chat_id, kind, status, next_attempt_at) '
+        'VALUES (?, ?, ?, ?, ?)',
+        ((f"verification:{i}", 1000000 + i, 'verification_approved',
+          'pending' if i % 100 == 0 else 'sent', time.time() - rng.randint(0, 30 * 86400))
+         for i in range(1, rows + 1))
+    )
+    conn.commit()
+    conn.close()
+
+async def capture_statements(db: Database, scenarios) -> dict:
+    """Выполнить сценарии и собрать SQL каждого метода"""
+    captured = {}
+    current = []
+    
+    connections = [db.pool._writer] + db.pool._all_readers
+    for conn in connections:
+        await conn.set_trace_callback(current.append)
+    
+    for name, call in scenarios.items():
+        # Кэш сбрасывается, чтобы каждый метод действительно дошел до SQLite
+        db.user_cache.clear()
+        current.clear()
+        await call(db)
+        captured[name] = [sql for sql in current if not SKIPPED_STATEMENTS.match(sql)]
+    
+    for conn in connections:
+        await conn.set_trace_callback(None)
+    return captured
+
+def find_full_scans(db_path: str, captured: dict) -> list:
+    """Построить планы и вернуть список (метод, запрос, строка плана) с полными сканами"""
+    conn = sqlite3.connect(db_path)
+    problems = []
+    for method, statements in captured.items():
+        for sql in dict.fromkeys(statements):
+            for row in conn.execute(f'EXPLAIN QUERY PLAN {sql}'):
+                detail = row[3]
+                if FULL_SCAN.match(detail):
+                    problems.append((method, ' '.join(sql.split()), detail))
+    conn.close()
+    return problems
+
+async def main(rows: int) -> int:
+    print(f"🔍 Проверка планов запросов на синтетической базе ({rows} строк)")
+    print("=" * 60)
+    
+    with temporary_database_path() as db_path:
+        db = Database(db_path)
+        await db.init_db()
+        
+        started = time.perf_counter()
+        fill_database(db_path, rows)
+        print(f"📦 База заполнена за {time.perf_counter() - started:.1f} с")
+        
+        scenarios = build_scenarios(rows)
+        public_methods = {
+            name for name, _ in inspect.getmembers(Database, inspect.iscoroutinefunction)
+            if not name.startswith('_') and name not in SKIPPED_METHODS
+        }
+        missing = sorted(public_methods - scenarios.keys())
+        
+        try:
+            captured = await capture_statements(db, scenarios)
+        finally:
+            await db.close()
+        
+        problems = find_full_scans(db_path, captured)
+    
+    statements_count = sum(len(set(statements)) for statements in captured.values())
+    print(f"📋 Проверено методов: {len(captured)}, запросов: {statements_count}")
+    
+    for method in missing:
+        print(f"❌ Метод Database.{method} не покрыт сценарием проверки")
+    for method, sql, detail in problems:
+        print(f"❌ {method}: {detail}\n   {sql}")
+    
+    if missing or problems:
+        return 1
+    
+    print("✅ Полных сканов таблиц не найдено")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 500000)))
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк полнотекстового поиска: FTS5 против LIKE '%...%'
+
+Синтетическая база анкет с именами, направлениями и описаниями из
+небольшого словаря (каждое слово встречается в десятках тысяч анкет -
+худший случай для ранжирования). Одни и те же запросы (одно-два слова,
+в том числе префиксы) выполняются через Database.search_users и через
+LIKE по трем столбцам, который проходит всю таблицу users. Отдельно
+проверяется, что триггеры держат индекс в актуальном состоянии после
+update_user. Завершается с кодом 1, если p99 поиска выше цели.
+
+Запуск: python -m benchmarks.search [анкет]
+"""
+
+import asyncio
+import random
+import sqlite3
+import sys
+import time
+
+from benchmarks.common import LatencyRecorder, temporary_database_path
+from database import Database
+
+QUERIES = 300
+LIKE_QUERIES = 20
+TARGET_P99 = 0.050
+
+NAMES = "Анна Мария Иван Петр Алексей Дарья Елена Никита Ольга Сергей Татьяна Юлия Максим Кирилл".split()
+MAJORS = ["Прикладная математика", "Программная инженерия", "Экономика", "Журналистика",
+          "Биология", "Физика", "Дизайн", "Юриспруденция", "Психология", "Лингвистика"]
+WORDS = (
+    "музыка гитара футбол баскетбол шахматы программирование дизайн фотография путешествия "
+    "кино сериалы аниме книги поэзия театр танцы бег йога плавание горы настолки квизы "
+    "волонтерство стартапы наука кулинария кофе языки рисование хакатоны"
+).split()
+
+# Тот же порядок "сначала имя, потом направление" без индекса - проход по всей таблице
+LIKE_SEARCH = '''
+    SELECT id, telegram_id, name, age, course, major, verification_status FROM users
+    WHERE name LIKE ?1 OR major LIKE ?1 OR description LIKE ?1
+    ORDER BY (name LIKE ?1) DESC, (major LIKE ?1) DESC, id DESC
+    LIMIT 9
+'''
+
+def fill_database(db_path: str, profiles: int):
+    rng = random.Random(5)
+    conn = sqlite3.connect(db_path)
+    conn.executemany(
+        'INSERT INTO users (telegram_id, name, age, course, major, description, verification_status) '
+        'VALUES (?, ?, ?, ?, ?, ?, ?)',
+        (
+            (1000000 + i, f"{rng.choice(NAMES)} {i}", rng.randint(16, 30), rng.randint(1, 5),
+             rng.choice(MAJORS), ' '.join(rng.sample(WORDS, rng.randint(3, 10))), 'approved')
+            for i in range(1, profiles + 1)
+        )
+    )
+    conn.commit()
+    conn.close()
+
+def make_queries(rng: random.Random, count: int) -> list:
+    """Слово, префикс слова или имя + интерес"""
+    queries = []
+    for _ in range(count):
+        kind = rng.random()
+        if kind < 0.4:
+            queries.append(rng.choice(WORDS))
+        elif kind < 0.7:
+            queries.append(rng.choice(WORDS + MAJORS)[:4])
+        else:
+            queries.append(f"{rng.choice(NAMES)} {rng.choice(WORDS)}")
+    return queries
+
+async def main(profiles: int) -> int:
+    print(f"⏱️ Бенчмарк поиска: {profiles} анкет")
+    print("=" * 60)
+    
+    with temporary_database_path() as db_path:
+        db = Database(db_path)
+        await db.init_db()
+        
+        started = time.perf_counter()
+        fill_database(db_path, profiles)
+        print(f"📦 База заполнена за {time.perf_counter() - started:.1f} с (поисковый индекс - триггерами)")
+        
+        rng = random.Random(9)
+        queries = make_queries(rng, QUERIES)
+        errors = 0
+        try:
+            like = LatencyRecorder()
+            started = time.perf_counter()
+            for query in queries[:LIKE_QUERIES]:
+                with like.measure():
+                    async with db.pool.reader() as conn:
+                        # LIKE ищет подстроку одного запроса целиком - для сравнения берется первое слово
+                        cursor = await conn.execute(LIKE_SEARCH, (f"%{query.split()[0]}%",))
+                        await cursor.fetchall()
+            print(like.summary("LIKE '%...%'", time.perf_counter() - started))
+            
+            fts = LatencyRecorder()
+            started = time.perf_counter()
+            for number, query in enumerate(queries):
+                with fts.measure():
+                    await db.search_users(query, page=number % 3)
+            print(fts.summary("FTS5 + bm25, страница", time.perf_counter() - started))
+            
+            # Изменение анкеты сразу видно в поиске
+            await db.update_user(1000001, name="Уникальноеимя", description="редкоеслово")
+            found, _, _ = await db.search_users("уникальноеим редкоеслово")
+            stale, _, _ = await db.search_users(f"{NAMES[0]} 1 шахматы")
+            if [user['telegram_id'] for user in found] != [1000001]:
+                errors += 1
+                print("❌ Обновленная анкета не находится")
+            if any(user['telegram_id'] == 1000001 for user in stale):
+                errors += 1
+                print("❌ Старые слова анкеты остались в индексе")
+        finally:
+            await db.close()
+    
+    p99 = fts.percentile(0.99)
+    print(f"🚀 Медиана: x{like.percentile(0.5) / fts.percentile(0.5):.0f} быстрее LIKE")
+    if errors or fts.errors or p99 > TARGET_P99:
+        print(f"❌ Цель p99 < {TARGET_P99 * 1000:.0f} мс не достигнута")
+        return 1
+    print(f"✅ p99 {p99 * 1000:.1f} мс < {TARGET_P99 * 1000:.0f} мс")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 200000)))
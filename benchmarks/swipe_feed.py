@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк ленты анкет: очередь кандидатов против рейтинга на каждый свайп
+
+Синтетическая база как в benchmarks.recommendations. Пользователи листают
+ленту (реакция + следующая карточка) через SwipeFeed.current/react, как
+обработчики бота: по очереди, CONCURRENCY пользователей одновременно
+(дальше кэшированного рейтинга) и после вытеснения ленты из кэша (очередь
+пересчитывается синхронно). Для пересчетов очередей выводится, сколько
+рейтингов взято из кэша индекса и сколько посчитано заново. Для сравнения
+тот же свайп с пересчетом рейтинга в SQLite, где оцененные анкеты
+отсекаются через NOT IN по reactions. Проверяется, что лента не
+показывает одну анкету дважды. Завершается с кодом 1, если p99 свайпа
+выше цели; для параллельной фазы цель умножается на число пользователей,
+делящих одно ядро.
+
+Запуск: python -m benchmarks.swipe_feed [пользователей]
+"""
+
+import asyncio
+import math
+import os
+import random
+import sys
+import time
+
+from benchmarks.common import LatencyRecorder, temporary_database_path
+from benchmarks.recommendations import SQL_RANKING, fill_database
+from database import Database
+from feed import SwipeFeed
+from recommendations import SharedEventsIndex
+
+USERS_SWIPING = 50
+SWIPES = 40
+# Одновременно листающие проходят дальше кэшированного рейтинга (100 анкет) - до пересчета без оцененных
+DEEP_SWIPES = 150
+# Одновременно листающих - по числу соединений для чтения (DATABASE_READ_POOL_SIZE)
+CONCURRENCY = 4
+SQL_SWIPES = 100
+TARGET_P99 = 0.020
+
+# Рейтинг без уже оцененных анкет - "наивная" лента без очереди
+SQL_NEXT_CARD = SQL_RANKING.replace(
+    'WHERE mine.user_id = ?',
+    'WHERE mine.user_id = ? AND other.user_id NOT IN (SELECT target_id FROM reactions WHERE user_id = ?)'
+)
+
+async def sql_swipe(db: Database, user_id: int, target_id: int, is_like: bool):
+    await db.add_reaction(user_id, target_id, is_like)
+    async with db.pool.reader() as conn:
+        cursor = await conn.execute(SQL_NEXT_CARD, (user_id, user_id, 1))
+        return await cursor.fetchone()
+
+class RankingCounter:
+    """Сколько рейтингов индекс отдал из кэша и сколько посчитал заново за фазу"""
+    
+    def __init__(self, index: SharedEventsIndex):
+        self.index = index
+        self.start = self._snapshot()
+    
+    def _snapshot(self) -> tuple:
+        stats = self.index.stats()
+        return stats['rankings']['hits'], stats['rankings']['misses'], stats['reranks']
+    
+    def summary(self) -> str:
+        hits, misses, reranks = (now - then for now, then in zip(self._snapshot(), self.start))
+        return f"   рейтингов из кэша: {hits}, посчитано: {misses}, пересчитано без оцененных: {reranks}"
+
+async def swipe_through(feed: SwipeFeed, user_id: int, swipes: int, recorder: LatencyRecorder,
+                        rng: random.Random, shown: set) -> int:
+    """swipes свайпов одного пользователя; возвращает число повторных показов"""
+    duplicates = 0
+    for _ in range(swipes):
+        candidate_id = await feed.current(user_id)
+        if candidate_id is None:
+            break
+        with recorder.measure():
+            await feed.react(user_id, candidate_id, rng.random() < 0.3)
+            next_id = await feed.current(user_id)
+        if next_id is not None and next_id in shown:
+            duplicates += 1
+        shown.add(candidate_id)
+        # Следующее сообщение пользователя приходит не мгновенно
+        await asyncio.sleep(0)
+    return duplicates
+
+async def main(users: int) -> int:
+    print(f"⏱️ Бенчмарк ленты анкет: {users} пользователей")
+    print("=" * 60)
+    
+    with temporary_database_path() as db_path:
+        db = Database(db_path)
+        await db.init_db()
+        
+        started = time.perf_counter()
+        fill_database(db_path, users)
+        print(f"📦 База заполнена за {time.perf_counter() - started:.1f} с")
+        
+        rng = random.Random(3)
+        verified = await db.get_broadcast_recipients('verified', None, 0, users)
+        sample = [user_id for user_id, _ in rng.sample(verified, 2 * USERS_SWIPING + SQL_SWIPES)]
+        swiping, parallel = sample[:USERS_SWIPING + SQL_SWIPES], sample[USERS_SWIPING + SQL_SWIPES:]
+        index = SharedEventsIndex(db)
+        feed = SwipeFeed(db, index)
+        duplicates = 0
+        
+        try:
+            # Базовый вариант: реакция и рейтинг с NOT IN на каждый свайп
+            sql = LatencyRecorder()
+            started = time.perf_counter()
+            for user_id in swiping[USERS_SWIPING:]:
+                with sql.measure():
+                    await sql_swipe(db, user_id, rng.randint(1, users), rng.random() < 0.3)
+            print(sql.summary("SQL NOT IN, свайп", time.perf_counter() - started))
+            
+            # Первая карточка: очередь пустая, рейтинг считается синхронно
+            rankings = RankingCounter(index)
+            first = LatencyRecorder()
+            started = time.perf_counter()
+            for user_id in swiping[:USERS_SWIPING]:
+                with first.measure():
+                    await feed.current(user_id)
+            print(first.summary("Лента, первая карточка", time.perf_counter() - started))
+            
+            print(rankings.summary())
+            
+            # Свайпы вперемешку между пользователями; очереди пополняются в фоне
+            rankings = RankingCounter(index)
+            swipes = LatencyRecorder()
+            shown = {user_id: set() for user_id in swiping[:USERS_SWIPING]}
+            started = time.perf_counter()
+            for _ in range(SWIPES):
+                for user_id in swiping[:USERS_SWIPING]:
+                    candidate_id = await feed.current(user_id)
+                    if candidate_id is None:
+                        continue
+                    with swipes.measure():
+                        await feed.react(user_id, candidate_id, rng.random() < 0.3)
+                        next_id = await feed.current(user_id)
+                    if next_id is not None and next_id in shown[user_id]:
+                        duplicates += 1
+                    shown[user_id].add(candidate_id)
+                # Фоновый пересчет успевает между "сообщениями" пользователей
+                await asyncio.sleep(0)
+            print(swipes.summary("Лента, свайп", time.perf_counter() - started))
+            stats = feed.stats()
+            print(f"🔁 Пересчетов очередей: {stats['refills']}, повторных показов: {duplicates}")
+            print(rankings.summary())
+            
+            # Несколько пользователей листают одновременно, как параллельные апдейты
+            concurrent = LatencyRecorder()
+            rankings = RankingCounter(index)
+            refills = feed.stats()['refills']
+            pending = iter(parallel)
+            
+            async def swiper() -> int:
+                found = 0
+                for user_id in pending:
+                    found += await swipe_through(feed, user_id, DEEP_SWIPES, concurrent, rng, set())
+                return found
+            
+            started = time.perf_counter()
+            duplicates += sum(await asyncio.gather(*(swiper() for _ in range(CONCURRENCY))))
+            print(concurrent.summary(f"Лента, свайп ({CONCURRENCY} одновременно)", time.perf_counter() - started))
+            print(f"🔁 Пересчетов очередей: {feed.stats()['refills'] - refills}, повторных показов: {duplicates}")
+            print(rankings.summary())
+            
+            # Лента вытеснена из кэша: очередь пересчитывается синхронно, рейтинг - из кэша индекса
+            evicted_feed = SwipeFeed(db, index)
+            evicted = LatencyRecorder()
+            rankings = RankingCounter(index)
+            started = time.perf_counter()
+            for user_id in swiping[:USERS_SWIPING]:
+                with evicted.measure():
+                    next_id = await evicted_feed.current(user_id)
+                if next_id is not None and next_id in shown[user_id]:
+                    duplicates += 1
+            await evicted_feed.stop()
+            print(evicted.summary("Лента после вытеснения из кэша", time.perf_counter() - started))
+            print(rankings.summary())
+        finally:
+            await feed.stop()
+            await index.stop()
+            await db.close()
+    
+    # Как в benchmarks.recommendations: одновременные свайпы на меньшем числе ядер идут по очереди
+    concurrent_target = TARGET_P99 * math.ceil(CONCURRENCY / (os.cpu_count() or 1))
+    p99 = swipes.percentile(0.99)
+    concurrent_p99 = concurrent.percentile(0.99)
+    print(f"🚀 Медиана свайпа: x{sql.percentile(0.5) / swipes.percentile(0.5):.0f} быстрее SQL")
+    if (duplicates or swipes.errors or concurrent.errors or evicted.errors
+            or p99 > TARGET_P99 or concurrent_p99 > concurrent_target):
+        print(f"❌ Цель p99 < {TARGET_P99 * 1000:.0f} мс "
+              f"(одновременно < {concurrent_target * 1000:.0f} мс) без повторов не достигнута")
+        return 1
+    print(f"✅ p99 {p99 * 1000:.1f} мс < {TARGET_P99 * 1000:.0f} мс, "
+          f"одновременно {concurrent_p99 * 1000:.1f} мс < {concurrent_target * 1000:.0f} мс")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)))
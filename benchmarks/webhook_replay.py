@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Отправка записанных апдейтов на локальный webhook-сервер
+
+Читает апдейты Telegram (по одному JSON на строку) и отправляет их POST-запросами
+на запущенный бот (BOT_MODE=webhook, WEBHOOK_URL пустой). Без файла генерирует
+синтетические команды /start от разных пользователей. Подключение к Telegram
+не нужно: ответы бота будут падать с сетевой ошибкой, но апдейты обработаются.
+
+Запуск: python -m benchmarks.webhook_replay [файл.jsonl|количество] [url]
+"""
+
+import asyncio
+import json
+import os
+import sys
+import time
+
+import aiohttp
+
+from benchmarks.common import LatencyRecorder
+from config import WEBHOOK
+
+def synthetic_updates(count: int):
+    """Команды /start от count разных пользователей"""
+    for i in range(count):
+        user = {'id': 100000 + i, 'is_bot': False, 'first_name': f"User {i}"}
+        yield {
+            'update_id': i + 1,
+            'message': {
+                'message_id': i + 1,
+                'date': int(time.time()),
+                'chat': {'id': user['id'], 'type': 'private'},
+                'from': user,
+                'text': '/start',
+                'entities': [{'type': 'bot_command', 'offset': 0, 'length': 6}],
+            },
+        }
+
+def load_updates(source: str):
+    if os.path.exists(source):
+        with open(source, encoding='utf-8') as f:
+            return [json.loads(line) for line in f if line.strip()]
+    return list(synthetic_updates(int(source)))
+
+async def post_update(session: aiohttp.ClientSession, url: str, update: dict, recorder: LatencyRecorder):
+    headers = {}
+    if WEBHOOK['secret_token']:
+        headers['X-Telegram-Bot-Api-Secret-Token'] = WEBHOOK['secret_token']
+    with recorder.measure():
+        async with session.post(url, json=update, headers=headers) as response:
+            response.raise_for_status()
+
+async def main(source: str, url: str):
+    updates = load_updates(source)
+    print(f"📨 Отправка {len(updates)} апдейтов на {url}")
+    print("=" * 60)
+    
+    recorder = LatencyRecorder()
+    async with aiohttp.ClientSession() as session:
+        started = time.perf_counter()
+        await asyncio.gather(*(post_update(session, url, update, recorder) for update in updates))
+        wall_time = time.perf_counter() - started
+        
+        health_url = url.rsplit('/', 1)[0] + '/health'
+        async with session.get(health_url) as response:
+            health = await response.json()
+    
+    print(recorder.summary("Ответ webhook", wall_time))
+    print(f"🩺 /health: {health}")
+
+if __name__ == "__main__":
+    source = sys.argv[1] if len(sys.argv) > 1 else '1000'
+    default_url = f"http://127.0.0.1:{WEBHOOK['port']}{WEBHOOK['path']}"
+    asyncio.run(main(source, sys.argv[2] if len(sys.argv) > 2 else default_url))
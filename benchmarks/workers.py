@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк многопроцессного режима: масштабирование CPU-нагрузки по воркерам
+
+Апдейты раздаются через UpdateSupervisor (шардирование по from_user.id), каждый
+воркер на апдейт строит админскую клавиатуру и карточки для страницы
+мероприятий - типичная CPU-работа хендлеров. Сравнивается 1, 2, 4... воркера
+(до числа ядер, не меньше двух).
+
+Запуск: python -m benchmarks.workers [количество_апдейтов]
+"""
+
+import asyncio
+import multiprocessing
+import os
+import sys
+import time
+
+from workers import UpdateSupervisor
+
+EVENTS_ON_SCREEN = 200
+
+def cpu_worker(index: int, queue: multiprocessing.Queue, done: multiprocessing.Queue):
+    """Воркер бенчмарка: та же раздача апдейтов, но без Telegram и базы"""
+    from handlers.events import format_event_info, get_admin_events_keyboard
+    
+    events = [
+        {'id': i, 'name': f"Event {i}", 'description': "Benchmark event " * 20,
+         'is_active': i % 3 != 0, 'participant_count': i, 'created_at': '2026-01-01 12:00:00'}
+        for i in range(EVENTS_ON_SCREEN)
+    ]
+    while True:
+        update = queue.get()
+        if update is None:
+            break
+        get_admin_events_keyboard(events)
+        for event in events:
+            format_event_info(event)
+        done.put(update['update_id'])
+
+def make_update(i: int) -> dict:
+    user_id = 100000 + i % 1000
+    return {
+        'update_id': i,
+        'callback_query': {
+            'id': str(i), 'chat_instance': 'bench', 'data': 'admin_events_list',
+            'from': {'id': user_id, 'is_bot': False, 'first_name': 'Bench'},
+        },
+    }
+
+async def run_scenario(workers: int, updates: int) -> float:
+    done = multiprocessing.get_context('spawn').Queue()
+    supervisor = UpdateSupervisor(workers, target=cpu_worker, target_args=(done,))
+    supervisor.start()
+    loop = asyncio.get_running_loop()
+    
+    # Прогрев: воркеры импортируют хендлеры до начала замера
+    for i in range(workers):
+        supervisor.route(make_update(i))
+    for _ in range(workers):
+        await loop.run_in_executor(None, done.get)
+    
+    started = time.perf_counter()
+    for i in range(updates):
+        supervisor.route(make_update(i))
+    for _ in range(updates):
+        await loop.run_in_executor(None, done.get)
+    wall_time = time.perf_counter() - started
+    
+    await supervisor.stop()
+    return wall_time
+
+async def main(updates: int):
+    cores = os.cpu_count() or 1
+    print(f"⏱️ Бенчмарк воркеров: {updates} апдейтов, ядер: {cores}")
+    print("=" * 60)
+    
+    counts = [1]
+    while counts[-1] < max(cores, 2):
+        counts.append(counts[-1] * 2)
+    
+    baseline = None
+    for workers in counts:
+        wall_time = await run_scenario(workers, updates)
+        baseline = baseline or wall_time
+        print(f"Воркеров: {workers}: {wall_time:.2f} с ({updates / wall_time:.0f} апдейтов/с, "
+              f"ускорение x{baseline / wall_time:.2f})")
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 2000))
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк группового коммита: отдельная транзакция на запись против пачки
+
+Имитирует N одновременных записей: join_event, leave_event и update_user
+для разных пользователей и мероприятий. Каждый режим прогоняется с
+synchronous=NORMAL (профиль по умолчанию) и synchronous=FULL (fsync на коммит).
+
+Запуск: python -m benchmarks.write_batching [количество_записей]
+"""
+
+import asyncio
+import sys
+import time
+
+from benchmarks.common import LatencyRecorder, temporary_database_path
+from database import DEFAULT_PRAGMAS, Database
+
+EVENTS_COUNT = 20
+
+async def prepare_database(db_path: str, users_count: int):
+    """Создать схему и заполнить пользователей и мероприятия"""
+    db = Database(db_path)
+    await db.init_db()
+    async with db.pool.writer() as conn:
+        await conn.executemany(
+            "INSERT INTO users (telegram_id, name, verification_status) VALUES (?, ?, 'approved')",
+            [(100000 + i, f"User {i}") for i in range(users_count)]
+        )
+        await conn.executemany(
+            'INSERT INTO events (name, description, created_by) VALUES (?, ?, 0)',
+            [(f"Event {i}", "Benchmark event") for i in range(EVENTS_COUNT)]
+        )
+    await db.close()
+
+async def simulate_write(db: Database, recorder: LatencyRecorder, index: int):
+    """Одна запись: чередуем запись, отписку и обновление профиля"""
+    user_id = index + 1
+    event_id = index % EVENTS_COUNT + 1
+    with recorder.measure():
+        kind = index % 3
+        if kind == 0:
+            await db.join_event(user_id, event_id)
+        elif kind == 1:
+            await db.leave_event(user_id, event_id)
+        else:
+            await db.update_user(100000 + index, description=f"Bio {index}")
+
+async def run_scenario(db_path: str, writes: int, synchronous: str,
+                       write_batching: dict) -> tuple[LatencyRecorder, float]:
+    db = Database(db_path, pragmas={**DEFAULT_PRAGMAS, 'synchronous': synchronous})
+    await db.init_db(write_batching=write_batching)
+    recorder = LatencyRecorder()
+    try:
+        started = time.perf_counter()
+        await asyncio.gather(*(simulate_write(db, recorder, i) for i in range(writes)))
+        wall_time = time.perf_counter() - started
+    finally:
+        await db.close()
+    return recorder, wall_time
+
+async def main(writes: int):
+    print(f"⏱️ Бенчмарк группового коммита: {writes} одновременных записей")
+    print("=" * 60)
+    
+    scenarios = [
+        ("Транзакция на запись", {'enabled': False}),
+        ("Групповой коммит    ", {'enabled': True, 'interval_ms': 5, 'max_batch': 256}),
+    ]
+    for synchronous in ('NORMAL', 'FULL'):
+        print(f"synchronous={synchronous}")
+        for title, settings in scenarios:
+            with temporary_database_path() as db_path:
+                await prepare_database(db_path, writes)
+                recorder, wall_time = await run_scenario(db_path, writes, synchronous, settings)
+                print(recorder.summary(title, wall_time))
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 3000))
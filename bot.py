@@ -1,15 +1,39 @@
 import asyncio
 import logging
-from aiogram import Bot, Dispatcher
+from typing import List, Optional, Tuple
+from aiogram import Bot, Dispatcher, Router
 from aiogram.fsm.storage.memory import MemoryStorage
 
-from config import BOT_TOKEN, DATABASE_URL, DEBUG, ADMIN_IDS
+from config import (
+    BOT_TOKEN, DATABASE_URL, DATABASE_READ_POOL_SIZE, SQLITE_PRAGMAS, SQLITE_WRITE_RETRY,
+    USER_CACHE, WRITE_BATCHING, FSM_STORAGE, ADMIN_SESSIONS, BOT_MODE, BOT_WORKERS, WEBHOOK,
+    UPDATE_CONCURRENCY, OUTBOUND, OUTBOX, BROADCAST, RECOMMENDATIONS, PROFILE_SIMILARITY, SWIPE_FEED,
+    EVENT_CATALOG, INLINE_SEARCH,
+    DEBUG, ADMIN_IDS
+)
+from admin_sessions import create_admin_session_store
+from broadcast import BroadcastManager
 from database import Database
+from event_catalog import EventCatalog
+from feed import SwipeFeed
+from fsm_storage import SQLiteStorage
 from handlers.registration import router as registration_router
-from handlers.admin import router as admin_router
+from handlers.admin import router as admin_router, OUTBOX_RENDERERS
 from handlers.menu import router as menu_router
-from handlers.events import router as events_router
+from handlers.events import router as events_router, render_events_list
 from handlers.admin_mode import router as admin_mode_router
+from handlers.broadcast import router as broadcast_router
+from handlers.people import router as people_router, OUTBOX_RENDERERS as PEOPLE_OUTBOX_RENDERERS
+from handlers.inline import router as inline_router
+from inline_search import InlineEventSearch
+from middlewares.outbound import OutboundQueue
+from middlewares.scheduler import UpdateScheduler
+from middlewares.user_context import UserContextMiddleware
+from outbox import OutboxDispatcher
+from recommendations import SharedEventsIndex
+from similarity import ProfileMatrix
+from webhook import WebhookServer
+from workers import run_supervisor
 
 # Настройка логирования
 log_level = logging.DEBUG if DEBUG else logging.INFO
@@ -19,36 +43,169 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-async def main():
-    """Основная функция запуска бота"""
-    # Инициализация бота и диспетчера
+def create_bot() -> Tuple[Bot, OutboundQueue]:
+    """Бот, все отправки которого проходят через очередь с лимитами Telegram"""
     bot = Bot(token=BOT_TOKEN)
-    dp = Dispatcher(storage=MemoryStorage())
+    # Каждый воркер отправляет независимо - общий лимит бота делится между ними
+    outbound = OutboundQueue(**{**OUTBOUND, 'global_rate': OUTBOUND['global_rate'] / BOT_WORKERS})
+    bot.session.middleware(outbound)
+    return bot, outbound
+
+def create_dispatcher(db: Database, outbound: Optional[OutboundQueue] = None) -> Dispatcher:
+    """Диспетчер с хранилищем FSM, middleware и роутерами (общий для polling и webhook)"""
+    if FSM_STORAGE['backend'] == 'memory':
+        storage = MemoryStorage()
+    else:
+        storage = SQLiteStorage(
+            db,
+            ttl=FSM_STORAGE['ttl'],
+            cache_size=FSM_STORAGE['cache_size'],
+            flush_interval=FSM_STORAGE['flush_interval']
+        )
+    dp = Dispatcher(storage=storage)
+    
+    # Апдейты одного пользователя - по порядку, разных - параллельно (до UPDATE_CONCURRENCY).
+    # Доступен хендлерам и /health как update_scheduler.
+    # Встает перед FSM-middleware: состояние читается уже под блокировкой пользователя
+    scheduler = UpdateScheduler(UPDATE_CONCURRENCY)
+    dp['update_scheduler'] = scheduler
+    dp.update.outer_middleware.unregister(dp.fsm)
+    dp.update.outer_middleware(scheduler)
+    dp.update.outer_middleware(dp.fsm)
+    
+    # Метрики доставки для /health и админской статистики
+    if outbound is not None:
+        dp['outbound_queue'] = outbound
+    
+    # Доставка уведомлений из outbox живет вместе с диспетчером (startup/shutdown)
+    outbox = OutboxDispatcher(db, {**OUTBOX_RENDERERS, **PEOPLE_OUTBOX_RENDERERS}, **OUTBOX)
+    dp['outbox'] = outbox
+    dp.startup.register(outbox.start)
+    dp.shutdown.register(outbox.stop)
+    
+    # Рассылки админов: продолжаются после перезапуска
+    broadcasts = BroadcastManager(db, **BROADCAST)
+    dp['broadcasts'] = broadcasts
+    dp.startup.register(broadcasts.start)
+    dp.shutdown.register(broadcasts.stop)
+    
+    # Поиск людей по общим мероприятиям и похожести анкет (индекс в памяти процесса)
+    similarity = dict(PROFILE_SIMILARITY)
+    profiles = ProfileMatrix(**similarity) if similarity.pop('enabled') else None
+    recommendations = SharedEventsIndex(db, profiles=profiles, **RECOMMENDATIONS)
+    dp['recommendations'] = recommendations
+    dp.startup.register(recommendations.start)
+    dp.shutdown.register(recommendations.stop)
+    
+    # Лента анкет: очередь кандидатов на пользователя, пересчет в фоне
+    feed = SwipeFeed(db, recommendations, **SWIPE_FEED)
+    dp['feed'] = feed
+    dp.shutdown.register(feed.stop)
+    
+    # Список мероприятий из каталога в памяти: страницы рисуются один раз на версию
+    event_catalog = EventCatalog(db, render_events_list, **EVENT_CATALOG)
+    dp['event_catalog'] = event_catalog
+    
+    # Inline-поиск мероприятий: страницы результатов кэшируются по запросу
+    inline_search = dict(INLINE_SEARCH)
+    inline_search.pop('cache_time')
+    dp['inline_search'] = InlineEventSearch(db, **inline_search)
+    
+    # Контекст пользователя загружается один раз на апдейт
+    admin_sessions = create_admin_session_store(db, **ADMIN_SESSIONS)
+    dp.update.outer_middleware(UserContextMiddleware(db, admin_sessions))
     
-    # Инициализация базы данных
-    db = Database(DATABASE_URL)
-    await db.init_db()
+    include_routers(dp)
+    return dp
+
+def include_routers(root: Router):
+    """Регистрация роутеров хендлеров (порядок важен)"""
+    root.include_router(admin_mode_router)  # Админский режим должен быть первым
+    root.include_router(menu_router)  # Меню
+    root.include_router(events_router)  # Мероприятия
+    root.include_router(broadcast_router)  # Рассылки из управления мероприятием
+    root.include_router(people_router)  # Поиск людей
+    root.include_router(inline_router)  # Inline-поиск мероприятий
+    root.include_router(registration_router)
+    root.include_router(admin_router)
+
+def resolve_update_types() -> List[str]:
+    """Типы апдейтов, которые обрабатывают хендлеры, без сборки диспетчера.
+    
+    Нужны супервизору многопроцессного режима: он только принимает апдейты,
+    а хранилище FSM, middleware и фоновые задачи есть лишь у воркеров.
+    """
+    root = Router(name='update_types')
+    include_routers(root)
+    return root.resolve_used_update_types()
+
+async def init_database() -> Database:
+    """Открыть базу с настройками из config.py и добавить админов из конфига"""
+    db = Database.shared(DATABASE_URL)
+    await db.init_db(
+        read_pool_size=DATABASE_READ_POOL_SIZE,
+        pragmas=SQLITE_PRAGMAS,
+        write_retry=SQLITE_WRITE_RETRY,
+        user_cache=USER_CACHE,
+        write_batching=WRITE_BATCHING
+    )
     
     # Инициализация админов из конфига
     for admin_id in ADMIN_IDS:
         await db.add_admin(admin_id, is_super_admin=True)
     
-    # Регистрация роутеров
-    dp.include_router(admin_mode_router)  # Админский режим должен быть первым
-    dp.include_router(menu_router)  # Меню
-    dp.include_router(events_router)  # Мероприятия
-    dp.include_router(registration_router)
-    dp.include_router(admin_router)
+    return db
+
+async def run_sharded():
+    """Супервизор: только принимает апдейты, обрабатывают их процессы-воркеры"""
+    # Отправляют сообщения воркеры - супервизору не нужны ни диспетчер, ни очередь отправки
+    bot = Bot(token=BOT_TOKEN)
+    try:
+        await run_supervisor(bot, resolve_update_types(), BOT_WORKERS, BOT_MODE, WEBHOOK)
+    finally:
+        await bot.session.close()
+
+async def main():
+    """Основная функция запуска бота"""
+    # Инициализация базы данных (в многопроцессном режиме - схема до старта воркеров)
+    db = await init_database()
+    logger.info(f"Бот запускается (режим {BOT_MODE}, воркеров: {BOT_WORKERS})...")
+    
+    if BOT_WORKERS > 1:
+        try:
+            await run_sharded()
+        except Exception as e:
+            logger.error(f"Ошибка при запуске бота: {e}")
+        finally:
+            await db.close()
+        return
     
-    logger.info("Бот запускается...")
+    # Инициализация бота и диспетчера
+    bot, outbound = create_bot()
+    dp = create_dispatcher(db, outbound)
     
     try:
         # Запуск бота
-        await dp.start_polling(bot, skip_updates=True)
+        if BOT_MODE == 'webhook':
+            server = WebhookServer(
+                bot, dp,
+                path=WEBHOOK['path'],
+                secret_token=WEBHOOK['secret_token'],
+                drain_timeout=WEBHOOK['drain_timeout']
+            )
+            await server.run(WEBHOOK['host'], WEBHOOK['port'], WEBHOOK['url'])
+        else:
+            # Как и при установке webhook: накопившиеся апдейты пропускаются
+            await bot.delete_webhook(drop_pending_updates=True)
+            await dp.start_polling(bot)
     except Exception as e:
         logger.error(f"Ошибка при запуске бота: {e}")
     finally:
+        await outbound.close()
         await bot.session.close()
+        # Сбрасывает несохраненные состояния FSM до закрытия базы
+        await dp.storage.close()
+        await db.close()
 
 if __name__ == "__main__":
     try:
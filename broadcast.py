@@ -0,0 +1,195 @@
+"""
+Рассылки админов: участникам мероприятия или всем верифицированным пользователям
+"""
+import asyncio
+import logging
+import time
+from typing import Any, Dict, List, Optional
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramAPIError
+from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup
+
+from database import Database
+from middlewares.outbound import PRIORITY_BULK, PRIORITY_NOTIFICATION, outbound_priority
+
+logger = logging.getLogger(__name__)
+
+STATUS_TITLES = {
+    'running': "⏳ Идет",
+    'done': "✅ Завершена",
+    'cancelled': "⏹ Отменена",
+}
+
+def format_broadcast_progress(broadcast: Dict[str, Any]) -> str:
+    """Текст сообщения с прогрессом рассылки"""
+    processed = broadcast['sent'] + broadcast['failed']
+    total = max(broadcast['total'], processed)
+    percent = processed / total if total else 1.0
+    return (
+        f"📣 **Рассылка #{broadcast['id']}** - {STATUS_TITLES.get(broadcast['status'], broadcast['status'])}\n\n"
+        f"Обработано: {processed}/{total} ({percent:.0%})\n"
+        f"✅ Доставлено: {broadcast['sent']}\n"
+        f"❌ Не доставлено: {broadcast['failed']}"
+    )
+
+def get_broadcast_progress_keyboard(broadcast: Dict[str, Any]) -> Optional[InlineKeyboardMarkup]:
+    """Кнопка отмены, пока рассылка идет"""
+    if broadcast['status'] != 'running':
+        return None
+    return InlineKeyboardMarkup(inline_keyboard=[[
+        InlineKeyboardButton(text="⏹ Отменить рассылку", callback_data=f"broadcast_cancel_{broadcast['id']}")
+    ]])
+
+class BroadcastManager:
+    """Выполняет рассылки в фоне, по одной задаче на рассылку.
+    
+    Получатели читаются из базы страницами по page_size (keyset по users.id),
+    каждая страница уходит пачками по concurrency сообщений с приоритетом
+    рассылки - темп задает очередь исходящих сообщений, ответы пользователям
+    ее обгоняют. После каждой пачки прогресс и курсор сохраняются в broadcasts,
+    поэтому после перезапуска рассылка продолжается с места остановки (пачка,
+    прерванная падением, может уйти повторно). Задачу держит процесс с
+    действующей арендой: несколько воркеров не отправят одну рассылку дважды,
+    а рассылку упавшего процесса подхватит другой.
+    """
+    
+    def __init__(self, db: Database, page_size: int = 500, concurrency: int = 30,
+                 lease: float = 60.0, progress_interval: float = 5.0):
+        self.db = db
+        self.page_size = page_size
+        self.concurrency = concurrency
+        self.lease = lease
+        self.progress_interval = progress_interval
+        self.bot: Optional[Bot] = None
+        self._jobs: Dict[int, asyncio.Task] = {}
+        self._claim_task: Optional[asyncio.Task] = None
+    
+    async def start(self, bot: Bot):
+        """Запуск вместе с диспетчером aiogram: продолжить незавершенные рассылки"""
+        self.bot = bot
+        self._claim_task = asyncio.create_task(self._claim_loop())
+    
+    async def stop(self):
+        """Остановить задачи; прогресс уже сохранен, аренда снимается"""
+        tasks = [task for task in (self._claim_task, *self._jobs.values()) if task is not None]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._claim_task = None
+    
+    async def create(self, audience: str, event_id: Optional[int], text: str, created_by: int,
+                     progress_chat_id: int) -> Dict[str, Any]:
+        """Создать рассылку, показать прогресс в progress_chat_id и запустить отправку"""
+        total = await self.db.count_broadcast_recipients(audience, event_id)
+        broadcast_id = await self.db.create_broadcast(
+            audience, event_id, text, created_by, total, time.time() + self.lease
+        )
+        broadcast = await self.db.get_broadcast(broadcast_id)
+        
+        message = await self.bot.send_message(
+            progress_chat_id,
+            format_broadcast_progress(broadcast),
+            reply_markup=get_broadcast_progress_keyboard(broadcast)
+        )
+        await self.db.set_broadcast_progress_message(broadcast_id, progress_chat_id, message.message_id)
+        broadcast.update(progress_chat_id=progress_chat_id, progress_message_id=message.message_id)
+        
+        self._spawn(broadcast)
+        logger.info(f"Admin {created_by} started broadcast {broadcast_id} ({audience}, {total} recipients)")
+        return broadcast
+    
+    async def cancel(self, broadcast_id: int) -> bool:
+        """Отменить рассылку; задача (в этом или другом процессе) остановится после текущей пачки"""
+        cancelled = await self.db.finish_broadcast(broadcast_id, 'cancelled')
+        if cancelled:
+            logger.info(f"Broadcast {broadcast_id} cancelled")
+        return cancelled
+    
+    def _spawn(self, broadcast: Dict[str, Any]):
+        task = asyncio.create_task(self._run(broadcast))
+        self._jobs[broadcast['id']] = task
+        task.add_done_callback(lambda _: self._jobs.pop(broadcast['id'], None))
+    
+    async def _claim_loop(self):
+        """Подхватывать рассылки без владельца (после перезапуска или падения воркера)"""
+        while True:
+            try:
+                now = time.time()
+                for broadcast in await self.db.claim_broadcasts(now, now + self.lease):
+                    if broadcast['id'] not in self._jobs:
+                        logger.info(f"Продолжаю рассылку {broadcast['id']} с получателя {broadcast['cursor']}")
+                        self._spawn(broadcast)
+            except Exception as e:
+                logger.error(f"Ошибка поиска незавершенных рассылок: {e}")
+            await asyncio.sleep(self.lease / 2)
+    
+    async def _run(self, broadcast: Dict[str, Any]):
+        last_report = time.monotonic()
+        try:
+            while broadcast['status'] == 'running':
+                recipients = await self.db.get_broadcast_recipients(
+                    broadcast['audience'], broadcast['event_id'], broadcast['cursor'], self.page_size
+                )
+                if not recipients:
+                    if await self.db.finish_broadcast(broadcast['id'], 'done'):
+                        broadcast['status'] = 'done'
+                    else:
+                        broadcast = await self.db.get_broadcast(broadcast['id'])
+                    break
+                
+                for start in range(0, len(recipients), self.concurrency):
+                    chunk = recipients[start:start + self.concurrency]
+                    results = await self._send_chunk(broadcast['text'], chunk)
+                    sent = sum(results)
+                    
+                    broadcast['cursor'] = chunk[-1][0]
+                    broadcast['sent'] += sent
+                    broadcast['failed'] += len(results) - sent
+                    broadcast['status'] = await self.db.save_broadcast_progress(
+                        broadcast['id'], broadcast['cursor'], sent, len(results) - sent,
+                        time.time() + self.lease
+                    )
+                    if broadcast['status'] != 'running':
+                        break
+                    
+                    if time.monotonic() - last_report >= self.progress_interval:
+                        last_report = time.monotonic()
+                        await self._report(broadcast)
+            
+            await self._report(broadcast)
+        except asyncio.CancelledError:
+            # Процесс останавливается: отдаем рассылку следующему запуску
+            await asyncio.shield(self.db.release_broadcast(broadcast['id']))
+            raise
+        except Exception as e:
+            logger.error(f"Рассылка {broadcast['id']} прервана: {e}")
+    
+    async def _send_chunk(self, text: str, chunk: List[tuple]) -> List[bool]:
+        with outbound_priority(PRIORITY_BULK):
+            return await asyncio.gather(*(self._send(telegram_id, text) for _, telegram_id in chunk))
+    
+    async def _send(self, telegram_id: int, text: str) -> bool:
+        try:
+            await self.bot.send_message(telegram_id, text)
+            return True
+        except TelegramAPIError as e:
+            # Заблокировал бота, удалил аккаунт, исчерпаны повторы после 429
+            logger.debug(f"Рассылка: не доставлено {telegram_id}: {e}")
+            return False
+    
+    async def _report(self, broadcast: Dict[str, Any]):
+        """Обновить сообщение с прогрессом у админа"""
+        if not broadcast.get('progress_message_id'):
+            return
+        try:
+            with outbound_priority(PRIORITY_NOTIFICATION):
+                await self.bot.edit_message_text(
+                    format_broadcast_progress(broadcast),
+                    chat_id=broadcast['progress_chat_id'],
+                    message_id=broadcast['progress_message_id'],
+                    reply_markup=get_broadcast_progress_keyboard(broadcast)
+                )
+        except TelegramAPIError as e:
+            # "message is not modified" и удаленное админом сообщение не мешают рассылке
+            logger.debug(f"Не удалось обновить прогресс рассылки {broadcast['id']}: {e}")
@@ -0,0 +1,80 @@
+"""
+Простой внутрипроцессный LRU-кэш с TTL и счетчиками попаданий
+"""
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+class LRUCache:
+    """LRU-кэш с ограничением по размеру и времени жизни записей.
+    
+    epoch увеличивается при каждой инвалидации: читатель запоминает его
+    перед запросом к базе и кладет результат в кэш только если за время
+    запроса ничего не инвалидировалось (иначе в кэш могла бы попасть
+    устаревшая строка).
+    """
+    
+    def __init__(self, max_size: int = 10000, ttl: float = 300.0):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._data: OrderedDict = OrderedDict()
+        self.epoch = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Получить значение или None (с учетом TTL)"""
+        item = self._data.get(key)
+        if item is None:
+            self.misses += 1
+            return None
+        
+        value, expires_at = item
+        if expires_at < time.monotonic():
+            del self._data[key]
+            self.misses += 1
+            return None
+        
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+    
+    def set(self, key: Hashable, value: Any, epoch: Optional[int] = None):
+        """Сохранить значение (пропускается, если epoch устарел)"""
+        if self.max_size <= 0:
+            return
+        if epoch is not None and epoch != self.epoch:
+            return
+        
+        self._data[key] = (value, time.monotonic() + self.ttl)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_size:
+            self._data.popitem(last=False)
+            self.evictions += 1
+    
+    def invalidate(self, *keys: Hashable):
+        """Удалить записи по ключам"""
+        self.epoch += 1
+        for key in keys:
+            self._data.pop(key, None)
+    
+    def clear(self):
+        """Очистить кэш целиком"""
+        self.epoch += 1
+        self._data.clear()
+    
+    def __len__(self) -> int:
+        return len(self._data)
+    
+    def stats(self) -> Dict[str, Any]:
+        """Счетчики для подбора размера кэша"""
+        requests = self.hits + self.misses
+        return {
+            'size': len(self._data),
+            'max_size': self.max_size,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': self.hits / requests if requests else 0.0,
+        }
@@ -10,6 +10,142 @@ BOT_TOKEN = os.getenv('BOT_TOKEN', 'YOUR_BOT_TOKEN_HERE')
 # Database
 DATABASE_URL = os.getenv('DATABASE_URL', 'database.db')
 
+# Способ получения апдейтов: polling или webhook
+BOT_MODE = os.getenv('BOT_MODE', 'polling').lower()
+
+# Сколько апдейтов (разных пользователей) обрабатывается одновременно в одном процессе
+UPDATE_CONCURRENCY = int(os.getenv('UPDATE_CONCURRENCY', '64'))
+
+# Число процессов-воркеров (больше 1 - супервизор раздает апдейты по from_user.id)
+BOT_WORKERS = int(os.getenv('BOT_WORKERS', '1'))
+
+# Настройки webhook-сервера (без WEBHOOK_URL webhook в Telegram не регистрируется)
+WEBHOOK = {
+    'url': os.getenv('WEBHOOK_URL', ''),
+    'path': os.getenv('WEBHOOK_PATH', '/webhook'),
+    'host': os.getenv('WEBHOOK_HOST', '0.0.0.0'),
+    'port': int(os.getenv('WEBHOOK_PORT', '8080')),
+    'secret_token': os.getenv('WEBHOOK_SECRET') or None,
+    'drain_timeout': float(os.getenv('WEBHOOK_DRAIN_TIMEOUT', '30')),
+}
+
+# Исходящие сообщения: лимиты Telegram (общий делится между воркерами) и повторы при 429
+OUTBOUND = {
+    'global_rate': float(os.getenv('OUTBOUND_GLOBAL_RATE', '30')),
+    'chat_rate': float(os.getenv('OUTBOUND_CHAT_RATE', '1')),
+    'chat_burst': int(os.getenv('OUTBOUND_CHAT_BURST', '3')),
+    'group_rate': float(os.getenv('OUTBOUND_GROUP_PER_MINUTE', '20')) / 60,
+    'max_retries': int(os.getenv('OUTBOUND_MAX_RETRIES', '3')),
+}
+
+# Доставка уведомлений из outbox (пачками, с повторами и экспоненциальной задержкой)
+OUTBOX = {
+    'interval': float(os.getenv('OUTBOX_INTERVAL', '1.0')),
+    'batch_size': int(os.getenv('OUTBOX_BATCH_SIZE', '50')),
+    'max_attempts': int(os.getenv('OUTBOX_MAX_ATTEMPTS', '8')),
+    'lease': float(os.getenv('OUTBOX_LEASE', '60')),
+    'retry_delay': float(os.getenv('OUTBOX_RETRY_DELAY', '5')),
+}
+
+# Рассылки админов: страница получателей из базы, сообщений в пачке, аренда задачи и частота отчета
+BROADCAST = {
+    'page_size': int(os.getenv('BROADCAST_PAGE_SIZE', '500')),
+    'concurrency': int(os.getenv('BROADCAST_CONCURRENCY', '30')),
+    'lease': float(os.getenv('BROADCAST_LEASE', '60')),
+    'progress_interval': float(os.getenv('BROADCAST_PROGRESS_INTERVAL', '5')),
+}
+
+# Поиск людей: сколько кандидатов держать в рейтинге, размер и время жизни кэша рейтингов
+RECOMMENDATIONS = {
+    'max_candidates': int(os.getenv('RECOMMENDATIONS_MAX_CANDIDATES', '100')),
+    'cache_size': int(os.getenv('RECOMMENDATIONS_CACHE_SIZE', '1000')),
+    'cache_ttl': float(os.getenv('RECOMMENDATIONS_CACHE_TTL', '600')),
+}
+
+# Похожесть анкет в поиске людей: матрица признаков верифицированных профилей (NumPy)
+PROFILE_SIMILARITY = {
+    'enabled': os.getenv('PROFILE_SIMILARITY', 'True').lower() == 'true',
+    'dims': int(os.getenv('PROFILE_SIMILARITY_DIMS', '64')),
+    'course_weight': float(os.getenv('PROFILE_SIMILARITY_COURSE_WEIGHT', '0.3')),
+    'age_weight': float(os.getenv('PROFILE_SIMILARITY_AGE_WEIGHT', '0.2')),
+    'major_weight': float(os.getenv('PROFILE_SIMILARITY_MAJOR_WEIGHT', '0.3')),
+    'description_weight': float(os.getenv('PROFILE_SIMILARITY_DESCRIPTION_WEIGHT', '0.2')),
+}
+
+# Лента анкет: размер очереди кандидатов на пользователя, порог фонового пересчета,
+# сколько лент держать в памяти и как долго
+SWIPE_FEED = {
+    'queue_size': int(os.getenv('SWIPE_FEED_QUEUE_SIZE', '20')),
+    'refill_below': int(os.getenv('SWIPE_FEED_REFILL_BELOW', '5')),
+    'cache_size': int(os.getenv('SWIPE_FEED_CACHE_SIZE', '1000')),
+    'cache_ttl': float(os.getenv('SWIPE_FEED_CACHE_TTL', '1800')),
+}
+
+# Каталог активных мероприятий в памяти: сколько секунд он живет без create_event/update_event
+# (так видны изменения из других процессов-воркеров) и сколько отрисованных страниц хранить
+EVENT_CATALOG = {
+    'ttl': float(os.getenv('EVENT_CATALOG_TTL', '60')),
+    'cache_size': int(os.getenv('EVENT_CATALOG_CACHE_SIZE', '100')),
+}
+
+# Inline-поиск мероприятий (@бот запрос): результатов на страницу, кэш страниц в процессе
+# и сколько секунд Telegram кэширует ответ у себя
+INLINE_SEARCH = {
+    'page_size': int(os.getenv('INLINE_SEARCH_PAGE_SIZE', '20')),
+    'cache_size': int(os.getenv('INLINE_SEARCH_CACHE_SIZE', '1000')),
+    'cache_ttl': float(os.getenv('INLINE_SEARCH_CACHE_TTL', '60')),
+    'cache_time': int(os.getenv('INLINE_SEARCH_CACHE_TIME', '30')),
+}
+
+# Количество постоянных соединений для чтения (запись всегда идет через одно)
+DATABASE_READ_POOL_SIZE = int(os.getenv('DATABASE_READ_POOL_SIZE', '4'))
+
+# Профиль PRAGMA, применяемый к каждому соединению пула
+SQLITE_PRAGMAS = {
+    'journal_mode': os.getenv('SQLITE_JOURNAL_MODE', 'WAL'),
+    'synchronous': os.getenv('SQLITE_SYNCHRONOUS', 'NORMAL'),
+    'busy_timeout': int(os.getenv('SQLITE_BUSY_TIMEOUT_MS', '5000')),
+    'mmap_size': int(os.getenv('SQLITE_MMAP_SIZE_MB', '64')) * 1024 * 1024,
+    # Отрицательное значение - размер кэша в KiB
+    'cache_size': -int(os.getenv('SQLITE_CACHE_SIZE_KB', '16384')),
+}
+
+# Кэш пользователей (get_user / get_user_by_id)
+USER_CACHE = {
+    'max_size': int(os.getenv('USER_CACHE_SIZE', '10000')),
+    'ttl': float(os.getenv('USER_CACHE_TTL', '300')),
+    # Как часто сверяться с журналом user_changes (изменения из других процессов-воркеров)
+    'sync_interval': float(os.getenv('USER_CACHE_SYNC_INTERVAL', '1')),
+}
+
+# Групповой коммит для join_event/leave_event/update_user (opt-in)
+WRITE_BATCHING = {
+    'enabled': os.getenv('WRITE_BATCHING', 'False').lower() == 'true',
+    'interval_ms': float(os.getenv('WRITE_BATCHING_INTERVAL_MS', '5')),
+    'max_batch': int(os.getenv('WRITE_BATCHING_MAX_BATCH', '256')),
+}
+
+# Хранилище состояний FSM: sqlite (переживает перезапуск) или memory
+FSM_STORAGE = {
+    'backend': os.getenv('FSM_STORAGE', 'sqlite').lower(),
+    'ttl': float(os.getenv('FSM_STATE_TTL', str(7 * 24 * 3600))),
+    'cache_size': int(os.getenv('FSM_CACHE_SIZE', '10000')),
+    'flush_interval': float(os.getenv('FSM_FLUSH_INTERVAL', '1.0')),
+}
+
+# Админский режим: sqlite (общий для нескольких процессов) или memory, время жизни в секундах
+ADMIN_SESSIONS = {
+    'backend': os.getenv('ADMIN_SESSIONS', 'sqlite').lower(),
+    'ttl': float(os.getenv('ADMIN_SESSION_TTL', str(12 * 3600))),
+}
+
+# Повтор записи при SQLITE_BUSY (экспоненциальная задержка)
+SQLITE_WRITE_RETRY = {
+    'attempts': int(os.getenv('SQLITE_WRITE_RETRY_ATTEMPTS', '5')),
+    'base_delay': float(os.getenv('SQLITE_WRITE_RETRY_BASE_DELAY', '0.05')),
+    'max_delay': float(os.getenv('SQLITE_WRITE_RETRY_MAX_DELAY', '1.0')),
+}
+
 # Admin IDs и usernames (парсинг из .env как строка с запятыми)
 def parse_admins() -> tuple[List[int], List[str]]:
     """Парсинг ID и username админов из переменной окружения"""
@@ -24,7 +160,7 @@ def parse_admins() -> tuple[List[int], List[str]]:
         admin_str = admin_str.strip()
         if not admin_str:
             continue
-            
+        
         # Если это число - значит ID
         try:
             admin_id = int(admin_str)
@@ -38,6 +174,9 @@ def parse_admins() -> tuple[List[int], List[str]]:
 
 ADMIN_IDS, ADMIN_USERNAMES = parse_admins()
 
+# Сводка новых заявок админам раз в N секунд (0 - сообщение на каждую заявку)
+ADMIN_DIGEST_INTERVAL = float(os.getenv('ADMIN_DIGEST_INTERVAL', '0'))
+
 # Debug mode
 DEBUG = os.getenv('DEBUG', 'False').lower() == 'true'
 
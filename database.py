@@ -1,15 +1,481 @@
 import aiosqlite
+import asyncio
+import functools
+import json
 import logging
+import random
+import re
+import sqlite3
+import time
+from collections import deque
+from contextlib import asynccontextmanager
 from datetime import datetime
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Tuple, Callable, Awaitable
+
+from cache import LRUCache
+
+# Профиль PRAGMA по умолчанию (переопределяется через config.SQLITE_PRAGMAS)
+DEFAULT_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,
+    'mmap_size': 64 * 1024 * 1024,
+    'cache_size': -16384,
+}
+
+# Вторичные индексы (создаются в init_db и в migrate_database.py)
+INDEXES = [
+    # Очередь модерации: WHERE status = 'pending' ORDER BY created_at
+    'CREATE INDEX IF NOT EXISTS idx_verification_requests_status_created '
+    'ON verification_requests (status, created_at)',
+    # Активные мероприятия: WHERE is_active = TRUE ORDER BY created_at DESC
+    'CREATE INDEX IF NOT EXISTS idx_events_active_created '
+    'ON events (is_active, created_at)',
+    # Полный список мероприятий для админов: ORDER BY created_at DESC
+    'CREATE INDEX IF NOT EXISTS idx_events_created '
+    'ON events (created_at)',
+    # Участники мероприятия: JOIN/COUNT по event_id (покрывающий)
+    'CREATE INDEX IF NOT EXISTS idx_user_events_event '
+    'ON user_events (event_id, user_id)',
+    # Статистика по заполненным анкетам: WHERE name IS NOT NULL
+    'CREATE INDEX IF NOT EXISTS idx_users_profile_status '
+    'ON users (verification_status) WHERE name IS NOT NULL',
+    # Очистка брошенных FSM-сценариев: WHERE updated_at < ?
+    'CREATE INDEX IF NOT EXISTS idx_fsm_states_updated '
+    'ON fsm_states (updated_at)',
+    # Очистка истекших админских сессий: WHERE expires_at < ?
+    'CREATE INDEX IF NOT EXISTS idx_admin_sessions_expires '
+    'ON admin_sessions (expires_at)',
+    # Доставка уведомлений: WHERE status = 'pending' AND next_attempt_at <= ? ORDER BY next_attempt_at
+    'CREATE INDEX IF NOT EXISTS idx_notification_outbox_status_next '
+    'ON notification_outbox (status, next_attempt_at)',
+    # Незавершенные рассылки без владельца: WHERE status = 'running' AND lease_until < ?
+    'CREATE INDEX IF NOT EXISTS idx_broadcasts_status_lease '
+    'ON broadcasts (status, lease_until)',
+]
+
+# Полнотекстовый поиск: FTS5-таблица -> (таблица с данными, индексируемые столбцы, веса bm25)
+FTS_TABLES = {
+    'users_fts': ('users', ('name', 'major', 'description'), (10.0, 5.0, 1.0)),
+    'events_fts': ('events', ('name', 'description'), (5.0, 1.0)),
+}
+
+# Слов поискового запроса, не больше
+MAX_SEARCH_TERMS = 8
+
+# bm25 считается по стольким самым новым совпадениям: для частых слов ранжирование
+# всех совпадений стоило бы O(совпадений) на каждую страницу
+SEARCH_WINDOW = 1000
+
+def fts_schema(fts_table: str) -> List[str]:
+    """CREATE VIRTUAL TABLE и триггеры, синхронизирующие FTS5-таблицу с исходной"""
+    table, columns, _ = FTS_TABLES[fts_table]
+    column_list = ', '.join(columns)
+    new_values = ', '.join(f'new.{column}' for column in columns)
+    old_values = ', '.join(f'old.{column}' for column in columns)
+    # Внешнее содержимое: текст хранится только в исходной таблице, FTS5 держит индекс
+    delete_old = (f"INSERT INTO {fts_table} ({fts_table}, rowid, {column_list}) "
+                  f"VALUES ('delete', old.id, {old_values});")
+    insert_new = f"INSERT INTO {fts_table} (rowid, {column_list}) VALUES (new.id, {new_values});"
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts_table} USING fts5({column_list}, "
+        f"content='{table}', content_rowid='id', tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+        f"CREATE TRIGGER IF NOT EXISTS {fts_table}_insert AFTER INSERT ON {table} BEGIN {insert_new} END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts_table}_delete AFTER DELETE ON {table} BEGIN {delete_old} END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts_table}_update AFTER UPDATE OF {column_list} ON {table} "
+        f"BEGIN {delete_old} {insert_new} END",
+    ]
+
+def fts_query(text: str) -> Optional[str]:
+    """Запрос пользователя -> выражение MATCH: все слова, каждое как префикс (None - искать нечего)"""
+    terms = re.findall(r'\w+', text.lower())[:MAX_SEARCH_TERMS]
+    # Слова в кавычках: операторы FTS5 (AND, NEAR, "-") из текста не интерпретируются
+    return ' '.join(f'"{term}"*' for term in terms) or None
+
+# Аудитории рассылок
+BROADCAST_AUDIENCES = ('event', 'verified')
+
+DEFAULT_WRITE_RETRY = {
+    'attempts': 5,
+    'base_delay': 0.05,
+    'max_delay': 1.0,
+}
+
+# Размер страницы для списков с постраничной навигацией
+DEFAULT_PAGE_SIZE = 8
+
+# Групповой коммит частых записей (по умолчанию выключен)
+DEFAULT_WRITE_BATCHING = {
+    'enabled': False,
+    'interval_ms': 5,
+    'max_batch': 256,
+}
+
+# Сколько последних записей журнала membership_changes хранить (отставший процесс перечитывает индекс)
+MEMBERSHIP_CHANGES_KEPT = 100000
+
+# Уведомление для outbox: (idempotency_key, chat_id, kind, payload, send_at)
+Notification = Tuple[str, int, str, Optional[Dict[str, Any]], Optional[float]]
+
+DEFAULT_USER_CACHE = {
+    'max_size': 10000,
+    'ttl': 300,
+    'sync_interval': 1.0,
+}
+
+# Сколько последних записей журнала user_changes хранить и читать за раз
+# (отставший процесс очищает кэш пользователей целиком)
+USER_CHANGES_KEPT = 10000
+USER_CHANGES_BATCH = 1000
+
+def is_busy_error(error: Exception) -> bool:
+    """Проверить, что ошибка SQLite вызвана блокировкой базы (SQLITE_BUSY/LOCKED)"""
+    if not isinstance(error, sqlite3.OperationalError):
+        return False
+    
+    code = getattr(error, 'sqlite_errorcode', None)
+    if code is not None:
+        return code & 0xFF in (sqlite3.SQLITE_BUSY, sqlite3.SQLITE_LOCKED)
+    
+    message = str(error).lower()
+    return 'locked' in message or 'busy' in message
+
+def retry_on_busy(method):
+    """Повторить метод записи с экспоненциальной задержкой при SQLITE_BUSY.
+    
+    Транзакция откатывается в ConnectionPool.writer(), поэтому повтор
+    выполняет метод целиком заново.
+    """
+    @functools.wraps(method)
+    async def wrapper(self, *args, **kwargs):
+        policy = self.write_retry
+        attempt = 1
+        while True:
+            try:
+                return await method(self, *args, **kwargs)
+            except sqlite3.OperationalError as e:
+                if not is_busy_error(e) or attempt >= policy['attempts']:
+                    raise
+                
+                delay = min(policy['max_delay'], policy['base_delay'] * 2 ** (attempt - 1))
+                delay *= random.uniform(0.5, 1.0)
+                logging.warning(
+                    f"База занята в {method.__name__} (попытка {attempt}/{policy['attempts']}), "
+                    f"повтор через {delay:.2f} с"
+                )
+                await asyncio.sleep(delay)
+                attempt += 1
+    
+    return wrapper
+
+class ConnectionPool:
+    """Пул постоянных соединений с отдельными полосами для чтения и записи.
+    
+    SQLite допускает только одного писателя, поэтому запись идет через
+    единственное соединение под блокировкой, а чтение - через набор
+    соединений, выдаваемых ожидающим строго по очереди. asyncio.Queue для
+    этого не подходит: освободившееся соединение может забрать задача,
+    которая только что пришла, и при нагрузке ожидающий ждет бесконечно.
+    """
+    
+    def __init__(self, db_path: str, read_pool_size: int = 4, pragmas: Optional[Dict[str, Any]] = None):
+        self.db_path = db_path
+        self.read_pool_size = read_pool_size
+        self.pragmas = dict(DEFAULT_PRAGMAS if pragmas is None else pragmas)
+        # Свободные соединения для чтения и ожидающие их (в порядке прихода)
+        self._idle_readers: deque = deque()
+        self._reader_waiters: deque = deque()
+        self._all_readers: List[aiosqlite.Connection] = []
+        self._writer: Optional[aiosqlite.Connection] = None
+        self._write_lock = asyncio.Lock()
+        self._open_lock = asyncio.Lock()
+    
+    @property
+    def is_open(self) -> bool:
+        return self._writer is not None
+    
+    async def _create_connection(self, is_writer: bool = False) -> aiosqlite.Connection:
+        conn = await aiosqlite.connect(self.db_path)
+        conn.row_factory = aiosqlite.Row
+        await self._apply_pragmas(conn, is_writer)
+        return conn
+    
+    async def _apply_pragmas(self, conn: aiosqlite.Connection, is_writer: bool):
+        """Применить профиль PRAGMA к соединению.
+        
+        journal_mode хранится в самом файле базы, поэтому его достаточно
+        выставить один раз через соединение записи.
+        """
+        for name, value in self.pragmas.items():
+            if name == 'journal_mode' and not is_writer:
+                continue
+            cursor = await conn.execute(f'PRAGMA {name} = {value}')
+            if name == 'journal_mode':
+                row = await cursor.fetchone()
+                logging.info(f"SQLite journal_mode: {row[0] if row else 'unknown'}")
+    
+    async def open(self):
+        """Открыть соединения пула (повторный вызов ничего не делает)"""
+        async with self._open_lock:
+            if self.is_open:
+                return
+            
+            self._writer = await self._create_connection(is_writer=True)
+            for _ in range(self.read_pool_size):
+                conn = await self._create_connection()
+                self._all_readers.append(conn)
+                self._release_reader(conn)
+            
+            logging.info(
+                f"Пул соединений открыт: {self.read_pool_size} чтение + 1 запись ({self.db_path})"
+            )
+    
+    async def close(self):
+        """Закрыть все соединения пула"""
+        async with self._open_lock:
+            if not self.is_open:
+                return
+            
+            async with self._write_lock:
+                await self._writer.close()
+                self._writer = None
+            
+            for conn in self._all_readers:
+                await conn.close()
+            self._all_readers = []
+            self._idle_readers.clear()
+            
+            logging.info("Пул соединений закрыт")
+    
+    @asynccontextmanager
+    async def reader(self):
+        """Соединение для чтения из пула"""
+        if not self.is_open:
+            await self.open()
+        
+        conn = await self._acquire_reader()
+        try:
+            yield conn
+        finally:
+            self._release_reader(conn)
+    
+    async def _acquire_reader(self) -> aiosqlite.Connection:
+        if self._idle_readers and not self._reader_waiters:
+            return self._idle_readers.popleft()
+        
+        waiter = asyncio.get_running_loop().create_future()
+        self._reader_waiters.append(waiter)
+        try:
+            return await waiter
+        except asyncio.CancelledError:
+            # Соединение успели отдать, но задачу отменили - передаем его дальше
+            if waiter.done() and not waiter.cancelled():
+                self._release_reader(waiter.result())
+            raise
+    
+    def _release_reader(self, conn: aiosqlite.Connection):
+        while self._reader_waiters:
+            waiter = self._reader_waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(conn)
+                return
+        self._idle_readers.append(conn)
+    
+    @asynccontextmanager
+    async def writer(self):
+        """Соединение для записи: коммит при успехе, откат при ошибке"""
+        if not self.is_open:
+            await self.open()
+        
+        async with self._write_lock:
+            conn = self._writer
+            try:
+                yield conn
+            except BaseException:
+                await conn.rollback()
+                raise
+            else:
+                await conn.commit()
+
+
+class WriteBatcher:
+    """Очередь записей с групповым коммитом.
+    
+    Операции копятся несколько миллисекунд и выполняются в одной транзакции
+    (один commit/fsync на пачку). Вызывающий получает результат только после
+    коммита всей пачки. Если одна из операций упала, пачка откатывается и
+    операции повторяются по одной, чтобы ошибка досталась только виновнику.
+    """
+    
+    def __init__(self, pool: ConnectionPool, interval_ms: float = 5, max_batch: int = 256):
+        self.pool = pool
+        self.interval = interval_ms / 1000
+        self.max_batch = max_batch
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self.batches = 0
+        self.operations = 0
+        self.fallbacks = 0
+    
+    @property
+    def is_running(self) -> bool:
+        return self._task is not None and not self._task.done()
+    
+    def start(self):
+        """Запустить фоновую задачу коммитов"""
+        if self.is_running:
+            return
+        self._queue = asyncio.Queue()
+        self._task = asyncio.create_task(self._run())
+    
+    async def stop(self):
+        """Дождаться записи накопленных операций и остановить задачу"""
+        if not self.is_running:
+            return
+        await self._queue.join()
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+    
+    async def submit(self, operation: Callable[..., Awaitable[Any]], *args) -> Any:
+        """Поставить операцию в очередь и дождаться ее коммита"""
+        if not self.is_running:
+            self.start()
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((operation, args, future))
+        return await future
+    
+    async def _run(self):
+        while True:
+            batch = [await self._queue.get()]
+            if self.interval > 0:
+                await asyncio.sleep(self.interval)
+            while len(batch) < self.max_batch and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            
+            try:
+                await self._commit(batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+    
+    async def _commit(self, batch):
+        try:
+            async with self.pool.writer() as db:
+                results = [await operation(db, *args) for operation, args, _ in batch]
+        except Exception as e:
+            if len(batch) == 1 or is_busy_error(e):
+                # Ошибка не конкретной операции - отдаем ее всем вызывающим
+                self._resolve(batch, error=e)
+                return
+            self.fallbacks += 1
+            for item in batch:
+                await self._commit_single(item)
+            return
+        
+        self.batches += 1
+        self.operations += len(batch)
+        for (_, _, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+    
+    async def _commit_single(self, item):
+        operation, args, future = item
+        try:
+            async with self.pool.writer() as db:
+                result = await operation(db, *args)
+        except Exception as e:
+            self._resolve([item], error=e)
+        else:
+            self.batches += 1
+            self.operations += 1
+            if not future.done():
+                future.set_result(result)
+    
+    @staticmethod
+    def _resolve(batch, error: Exception):
+        for _, _, future in batch:
+            if not future.done():
+                future.set_exception(error)
+
 
 class Database:
-    def __init__(self, db_path: str):
+    DEFAULT_READ_POOL_SIZE = 4
+    
+    # Общие экземпляры по пути к базе, чтобы все роутеры делили один пул
+    _shared: Dict[str, 'Database'] = {}
+    
+    def __init__(self, db_path: str, read_pool_size: int = DEFAULT_READ_POOL_SIZE,
+                 pragmas: Optional[Dict[str, Any]] = None,
+                 write_retry: Optional[Dict[str, Any]] = None,
+                 user_cache: Optional[Dict[str, Any]] = None,
+                 write_batching: Optional[Dict[str, Any]] = None):
         self.db_path = db_path
+        self.pool = ConnectionPool(db_path, read_pool_size, pragmas)
+        self.write_retry = dict(DEFAULT_WRITE_RETRY if write_retry is None else write_retry)
+        self._configure_user_cache(DEFAULT_USER_CACHE if user_cache is None else user_cache)
+        self.write_batcher: Optional[WriteBatcher] = None
+        self._configure_write_batching(write_batching or DEFAULT_WRITE_BATCHING)
+        # Растет при каждом create_event/update_event этого процесса: кэши каталога
+        # мероприятий сбрасываются, увидев новую версию
+        self.events_version = 0
+    
+    @classmethod
+    def shared(cls, db_path: str) -> 'Database':
+        """Получить общий для процесса экземпляр базы данных"""
+        if db_path not in cls._shared:
+            cls._shared[db_path] = cls(db_path)
+        return cls._shared[db_path]
+    
+    def _configure_write_batching(self, settings: Dict[str, Any]):
+        if settings.get('enabled'):
+            self.write_batcher = WriteBatcher(
+                self.pool,
+                interval_ms=settings.get('interval_ms', DEFAULT_WRITE_BATCHING['interval_ms']),
+                max_batch=settings.get('max_batch', DEFAULT_WRITE_BATCHING['max_batch'])
+            )
+        else:
+            self.write_batcher = None
+    
+    async def _run_write(self, operation: Callable[..., Awaitable[Any]], *args) -> Any:
+        """Выполнить операцию записи: через групповой коммит, если он включен"""
+        if self.write_batcher is not None:
+            return await self.write_batcher.submit(operation, *args)
+        
+        async with self.pool.writer() as db:
+            return await operation(db, *args)
+    
+    async def close(self):
+        """Закрыть пул соединений (вызывается при остановке бота)"""
+        if self.write_batcher is not None:
+            await self.write_batcher.stop()
+        await self.pool.close()
     
-    async def init_db(self):
-        """Инициализация базы данных и создание таблиц"""
-        async with aiosqlite.connect(self.db_path) as db:
+    async def init_db(self, read_pool_size: Optional[int] = None,
+                      pragmas: Optional[Dict[str, Any]] = None,
+                      write_retry: Optional[Dict[str, Any]] = None,
+                      user_cache: Optional[Dict[str, Any]] = None,
+                      write_batching: Optional[Dict[str, Any]] = None):
+        """Инициализация базы данных, пула соединений и создание таблиц"""
+        if not self.pool.is_open:
+            if read_pool_size is not None:
+                self.pool.read_pool_size = read_pool_size
+            if pragmas is not None:
+                self.pool.pragmas = dict(pragmas)
+        if write_retry is not None:
+            self.write_retry = dict(write_retry)
+        if user_cache is not None:
+            self._configure_user_cache(user_cache)
+        if write_batching is not None:
+            if self.write_batcher is not None:
+                await self.write_batcher.stop()
+            self._configure_write_batching(write_batching)
+        await self.pool.open()
+        
+        async with self.pool.writer() as db:
             # Таблица пользователей
             await db.execute('''
                 CREATE TABLE IF NOT EXISTS users (
@@ -59,6 +525,7 @@ class Database:
                     is_active BOOLEAN DEFAULT TRUE,
                     created_by INTEGER NOT NULL,
                     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    participant_count INTEGER NOT NULL DEFAULT 0,
                     FOREIGN KEY (created_by) REFERENCES admins (telegram_id)
                 )
             ''')
@@ -75,30 +542,259 @@ class Database:
                 )
             ''')
             
-            await db.commit()
+            # Состояния FSM (незавершенная регистрация, черновики мероприятий)
+            await db.execute('''
+                CREATE TABLE IF NOT EXISTS fsm_states (
+                    storage_key TEXT PRIMARY KEY,
+                    state TEXT,
+                    data BLOB,
+                    updated_at REAL NOT NULL
+                )
+            ''')
+            
+            # Админский режим (общий для всех процессов бота)
+            await db.execute('''
+                CREATE TABLE IF NOT EXISTS admin_sessions (
+                    telegram_id INTEGER PRIMARY KEY,
+                    expires_at REAL NOT NULL
+                )
+            ''')
+            
+            # Админы из ADMIN_USERNAMES: username -> telegram_id (заполняется при обращении к боту)
+            await db.execute('''
+                CREATE TABLE IF NOT EXISTS admin_usernames (
+                    username TEXT PRIMARY KEY,
+                    telegram_id INTEGER NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+            ''')
+            
+            # Рассылки: прогресс сохраняется после каждой пачки, задачу можно продолжить после перезапуска
+            await db.execute('''
+                CREATE TABLE IF NOT EXISTS broadcasts (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    audience TEXT NOT NULL,
+                    event_id INTEGER,
+                    text TEXT NOT NULL,
+                    status TEXT DEFAULT 'running',
+                    cursor INTEGER DEFAULT 0,
+                    total INTEGER DEFAULT 0,
+                    sent INTEGER DEFAULT 0,
+                    failed INTEGER DEFAULT 0,
+                    created_by INTEGER NOT NULL,
+                    progress_chat_id INTEGER,
+                    progress_message_id INTEGER,
+                    lease_until REAL DEFAULT 0,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    finished_at TIMESTAMP,
+                    FOREIGN KEY (event_id) REFERENCES events (id)
+                )
+            ''')
+            
+            # Журнал изменений участия для индекса общих мероприятий:
+            # (user_id, event_id) - запись/отписка, (NULL, event_id) - смена активности мероприятия,
+            # (user_id, NULL) - пользователь прошел верификацию или изменил анкету
+            await db.execute('''
+                CREATE TABLE IF NOT EXISTS membership_changes (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    user_id INTEGER,
+                    event_id INTEGER
+                )
+            ''')
+            
+            # Журнал изменений строк users: по нему процессы-воркеры сбрасывают свой кэш пользователей
+            await db.execute('''
+                CREATE TABLE IF NOT EXISTS user_changes (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    user_id INTEGER NOT NULL,
+                    telegram_id INTEGER NOT NULL
+                )
+            ''')
+            
+            # Лайки и дизлайки в ленте анкет: одна реакция на пару
+            await db.execute('''
+                CREATE TABLE IF NOT EXISTS reactions (
+                    user_id INTEGER NOT NULL,
+                    target_id INTEGER NOT NULL,
+                    is_like BOOLEAN NOT NULL,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    PRIMARY KEY (user_id, target_id),
+                    FOREIGN KEY (user_id) REFERENCES users (id),
+                    FOREIGN KEY (target_id) REFERENCES users (id)
+                )
+            ''')
+            
+            # Взаимные симпатии (user_a < user_b)
+            await db.execute('''
+                CREATE TABLE IF NOT EXISTS matches (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    user_a INTEGER NOT NULL,
+                    user_b INTEGER NOT NULL,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    UNIQUE (user_a, user_b),
+                    FOREIGN KEY (user_a) REFERENCES users (id),
+                    FOREIGN KEY (user_b) REFERENCES users (id)
+                )
+            ''')
+            
+            # Исходящие уведомления: пишутся в одной транзакции с изменением, доставляются в фоне
+            await db.execute('''
+                CREATE TABLE IF NOT EXISTS notification_outbox (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    idempotency_key TEXT UNIQUE NOT NULL,
+                    chat_id INTEGER NOT NULL,
+                    kind TEXT NOT NULL,
+                    payload TEXT,
+                    status TEXT DEFAULT 'pending',
+                    attempts INTEGER DEFAULT 0,
+                    next_attempt_at REAL NOT NULL,
+                    last_error TEXT,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+            
+            for index_sql in INDEXES:
+                await db.execute(index_sql)
+            
+            for fts_table in FTS_TABLES:
+                await self._create_fts_tx(db, fts_table)
+            
             logging.info("База данных инициализирована")
     
-    async def get_user(self, telegram_id: int) -> Optional[Dict[str, Any]]:
-        """Получить пользователя по Telegram ID"""
-        async with aiosqlite.connect(self.db_path) as db:
-            db.row_factory = aiosqlite.Row
+    @staticmethod
+    async def _create_fts_tx(db: aiosqlite.Connection, fts_table: str):
+        """Создать FTS5-таблицу с триггерами; новую - заполнить из существующих строк"""
+        cursor = await db.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?",
+            (fts_table,)
+        )
+        exists = await cursor.fetchone() is not None
+        for statement in fts_schema(fts_table):
+            await db.execute(statement)
+        if not exists:
+            await db.execute(f"INSERT INTO {fts_table} ({fts_table}) VALUES ('rebuild')")
+    
+    # === КЭШ ПОЛЬЗОВАТЕЛЕЙ ===
+    
+    def _configure_user_cache(self, settings: Dict[str, Any]):
+        settings = dict(settings)
+        self.user_cache_sync_interval = settings.pop('sync_interval', DEFAULT_USER_CACHE['sync_interval'])
+        self.user_cache = LRUCache(**settings)
+        # Последняя учтенная запись user_changes (None - еще не читали)
+        self._user_change_id: Optional[int] = None
+        self._user_cache_synced_at = float('-inf')
+    
+    async def sync_user_cache(self):
+        """Сбросить из кэша пользователей, которых изменили другие процессы.
+        
+        Свои записи этот процесс сбрасывает сразу, а строки, измененные
+        другими воркерами (например, одобрение анкеты админом из соседнего
+        шарда), он узнает из журнала user_changes. Журнал читается не чаще
+        раза в user_cache_sync_interval секунд - это и есть предел устаревания.
+        """
+        now = time.monotonic()
+        if now < self._user_cache_synced_at + self.user_cache_sync_interval:
+            return
+        self._user_cache_synced_at = now
+        
+        if self._user_change_id is None:
+            # Кэш еще пуст: достаточно запомнить, с какой записи читать
+            self._user_change_id = await self.get_last_user_change_id()
+            return
+        
+        changes = await self.get_user_changes(self._user_change_id, USER_CHANGES_BATCH)
+        if len(changes) == USER_CHANGES_BATCH or (changes and changes[0][0] != self._user_change_id + 1):
+            # Процесс отстал дальше журнала или изменений слишком много - проще начать с чистого кэша
+            self.user_cache.clear()
+            self._user_change_id = await self.get_last_user_change_id()
+            return
+        
+        for change_id, user_id, telegram_id in changes:
+            self._invalidate_user(telegram_id, user_id)
+            self._user_change_id = change_id
+    
+    @staticmethod
+    async def _log_user_change_tx(db: aiosqlite.Connection, user_id: int, telegram_id: int):
+        """Записать изменение строки users в журнал (в транзакции самого изменения)"""
+        cursor = await db.execute(
+            'INSERT INTO user_changes (user_id, telegram_id) VALUES (?, ?)',
+            (user_id, telegram_id)
+        )
+        await db.execute(
+            'DELETE FROM user_changes WHERE id <= ?',
+            (cursor.lastrowid - USER_CHANGES_KEPT,)
+        )
+    
+    async def get_last_user_change_id(self) -> int:
+        """Номер последней записи журнала user_changes (0, если журнал пуст)"""
+        async with self.pool.reader() as db:
+            cursor = await db.execute('SELECT MAX(id) FROM user_changes')
+            row = await cursor.fetchone()
+            return row[0] or 0
+    
+    async def get_user_changes(self, after_id: int, limit: int = USER_CHANGES_BATCH) -> List[Tuple[int, int, int]]:
+        """Записи журнала (id, user_id, telegram_id) после after_id"""
+        async with self.pool.reader() as db:
             cursor = await db.execute(
-                'SELECT * FROM users WHERE telegram_id = ?',
-                (telegram_id,)
+                'SELECT id, user_id, telegram_id FROM user_changes WHERE id > ? ORDER BY id LIMIT ?',
+                (after_id, limit)
+            )
+            return [(row[0], row[1], row[2]) for row in await cursor.fetchall()]
+    
+    def _cache_user(self, user: Dict[str, Any], epoch: int):
+        """Положить строку пользователя в кэш под обоими ключами"""
+        self.user_cache.set(('telegram_id', user['telegram_id']), user, epoch)
+        self.user_cache.set(('id', user['id']), user, epoch)
+    
+    def _invalidate_user(self, telegram_id: Optional[int] = None, user_id: Optional[int] = None):
+        """Сбросить кэш пользователя после записи"""
+        keys = []
+        if telegram_id is not None:
+            keys.append(('telegram_id', telegram_id))
+        if user_id is not None:
+            keys.append(('id', user_id))
+        self.user_cache.invalidate(*keys)
+    
+    def get_user_cache_stats(self) -> Dict[str, Any]:
+        """Счетчики попаданий/промахов кэша пользователей"""
+        return self.user_cache.stats()
+    
+    async def _get_user_cached(self, key: str, value: int) -> Optional[Dict[str, Any]]:
+        """Чтение пользователя через кэш (key - 'telegram_id' или 'id')"""
+        cached = self.user_cache.get((key, value))
+        if cached is not None:
+            return dict(cached)
+        
+        epoch = self.user_cache.epoch
+        async with self.pool.reader() as db:
+            cursor = await db.execute(
+                f'SELECT * FROM users WHERE {key} = ?',
+                (value,)
             )
             row = await cursor.fetchone()
-            return dict(row) if row else None
+        
+        if not row:
+            return None
+        
+        user = dict(row)
+        self._cache_user(user, epoch)
+        return dict(user)
     
+    async def get_user(self, telegram_id: int) -> Optional[Dict[str, Any]]:
+        """Получить пользователя по Telegram ID"""
+        return await self._get_user_cached('telegram_id', telegram_id)
+    
+    @retry_on_busy
     async def create_user(self, telegram_id: int) -> int:
         """Создать нового пользователя"""
-        async with aiosqlite.connect(self.db_path) as db:
+        async with self.pool.writer() as db:
             cursor = await db.execute(
                 'INSERT INTO users (telegram_id) VALUES (?)',
                 (telegram_id,)
             )
-            await db.commit()
             return cursor.lastrowid
     
+    @retry_on_busy
     async def update_user(self, telegram_id: int, **kwargs):
         """Обновить данные пользователя"""
         if not kwargs:
@@ -107,16 +803,33 @@ class Database:
         set_clause = ', '.join(f'{key} = ?' for key in kwargs.keys())
         values = list(kwargs.values()) + [telegram_id]
         
-        async with aiosqlite.connect(self.db_path) as db:
-            await db.execute(
-                f'UPDATE users SET {set_clause} WHERE telegram_id = ?',
-                values
-            )
-            await db.commit()
+        user_id = await self._run_write(self._update_user_tx, telegram_id, set_clause, values)
+        self._invalidate_user(telegram_id, user_id)
+    
+    @classmethod
+    async def _update_user_tx(cls, db: aiosqlite.Connection, telegram_id: int,
+                              set_clause: str, values: list) -> Optional[int]:
+        await db.execute(
+            f'UPDATE users SET {set_clause} WHERE telegram_id = ?',
+            values
+        )
+        cursor = await db.execute(
+            'SELECT id, verification_status FROM users WHERE telegram_id = ?',
+            (telegram_id,)
+        )
+        row = await cursor.fetchone()
+        if row is None:
+            return None
+        await cls._log_user_change_tx(db, row[0], telegram_id)
+        # Анкета верифицированного пользователя участвует в подборе людей
+        if row[1] == 'approved' or 'verification_status' in set_clause:
+            await cls._log_membership_change_tx(db, row[0], None)
+        return row[0]
     
+    @retry_on_busy
     async def create_verification_request(self, user_id: int, student_card_photo: str) -> int:
         """Создать заявку на верификацию"""
-        async with aiosqlite.connect(self.db_path) as db:
+        async with self.pool.writer() as db:
             # Сначала обновляем статус пользователя
             await db.execute(
                 'UPDATE users SET verification_status = ? WHERE id = ?',
@@ -128,24 +841,26 @@ class Database:
                 'INSERT INTO verification_requests (user_id, student_card_photo) VALUES (?, ?)',
                 (user_id, student_card_photo)
             )
-            await db.commit()
-            return cursor.lastrowid
-    
-    async def get_user_by_id(self, user_id: int) -> Optional[Dict[str, Any]]:
-        """Получить пользователя по ID"""
-        async with aiosqlite.connect(self.db_path) as db:
-            db.row_factory = aiosqlite.Row
+            request_id = cursor.lastrowid
+            
             cursor = await db.execute(
-                'SELECT * FROM users WHERE id = ?',
+                'SELECT telegram_id FROM users WHERE id = ?',
                 (user_id,)
             )
             row = await cursor.fetchone()
-            return dict(row) if row else None
+            if row:
+                await self._log_user_change_tx(db, user_id, row[0])
+        
+        self._invalidate_user(row[0] if row else None, user_id)
+        return request_id
+    
+    async def get_user_by_id(self, user_id: int) -> Optional[Dict[str, Any]]:
+        """Получить пользователя по ID"""
+        return await self._get_user_cached('id', user_id)
     
     async def get_pending_verifications(self) -> List[Dict[str, Any]]:
         """Получить все заявки на верификацию со статусом pending"""
-        async with aiosqlite.connect(self.db_path) as db:
-            db.row_factory = aiosqlite.Row
+        async with self.pool.reader() as db:
             cursor = await db.execute('''
                 SELECT vr.*, u.name, u.age, u.course, u.major, u.description, u.photo_file_id, u.telegram_id
                 FROM verification_requests vr
@@ -156,10 +871,40 @@ class Database:
             rows = await cursor.fetchall()
             return [dict(row) for row in rows]
     
+    async def get_pending_verifications_page(self, cursor: Optional[int] = None, backward: bool = False,
+                                             limit: int = DEFAULT_PAGE_SIZE):
+        """Страница заявок pending (от старых к новым), см. _fetch_page"""
+        return await self._fetch_page(
+            '''
+                SELECT vr.id, vr.created_at, u.name, u.course
+                FROM verification_requests vr
+                JOIN users u ON vr.user_id = u.id
+            ''',
+            'verification_requests', 'vr', "vr.status = 'pending'",
+            descending=False, cursor=cursor, backward=backward, limit=limit
+        )
+    
+    async def count_pending_verifications(self, created_since: Optional[datetime] = None) -> int:
+        """Количество заявок со статусом pending (по индексу, без чтения профилей).
+        
+        created_since (UTC) - считать только заявки, поданные не раньше этого момента.
+        """
+        async with self.pool.reader() as db:
+            if created_since is None:
+                cursor = await db.execute(
+                    "SELECT COUNT(*) FROM verification_requests WHERE status = 'pending'"
+                )
+            else:
+                cursor = await db.execute(
+                    "SELECT COUNT(*) FROM verification_requests WHERE status = 'pending' AND created_at >= ?",
+                    (created_since.strftime('%Y-%m-%d %H:%M:%S'),)
+                )
+            row = await cursor.fetchone()
+            return row[0]
+    
     async def get_verification_by_id(self, request_id: int) -> Optional[Dict[str, Any]]:
         """Получить заявку на верификацию по ID"""
-        async with aiosqlite.connect(self.db_path) as db:
-            db.row_factory = aiosqlite.Row
+        async with self.pool.reader() as db:
             cursor = await db.execute('''
                 SELECT vr.*, u.name, u.age, u.course, u.major, u.description, u.photo_file_id, u.telegram_id
                 FROM verification_requests vr
@@ -169,19 +914,27 @@ class Database:
             row = await cursor.fetchone()
             return dict(row) if row else None
     
-    async def process_verification(self, request_id: int, status: str, admin_id: int):
-        """Обработать заявку на верификацию"""
-        async with aiosqlite.connect(self.db_path) as db:
+    @retry_on_busy
+    async def process_verification(self, request_id: int, status: str, admin_id: int) -> bool:
+        """Обработать заявку на верификацию и поставить уведомление пользователю в outbox.
+        
+        Возвращает False, если заявка уже обработана (например, другим админом).
+        """
+        async with self.pool.writer() as db:
             # Обновляем заявку на верификацию
-            await db.execute('''
+            cursor = await db.execute('''
                 UPDATE verification_requests 
                 SET status = ?, admin_id = ?, processed_at = CURRENT_TIMESTAMP
-                WHERE id = ?
+                WHERE id = ? AND status = 'pending'
             ''', (status, admin_id, request_id))
+            if cursor.rowcount == 0:
+                return False
             
             # Получаем user_id для обновления статуса пользователя
             cursor = await db.execute(
-                'SELECT user_id FROM verification_requests WHERE id = ?',
+                'SELECT vr.user_id, u.telegram_id FROM verification_requests vr '
+                'JOIN users u ON vr.user_id = u.id '
+                'WHERE vr.id = ?',
                 (request_id,)
             )
             row = await cursor.fetchone()
@@ -192,21 +945,30 @@ class Database:
                     'UPDATE users SET verification_status = ? WHERE id = ?',
                     (status, user_id)
                 )
-            
-            await db.commit()
+                await self._log_user_change_tx(db, user_id, row[1])
+                if status == 'approved':
+                    await self._log_membership_change_tx(db, user_id, None)
+                # Уведомление фиксируется вместе с решением и не теряется при сбое отправки
+                await self._enqueue_notification_tx(
+                    db, f'verification:{request_id}', row[1], f'verification_{status}'
+                )
+        
+        if row:
+            self._invalidate_user(row[1], row[0])
+        return True
     
+    @retry_on_busy
     async def add_admin(self, telegram_id: int, is_super_admin: bool = False):
         """Добавить админа"""
-        async with aiosqlite.connect(self.db_path) as db:
+        async with self.pool.writer() as db:
             await db.execute(
                 'INSERT OR REPLACE INTO admins (telegram_id, is_super_admin) VALUES (?, ?)',
                 (telegram_id, is_super_admin)
             )
-            await db.commit()
     
     async def is_admin(self, telegram_id: int) -> bool:
         """Проверить, является ли пользователь админом"""
-        async with aiosqlite.connect(self.db_path) as db:
+        async with self.pool.reader() as db:
             cursor = await db.execute(
                 'SELECT 1 FROM admins WHERE telegram_id = ?',
                 (telegram_id,)
@@ -216,20 +978,20 @@ class Database:
     
     # === МЕТОДЫ ДЛЯ РАБОТЫ С МЕРОПРИЯТИЯМИ ===
     
+    @retry_on_busy
     async def create_event(self, name: str, description: str, created_by: int) -> int:
         """Создать мероприятие"""
-        async with aiosqlite.connect(self.db_path) as db:
+        async with self.pool.writer() as db:
             cursor = await db.execute(
                 'INSERT INTO events (name, description, created_by) VALUES (?, ?, ?)',
                 (name, description, created_by)
             )
-            await db.commit()
-            return cursor.lastrowid
+        self.events_version += 1
+        return cursor.lastrowid
     
     async def get_active_events(self) -> List[Dict[str, Any]]:
         """Получить список активных мероприятий"""
-        async with aiosqlite.connect(self.db_path) as db:
-            db.row_factory = aiosqlite.Row
+        async with self.pool.reader() as db:
             cursor = await db.execute(
                 'SELECT * FROM events WHERE is_active = TRUE ORDER BY created_at DESC'
             )
@@ -238,33 +1000,85 @@ class Database:
     
     async def get_all_events(self) -> List[Dict[str, Any]]:
         """Получить все мероприятия (для админов)"""
-        async with aiosqlite.connect(self.db_path) as db:
-            db.row_factory = aiosqlite.Row
+        async with self.pool.reader() as db:
             cursor = await db.execute(
-                'SELECT e.*, COUNT(ue.user_id) as participant_count '
-                'FROM events e '
-                'LEFT JOIN user_events ue ON e.id = ue.event_id '
-                'GROUP BY e.id '
-                'ORDER BY e.created_at DESC'
+                'SELECT * FROM events ORDER BY created_at DESC'
             )
             rows = await cursor.fetchall()
             return [dict(row) for row in rows]
     
+    async def get_active_events_page(self, cursor: Optional[int] = None, backward: bool = False,
+                                     limit: int = DEFAULT_PAGE_SIZE):
+        """Страница активных мероприятий (от новых к старым), см. _fetch_page"""
+        return await self._fetch_page(
+            'SELECT e.* FROM events e', 'events', 'e', 'e.is_active = TRUE',
+            descending=True, cursor=cursor, backward=backward, limit=limit
+        )
+    
+    async def get_all_events_page(self, cursor: Optional[int] = None, backward: bool = False,
+                                  limit: int = DEFAULT_PAGE_SIZE):
+        """Страница всех мероприятий для админов (от новых к старым), см. _fetch_page"""
+        return await self._fetch_page(
+            'SELECT e.* FROM events e', 'events', 'e', None,
+            descending=True, cursor=cursor, backward=backward, limit=limit
+        )
+    
+    async def _fetch_page(self, select: str, table: str, alias: str, where: Optional[str],
+                          descending: bool, cursor: Optional[int], backward: bool,
+                          limit: int) -> Tuple[List[Dict[str, Any]], bool, bool]:
+        """Keyset-пагинация по (created_at, id).
+        
+        cursor - id крайней записи текущей страницы: последней для перехода
+        вперед, первой для перехода назад (backward=True). Запрос читает не
+        больше limit + 1 строк по индексу независимо от размера таблицы.
+        Возвращает (строки, есть_предыдущая, есть_следующая).
+        """
+        # Назад по убывающему списку - это вперед по возрастающему, и наоборот
+        reverse = descending != backward
+        comparison = '<' if reverse else '>'
+        order = 'DESC' if reverse else 'ASC'
+        
+        conditions = [where] if where else []
+        params: list = []
+        if cursor is not None:
+            conditions.append(
+                f'({alias}.created_at, {alias}.id) {comparison} '
+                f'(SELECT created_at, id FROM {table} WHERE id = ?)'
+            )
+            params.append(cursor)
+        where_clause = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+        params.append(limit + 1)
+        
+        async with self.pool.reader() as db:
+            cursor_result = await db.execute(
+                f'{select} {where_clause} '
+                f'ORDER BY {alias}.created_at {order}, {alias}.id {order} LIMIT ?',
+                params
+            )
+            rows = [dict(row) for row in await cursor_result.fetchall()]
+        
+        if not rows and cursor is not None:
+            # Крайняя запись удалена или страниц дальше нет - возвращаемся в начало
+            return await self._fetch_page(select, table, alias, where, descending, None, False, limit)
+        
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        if backward:
+            rows.reverse()
+            return rows, has_more, True
+        return rows, cursor is not None, has_more
+    
     async def get_event_by_id(self, event_id: int) -> Optional[Dict[str, Any]]:
         """Получить мероприятие по ID"""
-        async with aiosqlite.connect(self.db_path) as db:
-            db.row_factory = aiosqlite.Row
+        async with self.pool.reader() as db:
             cursor = await db.execute(
-                'SELECT e.*, COUNT(ue.user_id) as participant_count '
-                'FROM events e '
-                'LEFT JOIN user_events ue ON e.id = ue.event_id '
-                'WHERE e.id = ? '
-                'GROUP BY e.id',
+                'SELECT * FROM events WHERE id = ?',
                 (event_id,)
             )
             row = await cursor.fetchone()
             return dict(row) if row else None
     
+    @retry_on_busy
     async def update_event(self, event_id: int, **kwargs):
         """Обновить мероприятие"""
         if not kwargs:
@@ -273,34 +1087,90 @@ class Database:
         set_clause = ', '.join(f'{key} = ?' for key in kwargs.keys())
         values = list(kwargs.values()) + [event_id]
         
-        async with aiosqlite.connect(self.db_path) as db:
+        async with self.pool.writer() as db:
             await db.execute(
                 f'UPDATE events SET {set_clause} WHERE id = ?',
                 values
             )
-            await db.commit()
+            if 'is_active' in kwargs:
+                await self._log_membership_change_tx(db, None, event_id)
+        self.events_version += 1
+    
+    @retry_on_busy
+    async def join_event(self, user_id: int, event_id: int) -> Tuple[Optional[Dict[str, Any]], bool]:
+        """Записаться на мероприятие.
+        
+        За одну транзакцию проверяет, что мероприятие активно, добавляет
+        участника, обновляет счетчик и возвращает (мероприятие, изменилось ли участие).
+        Для несуществующего или неактивного мероприятия возвращает (None, False).
+        """
+        return await self._run_write(self._join_event_tx, user_id, event_id)
+    
+    @retry_on_busy
+    async def leave_event(self, user_id: int, event_id: int) -> Tuple[Optional[Dict[str, Any]], bool]:
+        """Отписаться от мероприятия (аналогично join_event, одна транзакция)"""
+        return await self._run_write(self._leave_event_tx, user_id, event_id)
     
-    async def join_event(self, user_id: int, event_id: int):
-        """Записаться на мероприятие"""
-        async with aiosqlite.connect(self.db_path) as db:
+    @classmethod
+    async def _join_event_tx(cls, db: aiosqlite.Connection, user_id: int, event_id: int):
+        # Проверка активности внутри самой вставки: отдельный SELECT до нее
+        # не защищен блокировкой записи, и другой процесс успел бы закрыть мероприятие
+        cursor = await db.execute(
+            'INSERT OR IGNORE INTO user_events (user_id, event_id) '
+            'SELECT ?, id FROM events WHERE id = ? AND is_active = TRUE',
+            (user_id, event_id)
+        )
+        changed = cursor.rowcount > 0
+        if changed:
             await db.execute(
-                'INSERT OR IGNORE INTO user_events (user_id, event_id) VALUES (?, ?)',
-                (user_id, event_id)
+                'UPDATE events SET participant_count = participant_count + 1 WHERE id = ?',
+                (event_id,)
             )
-            await db.commit()
+            await cls._log_membership_change_tx(db, user_id, event_id)
+        
+        return await cls._fetch_active_event(db, event_id, changed)
     
-    async def leave_event(self, user_id: int, event_id: int):
-        """Отписаться от мероприятия"""
-        async with aiosqlite.connect(self.db_path) as db:
+    @classmethod
+    async def _leave_event_tx(cls, db: aiosqlite.Connection, user_id: int, event_id: int):
+        cursor = await db.execute(
+            'DELETE FROM user_events WHERE user_id = ? AND event_id = ? '
+            'AND EXISTS (SELECT 1 FROM events WHERE id = ? AND is_active = TRUE)',
+            (user_id, event_id, event_id)
+        )
+        changed = cursor.rowcount > 0
+        if changed:
             await db.execute(
-                'DELETE FROM user_events WHERE user_id = ? AND event_id = ?',
-                (user_id, event_id)
+                'UPDATE events SET participant_count = participant_count - 1 WHERE id = ?',
+                (event_id,)
             )
-            await db.commit()
+            await cls._log_membership_change_tx(db, user_id, event_id)
+        
+        return await cls._fetch_active_event(db, event_id, changed)
+    
+    @classmethod
+    async def _fetch_active_event(cls, db: aiosqlite.Connection, event_id: int, changed: bool):
+        """Результат join/leave: (мероприятие, изменилось ли участие) или (None, False).
+        
+        Вызывается после записи, когда транзакция уже держит блокировку
+        записи, поэтому видит то же состояние мероприятия, что и запись.
+        """
+        event = await cls._fetch_event(db, event_id)
+        if event is None or not event['is_active']:
+            return None, False
+        return event, changed
+    
+    @staticmethod
+    async def _fetch_event(db: aiosqlite.Connection, event_id: int) -> Optional[Dict[str, Any]]:
+        cursor = await db.execute(
+            'SELECT * FROM events WHERE id = ?',
+            (event_id,)
+        )
+        row = await cursor.fetchone()
+        return dict(row) if row else None
     
     async def is_user_joined_event(self, user_id: int, event_id: int) -> bool:
         """Проверить, записан ли пользователь на мероприятие"""
-        async with aiosqlite.connect(self.db_path) as db:
+        async with self.pool.reader() as db:
             cursor = await db.execute(
                 'SELECT 1 FROM user_events WHERE user_id = ? AND event_id = ?',
                 (user_id, event_id)
@@ -310,8 +1180,7 @@ class Database:
     
     async def get_user_events(self, user_id: int) -> List[Dict[str, Any]]:
         """Получить мероприятия пользователя"""
-        async with aiosqlite.connect(self.db_path) as db:
-            db.row_factory = aiosqlite.Row
+        async with self.pool.reader() as db:
             cursor = await db.execute(
                 'SELECT e.*, ue.joined_at FROM events e '
                 'JOIN user_events ue ON e.id = ue.event_id '
@@ -324,7 +1193,7 @@ class Database:
     
     async def get_user_events_count(self, user_id: int) -> int:
         """Получить количество мероприятий пользователя"""
-        async with aiosqlite.connect(self.db_path) as db:
+        async with self.pool.reader() as db:
             cursor = await db.execute(
                 'SELECT COUNT(*) FROM user_events ue '
                 'JOIN events e ON ue.event_id = e.id '
@@ -333,3 +1202,566 @@ class Database:
             )
             row = await cursor.fetchone()
             return row[0] if row else 0
+    
+    # === ИНДЕКС ОБЩИХ МЕРОПРИЯТИЙ ===
+    
+    @staticmethod
+    async def _log_membership_change_tx(db: aiosqlite.Connection, user_id: Optional[int],
+                                        event_id: Optional[int]):
+        """Записать изменение участия в журнал (в транзакции самого изменения)"""
+        cursor = await db.execute(
+            'INSERT INTO membership_changes (user_id, event_id) VALUES (?, ?)',
+            (user_id, event_id)
+        )
+        # Журнал ограничен по размеру: удаляется самая старая запись (диапазон по первичному ключу)
+        await db.execute(
+            'DELETE FROM membership_changes WHERE id <= ?',
+            (cursor.lastrowid - MEMBERSHIP_CHANGES_KEPT,)
+        )
+    
+    async def get_last_membership_change_id(self) -> int:
+        """Номер последней записи журнала membership_changes (0, если журнал пуст)"""
+        async with self.pool.reader() as db:
+            cursor = await db.execute('SELECT MAX(id) FROM membership_changes')
+            row = await cursor.fetchone()
+            return row[0] or 0
+    
+    async def get_membership_changes(self, after_id: int,
+                                     limit: int = 1000) -> List[Tuple[int, Optional[int], Optional[int]]]:
+        """Записи журнала (id, user_id, event_id) после after_id"""
+        async with self.pool.reader() as db:
+            cursor = await db.execute(
+                'SELECT id, user_id, event_id FROM membership_changes '
+                'WHERE id > ? ORDER BY id LIMIT ?',
+                (after_id, limit)
+            )
+            return [(row[0], row[1], row[2]) for row in await cursor.fetchall()]
+    
+    async def get_event_candidate_ids(self, event_id: int) -> List[int]:
+        """Верифицированные участники активного мероприятия (users.id по возрастанию)"""
+        async with self.pool.reader() as db:
+            cursor = await db.execute('''
+                SELECT ue.user_id FROM events e
+                JOIN user_events ue ON ue.event_id = e.id
+                JOIN users u ON u.id = ue.user_id
+                WHERE e.id = ? AND e.is_active = TRUE AND u.verification_status = 'approved'
+                ORDER BY ue.user_id
+            ''', (event_id,))
+            return [row[0] for row in await cursor.fetchall()]
+    
+    async def get_verified_profiles_page(self, after_id: int, limit: int) -> List[Dict[str, Any]]:
+        """Анкеты верифицированных пользователей после after_id (keyset по users.id)"""
+        async with self.pool.reader() as db:
+            cursor = await db.execute('''
+                SELECT id, course, age, major, description FROM users
+                WHERE verification_status = 'approved' AND name IS NOT NULL AND id > ?
+                ORDER BY id
+                LIMIT ?
+            ''', (after_id, limit))
+            return [dict(row) for row in await cursor.fetchall()]
+    
+    async def get_verified_profiles(self, user_ids: List[int]) -> List[Dict[str, Any]]:
+        """Анкеты из user_ids, которые сейчас верифицированы (в обход кэша пользователей)"""
+        if not user_ids:
+            return []
+        placeholders = ', '.join('?' for _ in user_ids)
+        async with self.pool.reader() as db:
+            cursor = await db.execute(f'''
+                SELECT id, course, age, major, description FROM users
+                WHERE id IN ({placeholders}) AND verification_status = 'approved' AND name IS NOT NULL
+            ''', user_ids)
+            return [dict(row) for row in await cursor.fetchall()]
+    
+    async def get_candidate_event_ids(self, user_id: int) -> List[int]:
+        """Активные мероприятия пользователя, если он верифицирован (иначе пустой список)"""
+        async with self.pool.reader() as db:
+            cursor = await db.execute('''
+                SELECT ue.event_id FROM users u
+                JOIN user_events ue ON ue.user_id = u.id
+                JOIN events e ON e.id = ue.event_id
+                WHERE u.id = ? AND u.verification_status = 'approved' AND e.is_active = TRUE
+                ORDER BY ue.event_id
+            ''', (user_id,))
+            return [row[0] for row in await cursor.fetchall()]
+    
+    async def get_candidate_event_ids_many(self, user_ids: List[int]) -> Dict[int, List[int]]:
+        """get_candidate_event_ids для нескольких пользователей одним запросом"""
+        result: Dict[int, List[int]] = {user_id: [] for user_id in user_ids}
+        if not user_ids:
+            return result
+        placeholders = ', '.join('?' for _ in user_ids)
+        async with self.pool.reader() as db:
+            cursor = await db.execute(f'''
+                SELECT ue.user_id, ue.event_id FROM users u
+                JOIN user_events ue ON ue.user_id = u.id
+                JOIN events e ON e.id = ue.event_id
+                WHERE u.id IN ({placeholders}) AND u.verification_status = 'approved' AND e.is_active = TRUE
+                ORDER BY ue.user_id, ue.event_id
+            ''', user_ids)
+            for row in await cursor.fetchall():
+                result[row[0]].append(row[1])
+        return result
+    
+    # === ПОЛНОТЕКСТОВЫЙ ПОИСК ===
+    
+    async def search_users(self, query: str, page: int = 0,
+                           limit: int = DEFAULT_PAGE_SIZE) -> Tuple[List[Dict[str, Any]], bool, bool]:
+        """Поиск анкет по имени, направлению и описанию (для админов, любой статус).
+        
+        Результаты упорядочены по bm25: совпадение в имени весит больше, чем
+        в направлении, а в направлении - больше, чем в описании. Для очень
+        частых слов ранжируются SEARCH_WINDOW самых новых совпадений.
+        Возвращает (строки страницы page, есть_предыдущая, есть_следующая).
+        """
+        return await self._search(
+            'users_fts', 'SELECT u.id, u.telegram_id, u.name, u.age, u.course, u.major, u.verification_status '
+            'FROM users_fts JOIN users u ON u.id = users_fts.rowid', None, query, page, limit
+        )
+    
+    async def search_events(self, query: str, page: int = 0, limit: int = DEFAULT_PAGE_SIZE,
+                            active_only: bool = True) -> Tuple[List[Dict[str, Any]], bool, bool]:
+        """Поиск мероприятий по названию и описанию (аналогично search_users)"""
+        return await self._search(
+            'events_fts', 'SELECT e.* FROM events_fts JOIN events e ON e.id = events_fts.rowid',
+            'e.is_active = TRUE' if active_only else None, query, page, limit
+        )
+    
+    async def _search(self, fts_table: str, select: str, where: Optional[str], query: str,
+                      page: int, limit: int) -> Tuple[List[Dict[str, Any]], bool, bool]:
+        match = fts_query(query)
+        if match is None:
+            return [], False, False
+        
+        _, _, weights = FTS_TABLES[fts_table]
+        # Окно: rowid не меньше SEARCH_WINDOW-го совпадения с конца (FTS5 идет по rowid в обратном порядке)
+        window = (
+            f'{fts_table}.rowid >= coalesce((SELECT rowid FROM {fts_table} WHERE {fts_table} MATCH ?1 '
+            f'ORDER BY rowid DESC LIMIT 1 OFFSET {SEARCH_WINDOW - 1}), 0)'
+        )
+        conditions = ' AND '.join(filter(None, [f'{fts_table} MATCH ?1', window, where]))
+        # Ранжированный результат листается по номеру страницы (OFFSET): порядок задает
+        # bm25, а не столбец таблицы, поэтому keyset-курсор здесь не построить
+        async with self.pool.reader() as db:
+            cursor = await db.execute(
+                f"{select} WHERE {conditions} "
+                f"ORDER BY bm25({fts_table}, {', '.join(map(str, weights))}) LIMIT ?2 OFFSET ?3",
+                (match, limit + 1, page * limit)
+            )
+            rows = [dict(row) for row in await cursor.fetchall()]
+        return rows[:limit], page > 0, len(rows) > limit
+    
+    # === РЕАКЦИИ И СИМПАТИИ ===
+    
+    @retry_on_busy
+    async def add_reaction(self, user_id: int, target_id: int, is_like: bool) -> bool:
+        """Лайк или дизлайк анкеты; True - симпатия взаимная и мэтч создан.
+        
+        Повторная реакция на ту же анкету игнорируется. Мэтч и уведомления
+        обоим пользователям пишутся в той же транзакции.
+        """
+        return await self._run_write(self._add_reaction_tx, user_id, target_id, is_like)
+    
+    @classmethod
+    async def _add_reaction_tx(cls, db: aiosqlite.Connection, user_id: int, target_id: int,
+                               is_like: bool) -> bool:
+        cursor = await db.execute(
+            'INSERT OR IGNORE INTO reactions (user_id, target_id, is_like) VALUES (?, ?, ?)',
+            (user_id, target_id, is_like)
+        )
+        if cursor.rowcount == 0 or not is_like:
+            return False
+        
+        cursor = await db.execute(
+            'SELECT is_like FROM reactions WHERE user_id = ? AND target_id = ?',
+            (target_id, user_id)
+        )
+        row = await cursor.fetchone()
+        if not row or not row[0]:
+            return False
+        
+        user_a, user_b = sorted((user_id, target_id))
+        cursor = await db.execute(
+            'INSERT OR IGNORE INTO matches (user_a, user_b) VALUES (?, ?)',
+            (user_a, user_b)
+        )
+        if cursor.rowcount == 0:
+            return False
+        
+        cursor = await db.execute(
+            'SELECT id, telegram_id FROM users WHERE id IN (?, ?)',
+            (user_a, user_b)
+        )
+        chats = dict(await cursor.fetchall())
+        for recipient, other in ((user_a, user_b), (user_b, user_a)):
+            if recipient in chats:
+                await cls._enqueue_notification_tx(
+                    db, f'match:{user_a}:{user_b}:{recipient}', chats[recipient],
+                    'people_match', {'user_id': other}
+                )
+        return True
+    
+    async def get_reacted_user_ids(self, user_id: int) -> List[int]:
+        """id анкет, на которые пользователь уже отреагировал"""
+        async with self.pool.reader() as db:
+            cursor = await db.execute(
+                'SELECT target_id FROM reactions WHERE user_id = ?',
+                (user_id,)
+            )
+            return [row[0] for row in await cursor.fetchall()]
+    
+    # === СОСТОЯНИЯ FSM ===
+    
+    async def get_fsm_record(self, storage_key: str, min_updated_at: float) -> Optional[Tuple[Optional[str], Optional[bytes]]]:
+        """Получить (state, data) FSM, если запись не старше min_updated_at"""
+        async with self.pool.reader() as db:
+            cursor = await db.execute(
+                'SELECT state, data FROM fsm_states WHERE storage_key = ? AND updated_at >= ?',
+                (storage_key, min_updated_at)
+            )
+            row = await cursor.fetchone()
+            return (row[0], row[1]) if row else None
+    
+    @retry_on_busy
+    async def save_fsm_records(self, upserts: List[Tuple[str, Optional[str], Optional[bytes], float]],
+                               deletes: List[str]):
+        """Записать пачку состояний FSM одной транзакцией"""
+        async with self.pool.writer() as db:
+            if upserts:
+                await db.executemany(
+                    'INSERT OR REPLACE INTO fsm_states (storage_key, state, data, updated_at) '
+                    'VALUES (?, ?, ?, ?)',
+                    upserts
+                )
+            if deletes:
+                await db.executemany(
+                    'DELETE FROM fsm_states WHERE storage_key = ?',
+                    [(key,) for key in deletes]
+                )
+    
+    @retry_on_busy
+    async def delete_expired_fsm_records(self, before: float) -> int:
+        """Удалить брошенные состояния FSM (не обновлялись с before)"""
+        async with self.pool.writer() as db:
+            cursor = await db.execute(
+                'DELETE FROM fsm_states WHERE updated_at < ?',
+                (before,)
+            )
+            return cursor.rowcount
+    
+    # === АДМИНСКИЙ РЕЖИМ ===
+    
+    async def is_admin_session_active(self, telegram_id: int, now: float) -> bool:
+        """Есть ли у админа неистекшая сессия админского режима"""
+        async with self.pool.reader() as db:
+            cursor = await db.execute(
+                'SELECT 1 FROM admin_sessions WHERE telegram_id = ? AND expires_at > ?',
+                (telegram_id, now)
+            )
+            return await cursor.fetchone() is not None
+    
+    @retry_on_busy
+    async def set_admin_session(self, telegram_id: int, expires_at: float):
+        """Включить админский режим до expires_at"""
+        async with self.pool.writer() as db:
+            await db.execute(
+                'INSERT OR REPLACE INTO admin_sessions (telegram_id, expires_at) VALUES (?, ?)',
+                (telegram_id, expires_at)
+            )
+    
+    @retry_on_busy
+    async def delete_admin_session(self, telegram_id: int):
+        """Выключить админский режим"""
+        async with self.pool.writer() as db:
+            await db.execute('DELETE FROM admin_sessions WHERE telegram_id = ?', (telegram_id,))
+    
+    async def get_admin_ids_by_usernames(self, usernames: List[str]) -> List[int]:
+        """telegram_id админов из ADMIN_USERNAMES, которые уже писали боту"""
+        if not usernames:
+            return []
+        async with self.pool.reader() as db:
+            placeholders = ', '.join('?' * len(usernames))
+            cursor = await db.execute(
+                f'SELECT telegram_id FROM admin_usernames WHERE username IN ({placeholders})',
+                list(usernames)
+            )
+            return [row[0] for row in await cursor.fetchall()]
+    
+    @retry_on_busy
+    async def remember_admin_username(self, username: str, telegram_id: int):
+        """Запомнить username -> telegram_id админа (username мог перейти к другому аккаунту)"""
+        async with self.pool.writer() as db:
+            await db.execute(
+                'INSERT INTO admin_usernames (username, telegram_id, updated_at) VALUES (?, ?, ?) '
+                'ON CONFLICT (username) DO UPDATE SET telegram_id = excluded.telegram_id, '
+                'updated_at = excluded.updated_at',
+                (username, telegram_id, time.time())
+            )
+    
+    @retry_on_busy
+    async def delete_expired_admin_sessions(self, now: float) -> int:
+        """Удалить истекшие админские сессии"""
+        async with self.pool.writer() as db:
+            cursor = await db.execute('DELETE FROM admin_sessions WHERE expires_at <= ?', (now,))
+            return cursor.rowcount
+    
+    # === РАССЫЛКИ ===
+    
+    async def count_broadcast_recipients(self, audience: str, event_id: Optional[int] = None) -> int:
+        """Число получателей рассылки: участники мероприятия или все верифицированные"""
+        async with self.pool.reader() as db:
+            if audience == 'event':
+                cursor = await db.execute(
+                    'SELECT COUNT(*) FROM user_events WHERE event_id = ?',
+                    (event_id,)
+                )
+            else:
+                cursor = await db.execute(
+                    "SELECT COUNT(*) FROM users WHERE verification_status = 'approved' AND name IS NOT NULL"
+                )
+            row = await cursor.fetchone()
+            return row[0] if row else 0
+    
+    async def get_broadcast_recipients(self, audience: str, event_id: Optional[int], after_user_id: int,
+                                       limit: int) -> List[Tuple[int, int]]:
+        """Следующая страница получателей (users.id, telegram_id) после after_user_id.
+        
+        Keyset по users.id: каждая страница читается по индексу с места
+        остановки, в памяти держится только она.
+        """
+        async with self.pool.reader() as db:
+            if audience == 'event':
+                cursor = await db.execute('''
+                    SELECT u.id, u.telegram_id FROM user_events ue
+                    JOIN users u ON u.id = ue.user_id
+                    WHERE ue.event_id = ? AND ue.user_id > ?
+                    ORDER BY ue.user_id
+                    LIMIT ?
+                ''', (event_id, after_user_id, limit))
+            else:
+                cursor = await db.execute('''
+                    SELECT id, telegram_id FROM users
+                    WHERE verification_status = 'approved' AND name IS NOT NULL AND id > ?
+                    ORDER BY id
+                    LIMIT ?
+                ''', (after_user_id, limit))
+            return [(row[0], row[1]) for row in await cursor.fetchall()]
+    
+    @retry_on_busy
+    async def create_broadcast(self, audience: str, event_id: Optional[int], text: str, created_by: int,
+                               total: int, lease_until: float) -> int:
+        """Создать рассылку, сразу занятую создавшим процессом до lease_until"""
+        if audience not in BROADCAST_AUDIENCES:
+            raise ValueError(f"Неизвестная аудитория рассылки: {audience}")
+        async with self.pool.writer() as db:
+            cursor = await db.execute(
+                'INSERT INTO broadcasts (audience, event_id, text, created_by, total, lease_until) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                (audience, event_id, text, created_by, total, lease_until)
+            )
+            return cursor.lastrowid
+    
+    async def get_broadcast(self, broadcast_id: int) -> Optional[Dict[str, Any]]:
+        """Получить рассылку по ID"""
+        async with self.pool.reader() as db:
+            cursor = await db.execute('SELECT * FROM broadcasts WHERE id = ?', (broadcast_id,))
+            row = await cursor.fetchone()
+            return dict(row) if row else None
+    
+    @retry_on_busy
+    async def set_broadcast_progress_message(self, broadcast_id: int, chat_id: int, message_id: int):
+        """Запомнить сообщение, в котором показывается прогресс рассылки"""
+        async with self.pool.writer() as db:
+            await db.execute(
+                'UPDATE broadcasts SET progress_chat_id = ?, progress_message_id = ? WHERE id = ?',
+                (chat_id, message_id, broadcast_id)
+            )
+    
+    @retry_on_busy
+    async def claim_broadcasts(self, now: float, lease_until: float) -> List[Dict[str, Any]]:
+        """Забрать незавершенные рассылки, у которых истекла аренда (владелец остановился или упал)"""
+        async with self.pool.writer() as db:
+            cursor = await db.execute('''
+                UPDATE broadcasts SET lease_until = ?
+                WHERE status = 'running' AND lease_until < ?
+                RETURNING *
+            ''', (lease_until, now))
+            return [dict(row) for row in await cursor.fetchall()]
+    
+    @retry_on_busy
+    async def save_broadcast_progress(self, broadcast_id: int, cursor: int, sent: int, failed: int,
+                                      lease_until: float) -> Optional[str]:
+        """Сохранить прогресс после пачки и продлить аренду.
+        
+        Возвращает текущий статус: если рассылку отменили (из любого процесса),
+        вернется 'cancelled'.
+        """
+        async with self.pool.writer() as db:
+            result = await db.execute('''
+                UPDATE broadcasts
+                SET cursor = ?, sent = sent + ?, failed = failed + ?, lease_until = ?
+                WHERE id = ? AND status = 'running'
+                RETURNING status
+            ''', (cursor, sent, failed, lease_until, broadcast_id))
+            row = await result.fetchone()
+            if row:
+                return row[0]
+            result = await db.execute('SELECT status FROM broadcasts WHERE id = ?', (broadcast_id,))
+            row = await result.fetchone()
+            return row[0] if row else None
+    
+    @retry_on_busy
+    async def finish_broadcast(self, broadcast_id: int, status: str = 'done') -> bool:
+        """Завершить (done) или отменить (cancelled) рассылку, если она еще идет"""
+        async with self.pool.writer() as db:
+            cursor = await db.execute(
+                "UPDATE broadcasts SET status = ?, lease_until = 0, finished_at = CURRENT_TIMESTAMP "
+                "WHERE id = ? AND status = 'running'",
+                (status, broadcast_id)
+            )
+            return cursor.rowcount > 0
+    
+    @retry_on_busy
+    async def release_broadcast(self, broadcast_id: int):
+        """Снять аренду при остановке процесса: рассылку сразу продолжит другой"""
+        async with self.pool.writer() as db:
+            await db.execute('UPDATE broadcasts SET lease_until = 0 WHERE id = ?', (broadcast_id,))
+    
+    # === ОЧЕРЕДЬ УВЕДОМЛЕНИЙ (OUTBOX) ===
+    
+    @staticmethod
+    async def _enqueue_notification_tx(db: aiosqlite.Connection, idempotency_key: str, chat_id: int,
+                                       kind: str, payload: Optional[Dict[str, Any]] = None,
+                                       send_at: Optional[float] = None) -> bool:
+        cursor = await db.execute(
+            'INSERT OR IGNORE INTO notification_outbox '
+            '(idempotency_key, chat_id, kind, payload, next_attempt_at) VALUES (?, ?, ?, ?, ?)',
+            (idempotency_key, chat_id, kind,
+             json.dumps(payload, ensure_ascii=False) if payload is not None else None,
+             send_at if send_at is not None else time.time())
+        )
+        return cursor.rowcount > 0
+    
+    @retry_on_busy
+    async def enqueue_notification(self, idempotency_key: str, chat_id: int, kind: str,
+                                   payload: Optional[Dict[str, Any]] = None,
+                                   send_at: Optional[float] = None) -> bool:
+        """Поставить уведомление в outbox (не раньше send_at); повтор с тем же ключом игнорируется"""
+        async with self.pool.writer() as db:
+            return await self._enqueue_notification_tx(db, idempotency_key, chat_id, kind, payload, send_at)
+    
+    @retry_on_busy
+    async def enqueue_notifications(self, notifications: List[Notification]) -> int:
+        """Поставить пачку уведомлений (key, chat_id, kind, payload, send_at) одной транзакцией"""
+        enqueued = 0
+        async with self.pool.writer() as db:
+            for idempotency_key, chat_id, kind, payload, send_at in notifications:
+                enqueued += await self._enqueue_notification_tx(
+                    db, idempotency_key, chat_id, kind, payload, send_at
+                )
+        return enqueued
+    
+    @retry_on_busy
+    async def claim_outbox_batch(self, now: float, limit: int, lease: float) -> List[Dict[str, Any]]:
+        """Забрать готовые к отправке уведомления.
+        
+        Забранные записи откладываются на lease секунд: другой процесс их не
+        возьмет, а если этот упадет, не отправив, они вернутся в очередь сами.
+        """
+        async with self.pool.writer() as db:
+            cursor = await db.execute('''
+                UPDATE notification_outbox
+                SET attempts = attempts + 1, next_attempt_at = ?
+                WHERE id IN (
+                    SELECT id FROM notification_outbox
+                    WHERE status = 'pending' AND next_attempt_at <= ?
+                    ORDER BY next_attempt_at
+                    LIMIT ?
+                )
+                RETURNING id, idempotency_key, chat_id, kind, payload, attempts
+            ''', (now + lease, now, limit))
+            rows = await cursor.fetchall()
+            return [
+                {**dict(row), 'payload': json.loads(row['payload']) if row['payload'] else {}}
+                for row in rows
+            ]
+    
+    @retry_on_busy
+    async def mark_outbox_sent(self, outbox_ids: List[int], now: float):
+        """Отметить уведомления доставленными (next_attempt_at - время доставки)"""
+        async with self.pool.writer() as db:
+            await db.executemany(
+                "UPDATE notification_outbox SET status = 'sent', next_attempt_at = ?, last_error = NULL "
+                "WHERE id = ?",
+                [(now, outbox_id) for outbox_id in outbox_ids]
+            )
+    
+    @retry_on_busy
+    async def record_outbox_failure(self, outbox_id: int, error: str, retry_at: Optional[float]):
+        """Запомнить ошибку доставки: повторить в retry_at или (None) больше не пытаться"""
+        async with self.pool.writer() as db:
+            if retry_at is None:
+                await db.execute(
+                    "UPDATE notification_outbox SET status = 'failed', last_error = ? WHERE id = ?",
+                    (error, outbox_id)
+                )
+            else:
+                await db.execute(
+                    'UPDATE notification_outbox SET next_attempt_at = ?, last_error = ? WHERE id = ?',
+                    (retry_at, error, outbox_id)
+                )
+    
+    async def count_pending_outbox(self) -> int:
+        """Количество недоставленных уведомлений"""
+        async with self.pool.reader() as db:
+            cursor = await db.execute(
+                "SELECT COUNT(*) FROM notification_outbox WHERE status = 'pending'"
+            )
+            row = await cursor.fetchone()
+            return row[0] if row else 0
+    
+    @retry_on_busy
+    async def delete_sent_outbox(self, before: float) -> int:
+        """Удалить доставленные до before уведомления"""
+        async with self.pool.writer() as db:
+            cursor = await db.execute(
+                "DELETE FROM notification_outbox WHERE status = 'sent' AND next_attempt_at < ?",
+                (before,)
+            )
+            return cursor.rowcount
+    
+    # === СТАТИСТИКА ===
+    
+    async def get_users_stats(self) -> Dict[str, int]:
+        """Получить статистику пользователей"""
+        async with self.pool.reader() as db:
+            cursor = await db.execute("""
+                SELECT 
+                    COUNT(*) as total,
+                    SUM(CASE WHEN verification_status = 'approved' THEN 1 ELSE 0 END) as approved,
+                    SUM(CASE WHEN verification_status = 'pending' THEN 1 ELSE 0 END) as pending,
+                    SUM(CASE WHEN verification_status = 'rejected' THEN 1 ELSE 0 END) as rejected
+                FROM users 
+                WHERE name IS NOT NULL
+            """)
+            row = await cursor.fetchone()
+            return {
+                'total': row[0] or 0,
+                'approved': row[1] or 0,
+                'pending': row[2] or 0,
+                'rejected': row[3] or 0
+            }
+    
+    async def get_events_stats(self) -> Dict[str, int]:
+        """Получить статистику мероприятий"""
+        async with self.pool.reader() as db:
+            cursor = await db.execute("""
+                SELECT 
+                    COUNT(*) as total,
+                    SUM(CASE WHEN is_active = TRUE THEN 1 ELSE 0 END) as active
+                FROM events
+            """)
+            row = await cursor.fetchone()
+            return {
+                'total': row[0] or 0,
+                'active': row[1] or 0
+            }
@@ -0,0 +1,102 @@
+"""
+Каталог активных мероприятий в памяти процесса: страницы списка без запросов к базе
+"""
+import asyncio
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from cache import LRUCache
+from database import Database, DEFAULT_PAGE_SIZE
+
+# (мероприятия страницы, всего активных, есть_предыдущая, есть_следующая) -> готовое представление
+Renderer = Callable[[List[Dict[str, Any]], int, bool, bool], Any]
+
+class EventCatalog:
+    """Активные мероприятия от новых к старым и отрисованные страницы списка.
+    
+    Каталог загружается одним запросом и живет, пока не изменится
+    Database.events_version (create_event/update_event этого процесса) или
+    не пройдет ttl секунд - так другие процессы-воркеры тоже видят
+    изменения. Страницы листаются тем же keyset-курсором, что и
+    Database.get_active_events_page, и отрисовываются render один раз на
+    версию каталога: повторные "🔄 Обновить" и ◀ / ▶ база не видит.
+    
+    В каталоге только id, название и дата создания: счетчики участников
+    меняются при каждой записи и читаются из базы в карточке мероприятия.
+    """
+    
+    def __init__(self, db: Database, render: Renderer, page_size: int = DEFAULT_PAGE_SIZE,
+                 ttl: float = 60.0, cache_size: int = 100):
+        self.db = db
+        self.render = render
+        self.page_size = page_size
+        self.ttl = ttl
+        self._views = LRUCache(cache_size, ttl)
+        self._events: List[Dict[str, Any]] = []
+        self._positions: Dict[int, int] = {}
+        # Версия базы, с которой загружен каталог (None - еще не загружен)
+        self._loaded_version: Optional[int] = None
+        self._expires_at = 0.0
+        self._lock = asyncio.Lock()
+        self.loads = 0
+    
+    def __len__(self) -> int:
+        return len(self._events)
+    
+    @property
+    def is_fresh(self) -> bool:
+        return self._loaded_version == self.db.events_version and time.monotonic() < self._expires_at
+    
+    async def view(self, cursor: Optional[int] = None, backward: bool = False) -> Any:
+        """Отрисованная страница списка (результат render)"""
+        await self.refresh()
+        key = (cursor, backward)
+        view = self._views.get(key)
+        if view is None:
+            events, has_prev, has_next = self.page(cursor, backward)
+            view = self.render(events, len(self._events), has_prev, has_next)
+            self._views.set(key, view)
+        return view
+    
+    def page(self, cursor: Optional[int] = None, backward: bool = False) -> Tuple[List[Dict[str, Any]], bool, bool]:
+        """Страница загруженного каталога: (мероприятия, есть_предыдущая, есть_следующая)"""
+        position = self._positions.get(cursor) if cursor is not None else None
+        if position is not None:
+            if backward:
+                start = max(0, position - self.page_size)
+                events, has_prev, has_next = self._events[start:position], start > 0, True
+            else:
+                end = position + 1 + self.page_size
+                events, has_prev, has_next = self._events[position + 1:end], True, len(self._events) > end
+            if events:
+                return events, has_prev, has_next
+        # Крайнее мероприятие пропало из каталога или страниц дальше нет - первая страница
+        return self._events[:self.page_size], False, len(self._events) > self.page_size
+    
+    async def refresh(self):
+        """Перезагрузить каталог, если он устарел"""
+        if self.is_fresh:
+            return
+        async with self._lock:
+            if self.is_fresh:
+                return
+            # Версия до запроса: изменение во время загрузки вызовет еще одну
+            version = self.db.events_version
+            rows = await self.db.get_active_events()
+            rows.sort(key=lambda row: (row['created_at'], row['id']), reverse=True)
+            self._events = [
+                {'id': row['id'], 'name': row['name'], 'created_at': row['created_at']} for row in rows
+            ]
+            self._positions = {event['id']: position for position, event in enumerate(self._events)}
+            self._views.clear()
+            self._loaded_version = version
+            self._expires_at = time.monotonic() + self.ttl
+            self.loads += 1
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'events': len(self._events),
+            'version': self._loaded_version,
+            'loads': self.loads,
+            'views': self._views.stats(),
+        }
@@ -0,0 +1,131 @@
+"""
+Лента анкет с лайками: заранее посчитанная очередь кандидатов на пользователя
+"""
+import asyncio
+import itertools
+import logging
+from collections import deque
+from typing import Any, Deque, Dict, Optional
+
+from cache import LRUCache
+from database import Database
+from recommendations import SeenBitmap, SharedEventsIndex
+
+logger = logging.getLogger(__name__)
+
+class UserFeed:
+    """Очередь кандидатов и оцененные анкеты одного пользователя"""
+    
+    __slots__ = ('queue', 'seen')
+    
+    def __init__(self, queue_size: int, seen: SeenBitmap):
+        self.queue: Deque[int] = deque(maxlen=queue_size)
+        self.seen = seen
+
+class SwipeFeed:
+    """Лента "🔍 Поиск людей": ❤️ / 👎 по одной анкете.
+    
+    На пользователя держится ограниченная очередь (queue_size) из рейтинга
+    SharedEventsIndex без уже оцененных анкет и битовая карта оцененных
+    (бит на users.id вместо NOT IN по таблице reactions). Следующая карточка
+    берется из головы очереди за O(1); когда в очереди остается меньше
+    refill_below анкет, она пересчитывается в фоне, а показанная карточка
+    остается первой. Синхронно рейтинг считается только для пустой очереди
+    (первый показ или все анкеты закончились). Пересчет обычно берет
+    рейтинг из кэша индекса и лишь отсекает оцененные анкеты.
+    
+    Ленты лежат в LRU-кэше: после вытеснения карта оцененных читается из
+    reactions заново. Все апдейты пользователя обрабатывает один воркер,
+    поэтому очередь не расходится с его реакциями.
+    """
+    
+    def __init__(self, db: Database, recommendations: SharedEventsIndex, queue_size: int = 20,
+                 refill_below: int = 5, cache_size: int = 1000, cache_ttl: float = 1800.0):
+        self.db = db
+        self.recommendations = recommendations
+        self.queue_size = queue_size
+        self.refill_below = refill_below
+        self._feeds = LRUCache(cache_size, cache_ttl)
+        self._refills: Dict[int, asyncio.Task] = {}
+        self.served = 0
+        self.refills = 0
+    
+    async def current(self, user_id: int) -> Optional[int]:
+        """Анкета, которую пользователь видит сейчас (None - подходящих анкет больше нет)"""
+        feed = await self._feed(user_id)
+        self._skip_seen(feed)
+        if not feed.queue:
+            await self._schedule_refill(user_id, feed)
+            self._skip_seen(feed)
+        elif len(feed.queue) < self.refill_below:
+            self._schedule_refill(user_id, feed)
+        
+        if not feed.queue:
+            return None
+        self.served += 1
+        return feed.queue[0]
+    
+    async def react(self, user_id: int, target_id: int, is_like: bool) -> bool:
+        """Сохранить реакцию и убрать анкету из ленты; True - симпатия взаимная"""
+        matched = await self.db.add_reaction(user_id, target_id, is_like)
+        feed = self._feeds.get(user_id)
+        if feed is not None:
+            feed.seen.add(target_id)
+            self._skip_seen(feed)
+        return matched
+    
+    async def stop(self):
+        """Прервать фоновые пересчеты очередей (shutdown)"""
+        tasks = list(self._refills.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._refills.clear()
+    
+    async def _feed(self, user_id: int) -> UserFeed:
+        feed = self._feeds.get(user_id)
+        if feed is None:
+            seen = SeenBitmap(await self.db.get_reacted_user_ids(user_id))
+            feed = UserFeed(self.queue_size, seen)
+            self._feeds.set(user_id, feed)
+        return feed
+    
+    @staticmethod
+    def _skip_seen(feed: UserFeed):
+        # Реакция могла прийти на анкету из середины очереди (старая карточка в чате)
+        while feed.queue and feed.queue[0] in feed.seen:
+            feed.queue.popleft()
+    
+    def _schedule_refill(self, user_id: int, feed: UserFeed) -> asyncio.Task:
+        task = self._refills.get(user_id)
+        if task is None:
+            task = asyncio.create_task(self._refill(user_id, feed))
+            self._refills[user_id] = task
+            task.add_done_callback(lambda _: self._refills.pop(user_id, None))
+        return task
+    
+    async def _refill(self, user_id: int, feed: UserFeed):
+        try:
+            ranking = await self.recommendations.get_candidates(user_id, exclude=feed.seen, limit=self.queue_size)
+        except Exception as e:
+            logger.error(f"Ошибка пересчета ленты пользователя {user_id}: {e}")
+            return
+        
+        # Показанная карточка остается первой, остальное заменяется свежим рейтингом
+        self._skip_seen(feed)
+        head = feed.queue[0] if feed.queue else None
+        feed.queue.clear()
+        if head is not None:
+            feed.queue.append(head)
+        fresh = (candidate for candidate, _ in ranking if candidate != head and candidate not in feed.seen)
+        # deque с maxlen при переполнении вытеснил бы голову - берем сколько помещается
+        feed.queue.extend(itertools.islice(fresh, self.queue_size - len(feed.queue)))
+        self.refills += 1
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'feeds': len(self._feeds),
+            'served': self.served,
+            'refills': self.refills,
+            'refilling': len(self._refills),
+        }
@@ -0,0 +1,148 @@
+"""
+Хранилище состояний FSM aiogram в базе бота (замена MemoryStorage)
+"""
+import asyncio
+import json
+import logging
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import BaseStorage, StateType, StorageKey
+
+from cache import LRUCache
+from database import Database
+
+# (state, data) одного пользователя
+FSMRecord = Tuple[Optional[str], Dict[str, Any]]
+
+def encode_data(data: Dict[str, Any]) -> Optional[bytes]:
+    """Компактный JSON без пробелов; пустые данные не храним"""
+    if not data:
+        return None
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+def decode_data(blob: Optional[bytes]) -> Dict[str, Any]:
+    return json.loads(blob) if blob else {}
+
+class SQLiteStorage(BaseStorage):
+    """FSM-хранилище в таблице fsm_states.
+    
+    Чтение идет через LRU-кэш, запись сразу попадает в кэш и в буфер
+    измененных ключей, который фоновая задача раз в flush_interval секунд
+    сбрасывает в базу одной транзакцией. Сценарии, не обновлявшиеся дольше
+    ttl, считаются брошенными и периодически удаляются.
+    """
+    
+    def __init__(self, db: Database, ttl: float = 7 * 24 * 3600, cache_size: int = 10000,
+                 flush_interval: float = 1.0):
+        self.db = db
+        self.ttl = ttl
+        self.flush_interval = flush_interval
+        self.cache = LRUCache(max_size=cache_size, ttl=ttl)
+        self._dirty: Dict[str, FSMRecord] = {}
+        self._flushing: Dict[str, FSMRecord] = {}
+        self._flush_task: Optional[asyncio.Task] = None
+        self._cleanup_interval = min(ttl, 3600)
+        self._last_cleanup = 0.0
+    
+    @staticmethod
+    def _make_key(key: StorageKey) -> str:
+        return f"{key.bot_id}:{key.chat_id}:{key.user_id}:{key.thread_id or ''}:{key.destiny}"
+    
+    async def _load(self, storage_key: str) -> FSMRecord:
+        # Несохраненные изменения важнее кэша и базы
+        for pending in (self._dirty, self._flushing):
+            if storage_key in pending:
+                return pending[storage_key]
+        
+        record = self.cache.get(storage_key)
+        if record is not None:
+            return record
+        
+        epoch = self.cache.epoch
+        row = await self.db.get_fsm_record(storage_key, time.time() - self.ttl)
+        record = (row[0], decode_data(row[1])) if row else (None, {})
+        self.cache.set(storage_key, record, epoch)
+        return record
+    
+    def _store(self, storage_key: str, record: FSMRecord):
+        # invalidate сдвигает epoch: параллельное чтение из базы не затрет новое значение
+        self.cache.invalidate(storage_key)
+        self.cache.set(storage_key, record)
+        self._dirty[storage_key] = record
+        
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_loop())
+    
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        storage_key = self._make_key(key)
+        _, data = await self._load(storage_key)
+        self._store(storage_key, (state.state if isinstance(state, State) else state, data))
+    
+    async def get_state(self, key: StorageKey) -> Optional[str]:
+        state, _ = await self._load(self._make_key(key))
+        return state
+    
+    async def set_data(self, key: StorageKey, data: Dict[str, Any]) -> None:
+        storage_key = self._make_key(key)
+        state, _ = await self._load(storage_key)
+        self._store(storage_key, (state, data.copy()))
+    
+    async def get_data(self, key: StorageKey) -> Dict[str, Any]:
+        _, data = await self._load(self._make_key(key))
+        return data.copy()
+    
+    async def flush(self):
+        """Записать накопленные изменения в базу"""
+        if not self._dirty:
+            return
+        
+        self._flushing, self._dirty = self._dirty, {}
+        now = time.time()
+        upserts = []
+        deletes = []
+        for storage_key, (state, data) in self._flushing.items():
+            if state is None and not data:
+                deletes.append(storage_key)
+            else:
+                upserts.append((storage_key, state, encode_data(data), now))
+        
+        try:
+            await self.db.save_fsm_records(upserts, deletes)
+        except BaseException:
+            # Возвращаем в буфер (в том числе при отмене), не затирая более свежие изменения
+            for storage_key, record in self._flushing.items():
+                self._dirty.setdefault(storage_key, record)
+            raise
+        finally:
+            self._flushing = {}
+    
+    async def cleanup(self) -> int:
+        """Удалить брошенные сценарии старше ttl"""
+        self._last_cleanup = time.monotonic()
+        removed = await self.db.delete_expired_fsm_records(time.time() - self.ttl)
+        if removed:
+            logging.info(f"Удалено брошенных состояний FSM: {removed}")
+        return removed
+    
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+                if time.monotonic() - self._last_cleanup >= self._cleanup_interval:
+                    await self.cleanup()
+            except Exception as e:
+                logging.error(f"Ошибка записи состояний FSM: {e}")
+    
+    async def close(self) -> None:
+        """Остановить фоновую запись и сбросить остаток (база не закрывается)"""
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            try:
+                await self._flush_task
+            except asyncio.CancelledError:
+                pass
+            self._flush_task = None
+        await self.flush()
@@ -1,14 +1,19 @@
 from aiogram import Router, F, Bot
 from aiogram.types import Message, CallbackQuery, InlineKeyboardButton, InlineKeyboardMarkup
-from aiogram.filters import Command
+from aiogram.filters import Command, CommandObject
+from aiogram.fsm.context import FSMContext
 import logging
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
 
-from database import Database
-from config import DATABASE_URL, ADMIN_IDS, ADMIN_USERNAMES
-from utils import is_admin, get_user_display_name
+from database import Database, DEFAULT_PAGE_SIZE
+from outbox import OutboxDispatcher
+from config import DATABASE_URL, ADMIN_IDS, ADMIN_USERNAMES, ADMIN_DIGEST_INTERVAL
+from utils import get_user_display_name, get_page_navigation_row, get_search_navigation_row, parse_page_callback
 
 router = Router()
-db = Database(DATABASE_URL)
+db = Database.shared(DATABASE_URL)
 logger = logging.getLogger(__name__)
 
 def get_admin_main_keyboard():
@@ -45,8 +50,8 @@ def get_profile_view_keyboard(request_id: int):
     ]
     return InlineKeyboardMarkup(inline_keyboard=keyboard)
 
-def get_pending_list_keyboard(verifications):
-    """Клавиатура со списком заявок"""
+def get_pending_list_keyboard(verifications, has_prev=False, has_next=False):
+    """Клавиатура со страницей заявок"""
     keyboard = []
     for verification in verifications:
         text = f"{verification['name']} ({verification['course']} курс)"
@@ -55,10 +60,24 @@ def get_pending_list_keyboard(verifications):
             callback_data=f"verify_view_{verification['id']}"
         )])
     
+    navigation = get_page_navigation_row("admin_pending_page", verifications, has_prev, has_next)
+    if navigation:
+        keyboard.append(navigation)
+    
     keyboard.append([InlineKeyboardButton(text="🔄 Обновить", callback_data="admin_pending")])
     keyboard.append([InlineKeyboardButton(text="⬅️ Назад", callback_data="admin_panel")])
     return InlineKeyboardMarkup(inline_keyboard=keyboard)
 
+async def build_pending_page(cursor=None, backward=False):
+    """Текст и клавиатура страницы заявок (None, если заявок нет)"""
+    pending_count = await db.count_pending_verifications()
+    if not pending_count:
+        return None
+    
+    verifications, has_prev, has_next = await db.get_pending_verifications_page(cursor, backward)
+    text = f"📋 **Заявки на верификацию ({pending_count})**\n\nВыберите заявку для рассмотрения:"
+    return text, get_pending_list_keyboard(verifications, has_prev, has_next)
+
 def format_profile_for_admin(verification):
     """Форматирование анкеты для админа"""
     return f"""
@@ -76,14 +95,72 @@ def format_profile_for_admin(verification):
 📅 Заявка подана: {verification['created_at'][:16]}
 """
 
+USER_STATUS_LABELS = {
+    'not_requested': "⚪ не подавал",
+    'pending': "🟡 на модерации",
+    'approved': "🟢 верифицирован",
+    'rejected': "🔴 отклонен",
+}
+
+async def build_user_search_page(query: str, page: int = 0):
+    """Текст и клавиатура страницы результатов поиска пользователей"""
+    users, has_prev, has_next = await db.search_users(query, page)
+    if not users and page == 0:
+        return f"🔎 По запросу «{query}» пользователей не найдено.", None
+    
+    lines = [f"🔎 **Пользователи по запросу «{query}»**\n"]
+    for number, found in enumerate(users, start=page * DEFAULT_PAGE_SIZE + 1):
+        lines.append(
+            f"{number}. **{found['name'] or 'Без имени'}**, {found['course'] or '?'} курс, "
+            f"{found['major'] or '—'}\n"
+            f"   {USER_STATUS_LABELS.get(found['verification_status'], found['verification_status'])}, "
+            f"🆔 {found['telegram_id']}"
+        )
+    navigation = get_search_navigation_row("admin_find_user_page", page, has_prev, has_next)
+    keyboard = InlineKeyboardMarkup(inline_keyboard=[navigation]) if navigation else None
+    return "\n".join(lines), keyboard
+
+@router.message(Command("find_user"))
+async def find_user_command(message: Message, command: CommandObject, state: FSMContext, is_user_admin: bool):
+    """Поиск пользователей по имени, направлению и описанию: /find_user слова"""
+    if not is_user_admin:
+        await message.answer("❌ У вас нет прав администратора.")
+        return
+    
+    query = (command.args or '').strip()
+    if not query:
+        await message.answer("🔎 Использование: /find_user имя, направление или слова из описания")
+        return
+    
+    # Запрос нужен для ◀ / ▶ - в callback_data он может не поместиться
+    await state.update_data(user_search_query=query)
+    text, keyboard = await build_user_search_page(query)
+    await message.answer(text, reply_markup=keyboard)
+
+@router.callback_query(F.data.startswith("admin_find_user_page_"))
+async def find_user_page_callback(callback: CallbackQuery, state: FSMContext, is_user_admin: bool):
+    """Листание результатов поиска пользователей"""
+    if not is_user_admin:
+        await callback.answer("❌ Нет прав администратора", show_alert=True)
+        return
+    
+    query = (await state.get_data()).get('user_search_query')
+    if not query:
+        await callback.answer("🔎 Поиск устарел, повторите /find_user.", show_alert=True)
+        return
+    
+    text, keyboard = await build_user_search_page(query, int(callback.data.rsplit("_", 1)[1]))
+    await callback.message.edit_text(text, reply_markup=keyboard)
+    await callback.answer()
+
 @router.message(Command("admin_panel"))
-async def admin_panel_command(message: Message):
+async def admin_panel_command(message: Message, is_user_admin: bool):
     """Главная админ панель"""
-    if not is_admin(message):
+    if not is_user_admin:
         await message.answer("❌ У вас нет прав администратора.")
         return
     
-    pending_count = len(await db.get_pending_verifications())
+    pending_count = await db.count_pending_verifications()
     
     text = f"""
 🔧 **Панель администратора**
@@ -97,29 +174,29 @@ async def admin_panel_command(message: Message):
     await message.answer(text, reply_markup=get_admin_main_keyboard())
 
 @router.message(Command("pending"))
-async def pending_command(message: Message):
+async def pending_command(message: Message, is_user_admin: bool):
     """Список заявок на верификацию"""
-    if not is_admin(message):
+    if not is_user_admin:
         await message.answer("❌ У вас нет прав администратора.")
         return
     
-    verifications = await db.get_pending_verifications()
+    page = await build_pending_page()
     
-    if not verifications:
+    if not page:
         await message.answer("✅ Нет заявок на рассмотрении!")
         return
     
-    text = f"📋 **Заявки на верификацию ({len(verifications)})**\n\nВыберите заявку для рассмотрения:"
-    await message.answer(text, reply_markup=get_pending_list_keyboard(verifications))
+    text, keyboard = page
+    await message.answer(text, reply_markup=keyboard)
 
 @router.callback_query(F.data == "admin_panel")
-async def admin_panel_callback(callback: CallbackQuery):
+async def admin_panel_callback(callback: CallbackQuery, is_user_admin: bool):
     """Главная админ панель (callback)"""
-    if not is_admin(callback):
+    if not is_user_admin:
         await callback.answer("❌ У вас нет прав администратора.", show_alert=True)
         return
     
-    pending_count = len(await db.get_pending_verifications())
+    pending_count = await db.count_pending_verifications()
     
     text = f"""
 🔧 **Панель администратора**
@@ -133,25 +210,30 @@ async def admin_panel_callback(callback: CallbackQuery):
     await callback.message.edit_text(text, reply_markup=get_admin_main_keyboard())
 
 @router.callback_query(F.data == "admin_pending")
-async def admin_pending_callback(callback: CallbackQuery):
-    """Список заявок (callback)"""
-    if not is_admin(callback):
+@router.callback_query(F.data.startswith("admin_pending_page_"))
+async def admin_pending_callback(callback: CallbackQuery, is_user_admin: bool):
+    """Список заявок (callback), в том числе листание ◀ / ▶"""
+    if not is_user_admin:
         await callback.answer("❌ У вас нет прав администратора.", show_alert=True)
         return
     
-    verifications = await db.get_pending_verifications()
+    cursor, backward = None, False
+    if callback.data.startswith("admin_pending_page_"):
+        cursor, backward = parse_page_callback(callback.data)
+    
+    page = await build_pending_page(cursor, backward)
     
-    if not verifications:
+    if not page:
         await callback.message.edit_text("✅ Нет заявок на рассмотрении!")
         return
     
-    text = f"📋 **Заявки на верификацию ({len(verifications)})**\n\nВыберите заявку для рассмотрения:"
-    await callback.message.edit_text(text, reply_markup=get_pending_list_keyboard(verifications))
+    text, keyboard = page
+    await callback.message.edit_text(text, reply_markup=keyboard)
 
 @router.callback_query(F.data.startswith("verify_view_"))
-async def verify_view_callback(callback: CallbackQuery):
+async def verify_view_callback(callback: CallbackQuery, is_user_admin: bool):
     """Просмотр конкретной заявки"""
-    if not is_admin(callback):
+    if not is_user_admin:
         await callback.answer("❌ У вас нет прав администратора.", show_alert=True)
         return
     
@@ -179,9 +261,9 @@ async def verify_view_callback(callback: CallbackQuery):
         )
 
 @router.callback_query(F.data.startswith("verify_profile_"))
-async def verify_profile_callback(callback: CallbackQuery):
+async def verify_profile_callback(callback: CallbackQuery, is_user_admin: bool):
     """Просмотр анкеты пользователя"""
-    if not is_admin(callback):
+    if not is_user_admin:
         await callback.answer("❌ У вас нет прав администратора.", show_alert=True)
         return
     
@@ -201,9 +283,9 @@ async def verify_profile_callback(callback: CallbackQuery):
     )
 
 @router.callback_query(F.data.startswith("verify_hide_profile_"))
-async def verify_hide_profile_callback(callback: CallbackQuery):
+async def verify_hide_profile_callback(callback: CallbackQuery, is_user_admin: bool):
     """Скрыть анкету и вернуть фото верификации"""
-    if not is_admin(callback):
+    if not is_user_admin:
         await callback.answer("❌ У вас нет прав администратора.", show_alert=True)
         return
     
@@ -223,9 +305,10 @@ async def verify_hide_profile_callback(callback: CallbackQuery):
     )
 
 @router.callback_query(F.data.startswith("verify_approve_"))
-async def verify_approve_callback(callback: CallbackQuery, bot: Bot):
+async def verify_approve_callback(callback: CallbackQuery, is_user_admin: bool,
+                                  outbox: Optional[OutboxDispatcher] = None):
     """Одобрить заявку"""
-    if not is_admin(callback):
+    if not is_user_admin:
         await callback.answer("❌ У вас нет прав администратора.", show_alert=True)
         return
     
@@ -236,45 +319,18 @@ async def verify_approve_callback(callback: CallbackQuery, bot: Bot):
         await callback.answer("❌ Заявка не найдена или уже обработана.", show_alert=True)
         return
     
-    # Обрабатываем заявку
-    await db.process_verification(request_id, 'approved', callback.from_user.id)
-    
-    # Уведомляем пользователя и обновляем меню
-    try:
-        from handlers.menu import get_main_menu_keyboard
-        from utils import get_user_display_name
-        
-        # Проверяем, является ли пользователь админом (проверяем и ID и username)
-        user_telegram_id = verification['telegram_id']
-        from config import ADMIN_IDS, ADMIN_USERNAMES
-        
-        # Получаем информацию о пользователе для проверки username
-        try:
-            user_info = await bot.get_chat(user_telegram_id)
-            username = user_info.username.lower() if user_info.username else None
-        except:
-            username = None
-            
-        user_is_admin = (user_telegram_id in ADMIN_IDS) or (username and username in ADMIN_USERNAMES)
-        
-        await bot.send_message(
-            chat_id=user_telegram_id,
-            text="✅ **Поздравляем! Твоя анкета одобрена!**\n\n"
-                 "🎉 Теперь ты можешь пользоваться всеми функциями бота:\n"
-                 "• 👤 Просматривать и редактировать анкету\n"
-                 "• 🔍 Искать новых друзей (скоро)\n"
-                 "• 🎉 Участвовать в мероприятиях (скоро)\n\n"
-                 "Используй обновленное меню ниже!",
-            reply_markup=get_main_menu_keyboard('approved', user_is_admin, admin_mode=False)
-        )
-    except Exception as e:
-        logger.error(f"Не удалось отправить уведомление пользователю {verification['telegram_id']}: {e}")
+    # Решение и уведомление пользователю коммитятся вместе, отправляет OutboxDispatcher
+    if not await db.process_verification(request_id, 'approved', callback.from_user.id):
+        await callback.answer("❌ Заявка уже обработана.", show_alert=True)
+        return
+    if outbox is not None:
+        outbox.wake()
     
     admin_name = get_user_display_name(callback.from_user)
     await callback.message.edit_caption(
         caption=f"✅ **Заявка одобрена**\n\n"
                 f"Администратор: {admin_name}\n"
-                f"Пользователь уведомлен."
+                f"Пользователь получит уведомление."
     )
     
     await callback.answer("✅ Заявка одобрена!", show_alert=False)
@@ -282,9 +338,10 @@ async def verify_approve_callback(callback: CallbackQuery, bot: Bot):
     logger.info(f"Admin {callback.from_user.id} approved verification request {request_id}")
 
 @router.callback_query(F.data.startswith("verify_reject_"))
-async def verify_reject_callback(callback: CallbackQuery, bot: Bot):
+async def verify_reject_callback(callback: CallbackQuery, is_user_admin: bool,
+                                 outbox: Optional[OutboxDispatcher] = None):
     """Отклонить заявку"""
-    if not is_admin(callback):
+    if not is_user_admin:
         await callback.answer("❌ У вас нет прав администратора.", show_alert=True)
         return
     
@@ -295,47 +352,18 @@ async def verify_reject_callback(callback: CallbackQuery, bot: Bot):
         await callback.answer("❌ Заявка не найдена или уже обработана.", show_alert=True)
         return
     
-    # Обрабатываем заявку
-    await db.process_verification(request_id, 'rejected', callback.from_user.id)
-    
-    # Уведомляем пользователя и обновляем меню
-    try:
-        from handlers.menu import get_main_menu_keyboard
-        
-        # Проверяем, является ли пользователь админом (проверяем и ID и username)
-        user_telegram_id = verification['telegram_id']
-        from config import ADMIN_IDS, ADMIN_USERNAMES
-        
-        # Получаем информацию о пользователе для проверки username
-        try:
-            user_info = await bot.get_chat(user_telegram_id)
-            username = user_info.username.lower() if user_info.username else None
-        except:
-            username = None
-            
-        user_is_admin = (user_telegram_id in ADMIN_IDS) or (username and username in ADMIN_USERNAMES)
-        
-        await bot.send_message(
-            chat_id=user_telegram_id,
-            text="❌ **К сожалению, твоя заявка отклонена**\n\n"
-                 "**Возможные причины:**\n"
-                 "• Фото студенческого билета неразборчиво\n"
-                 "• Данные в анкете не соответствуют студбилету\n"
-                 "• Нарушение правил сервиса\n\n"
-                 "**Что можно сделать:**\n"
-                 "• ✏️ Изменить анкету\n"
-                 "• 📸 Отправить новое фото студбилета\n\n"
-                 "Используй кнопки меню ниже:",
-            reply_markup=get_main_menu_keyboard('rejected', user_is_admin, admin_mode=False)
-        )
-    except Exception as e:
-        logger.error(f"Не удалось отправить уведомление пользователю {verification['telegram_id']}: {e}")
+    # Решение и уведомление пользователю коммитятся вместе, отправляет OutboxDispatcher
+    if not await db.process_verification(request_id, 'rejected', callback.from_user.id):
+        await callback.answer("❌ Заявка уже обработана.", show_alert=True)
+        return
+    if outbox is not None:
+        outbox.wake()
     
     admin_name = get_user_display_name(callback.from_user)
     await callback.message.edit_caption(
         caption=f"❌ **Заявка отклонена**\n\n"
                 f"Администратор: {admin_name}\n"
-                f"Пользователь уведомлен."
+                f"Пользователь получит уведомление."
     )
     
     await callback.answer("❌ Заявка отклонена!", show_alert=False)
@@ -343,9 +371,9 @@ async def verify_reject_callback(callback: CallbackQuery, bot: Bot):
     logger.info(f"Admin {callback.from_user.id} rejected verification request {request_id}")
 
 @router.callback_query(F.data == "admin_stats")
-async def admin_stats_callback(callback: CallbackQuery):
+async def admin_stats_callback(callback: CallbackQuery, is_user_admin: bool):
     """Статистика для админа"""
-    if not is_admin(callback):
+    if not is_user_admin:
         await callback.answer("❌ У вас нет прав администратора.", show_alert=True)
         return
     
@@ -353,37 +381,124 @@ async def admin_stats_callback(callback: CallbackQuery):
     await callback.answer("📊 Статистика будет добавлена в следующих версиях", show_alert=True)
 
 @router.callback_query(F.data == "admin_close")
-async def admin_close_callback(callback: CallbackQuery):
+async def admin_close_callback(callback: CallbackQuery, is_user_admin: bool):
     """Закрыть админ панель"""
-    if not is_admin(callback):
+    if not is_user_admin:
         await callback.answer("❌ У вас нет прав администратора.", show_alert=True)
         return
     
     await callback.message.edit_text("✅ Админ панель закрыта.")
 
-async def notify_admins_about_verification(bot: Bot, verification_request):
-    """Уведомить всех админов о новой заявке на верификацию"""
-    admin_ids_to_notify = ADMIN_IDS.copy()
-    
-    # Получаем пользователей по username
-    for username in ADMIN_USERNAMES:
-        # TODO: В реальном проекте нужно кэшировать username -> id mapping
-        pass
-    
-    message_text = f"""
+async def get_admin_chat_ids() -> List[int]:
+    """ID всех админов: из ADMIN_IDS и уже известные по ADMIN_USERNAMES"""
+    admin_ids = list(ADMIN_IDS)
+    for telegram_id in await db.get_admin_ids_by_usernames(ADMIN_USERNAMES):
+        if telegram_id not in admin_ids:
+            admin_ids.append(telegram_id)
+    return admin_ids
+
+async def is_admin_chat(telegram_id: int) -> bool:
+    """Админ ли получатель (проверяем и ID и username)"""
+    return telegram_id in await get_admin_chat_ids()
+
+async def render_verification_approved(bot: Bot, chat_id: int, payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Уведомление об одобренной анкете с обновленным меню"""
+    from handlers.menu import get_main_menu_keyboard
+    
+    return {
+        'text': "✅ **Поздравляем! Твоя анкета одобрена!**\n\n"
+                "🎉 Теперь ты можешь пользоваться всеми функциями бота:\n"
+                "• 👤 Просматривать и редактировать анкету\n"
+                "• 🔍 Искать новых друзей\n"
+                "• 🎉 Участвовать в мероприятиях (скоро)\n\n"
+                "Используй обновленное меню ниже!",
+        'reply_markup': get_main_menu_keyboard('approved', await is_admin_chat(chat_id), admin_mode=False),
+    }
+
+async def render_verification_rejected(bot: Bot, chat_id: int, payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Уведомление об отклоненной анкете с обновленным меню"""
+    from handlers.menu import get_main_menu_keyboard
+    
+    return {
+        'text': "❌ **К сожалению, твоя заявка отклонена**\n\n"
+                "**Возможные причины:**\n"
+                "• Фото студенческого билета неразборчиво\n"
+                "• Данные в анкете не соответствуют студбилету\n"
+                "• Нарушение правил сервиса\n\n"
+                "**Что можно сделать:**\n"
+                "• ✏️ Изменить анкету\n"
+                "• 📸 Отправить новое фото студбилета\n\n"
+                "Используй кнопки меню ниже:",
+        'reply_markup': get_main_menu_keyboard('rejected', await is_admin_chat(chat_id), admin_mode=False),
+    }
+
+async def render_new_verification(bot: Bot, chat_id: int, payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Уведомление админу об одной новой заявке"""
+    return {'text': f"""
 🔔 **Новая заявка на верификацию!**
 
-👤 Пользователь: {verification_request['name']}
-📚 Курс: {verification_request['course']}
-🎓 Направление: {verification_request['major']}
+👤 Пользователь: {payload['name']}
+📚 Курс: {payload['course']}
+🎓 Направление: {payload['major']}
 
 Для рассмотрения используйте:
 /pending - список заявок
 /admin_panel - админ панель
-"""
-    
-    for admin_id in admin_ids_to_notify:
-        try:
-            await bot.send_message(admin_id, message_text)
-        except Exception as e:
-            logger.error(f"Не удалось уведомить админа {admin_id}: {e}")
+"""}
+
+async def render_verification_digest(bot: Bot, chat_id: int, payload: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Сводка новых заявок за интервал; если их уже разобрали - не отправляется"""
+    since = datetime.fromtimestamp(payload['since'], timezone.utc)
+    new_count = await db.count_pending_verifications(created_since=since)
+    if not new_count:
+        return None
+    pending_count = await db.count_pending_verifications()
+    return {'text': f"""
+🔔 **Новые заявки на верификацию: {new_count}**
+
+📋 Всего на рассмотрении: {pending_count}
+
+Для рассмотрения используйте:
+/pending - список заявок
+/admin_panel - админ панель
+"""}
+
+# Уведомления, которые доставляет OutboxDispatcher (kind -> текст и клавиатура)
+OUTBOX_RENDERERS = {
+    'verification_approved': render_verification_approved,
+    'verification_rejected': render_verification_rejected,
+    'verification_new': render_new_verification,
+    'verification_digest': render_verification_digest,
+}
+
+async def notify_admins_about_verification(verification_request: Dict[str, Any],
+                                           outbox: Optional[OutboxDispatcher] = None):
+    """Уведомить всех админов о новой заявке на верификацию.
+    
+    Уведомления ставятся в outbox одной транзакцией и рассылаются в фоне
+    параллельно, хендлер пользователя не ждет Telegram. С ADMIN_DIGEST_INTERVAL
+    админ получает одну сводку за интервал вместо сообщения на каждую заявку.
+    """
+    admin_ids = await get_admin_chat_ids()
+    now = time.time()
+    
+    if ADMIN_DIGEST_INTERVAL > 0:
+        # Ключ сводки - админ и окно: заявки того же окна попадают в уже запланированную сводку
+        window = int(now // ADMIN_DIGEST_INTERVAL)
+        since = window * ADMIN_DIGEST_INTERVAL
+        notifications = [
+            (f"verification_digest:{admin_id}:{window}", admin_id, 'verification_digest',
+             {'since': since}, since + ADMIN_DIGEST_INTERVAL)
+            for admin_id in admin_ids
+        ]
+    else:
+        payload = {key: verification_request[key] for key in ('name', 'course', 'major')}
+        notifications = [
+            (f"verification_new:{verification_request['id']}:{admin_id}", admin_id, 'verification_new',
+             payload, None)
+            for admin_id in admin_ids
+        ]
+    
+    await db.enqueue_notifications(notifications)
+    if outbox is not None:
+        outbox.wake()
@@ -4,36 +4,26 @@
 from aiogram import Router, F
 from aiogram.types import Message, CallbackQuery
 from aiogram.fsm.context import FSMContext
+from typing import Optional
 
+from admin_sessions import AdminSessionStore
+from middlewares.outbound import OutboundQueue
+from middlewares.scheduler import UpdateScheduler
+from outbox import OutboxDispatcher
 from database import Database
 from config import DATABASE_URL
-from utils import is_admin
 
 router = Router()
-db = Database(DATABASE_URL)
-
-# Словарь для хранения режима пользователей (в реальном проекте лучше использовать Redis)
-admin_modes = {}
-
-def is_in_admin_mode(user_id: int) -> bool:
-    """Проверить, находится ли пользователь в админском режиме"""
-    return admin_modes.get(user_id, False)
-
-def set_admin_mode(user_id: int, mode: bool):
-    """Установить админский режим для пользователя"""
-    if mode:
-        admin_modes[user_id] = True
-    else:
-        admin_modes.pop(user_id, None)
+db = Database.shared(DATABASE_URL)
 
 @router.message(F.text == "🔧 Админ панель")
-async def enter_admin_mode(message: Message):
+async def enter_admin_mode(message: Message, is_user_admin: bool, admin_sessions: AdminSessionStore):
     """Войти в админский режим"""
-    if not is_admin(message):
+    if not is_user_admin:
         await message.answer("❌ У вас нет прав администратора.")
         return
     
-    set_admin_mode(message.from_user.id, True)
+    await admin_sessions.set(message.from_user.id, True)
     
     from handlers.menu import get_main_menu_keyboard
     
@@ -45,19 +35,18 @@ async def enter_admin_mode(message: Message):
     )
 
 @router.message(F.text == "🚪 Выйти из админки")
-async def exit_admin_mode(message: Message):
+async def exit_admin_mode(message: Message, user: Optional[dict], is_user_admin: bool,
+                          admin_sessions: AdminSessionStore):
     """Выйти из админского режима"""
-    if not is_admin(message):
+    if not is_user_admin:
         await message.answer("❌ У вас нет прав администратора.")
         return
     
-    set_admin_mode(message.from_user.id, False)
+    await admin_sessions.set(message.from_user.id, False)
     
     # Получаем состояние пользователя для правильного меню
-    user = await db.get_user(message.from_user.id)
     from handlers.menu import determine_user_state, get_main_menu_keyboard
     user_state = determine_user_state(user) if user else 'new'
-    is_user_admin = is_admin(message)
     
     await message.answer(
         "🚪 **Выход из админ-панели**\n\n"
@@ -67,36 +56,41 @@ async def exit_admin_mode(message: Message):
     )
 
 @router.message(F.text == "📋 Заявки на верификацию")
-async def admin_pending_menu(message: Message):
+async def admin_pending_menu(message: Message, is_user_admin: bool, admin_mode: bool):
     """Заявки на верификацию через админское меню"""
-    if not is_admin(message) or not is_in_admin_mode(message.from_user.id):
+    if not is_user_admin or not admin_mode:
         await message.answer("❌ Доступно только в админском режиме.")
         return
     
     from handlers.admin import pending_command
-    await pending_command(message)
+    await pending_command(message, is_user_admin)
 
 @router.message(F.text == "🎉 Управление мероприятиями")
-async def admin_events_menu(message: Message):
+async def admin_events_menu(message: Message, is_user_admin: bool, admin_mode: bool):
     """Управление мероприятиями через админское меню"""
-    if not is_admin(message) or not is_in_admin_mode(message.from_user.id):
+    if not is_user_admin or not admin_mode:
         await message.answer("❌ Доступно только в админском режиме.")
         return
     
     from handlers.events import admin_events_command
-    await admin_events_command(message)
+    await admin_events_command(message, is_user_admin)
 
 @router.message(F.text == "📊 Статистика")
-async def admin_stats_menu(message: Message):
+async def admin_stats_menu(message: Message, is_user_admin: bool, admin_mode: bool,
+                           update_scheduler: Optional[UpdateScheduler] = None,
+                           outbound_queue: Optional[OutboundQueue] = None,
+                           outbox: Optional[OutboxDispatcher] = None):
     """Статистика через админское меню"""
-    if not is_admin(message) or not is_in_admin_mode(message.from_user.id):
+    if not is_user_admin or not admin_mode:
         await message.answer("❌ Доступно только в админском режиме.")
         return
     
     # Получаем статистику
     users_count = await get_users_stats()
     events_count = await get_events_stats()
-    pending_count = len(await db.get_pending_verifications())
+    pending_count = await db.count_pending_verifications()
+    cache_stats = db.get_user_cache_stats()
+    outbox_pending = await db.count_pending_outbox()
     
     await message.answer(
         f"📊 **Статистика системы**\n\n"
@@ -108,49 +102,51 @@ async def admin_stats_menu(message: Message):
         f"🎉 **Мероприятия:**\n"
         f"• Всего: {events_count['total']}\n"
         f"• Активных: {events_count['active']}\n\n"
-        f"📋 **Заявки на рассмотрении:** {pending_count}"
+        f"📋 **Заявки на рассмотрении:** {pending_count}\n\n"
+        f"⚡ **Кэш пользователей:** {cache_stats['size']}/{cache_stats['max_size']}, "
+        f"попаданий {cache_stats['hit_rate']:.0%} "
+        f"({cache_stats['hits']} / {cache_stats['misses']} промахов)"
+        + format_scheduler_stats(update_scheduler)
+        + format_outbound_stats(outbound_queue)
+        + format_outbox_stats(outbox, outbox_pending)
+    )
+
+def format_scheduler_stats(update_scheduler: Optional[UpdateScheduler]) -> str:
+    """Строка статистики планировщика апдейтов для админа"""
+    if update_scheduler is None:
+        return ""
+    stats = update_scheduler.stats()
+    return (
+        f"\n\n🚦 **Апдейты:** в работе {stats['running']}/{stats['max_concurrency']}, "
+        f"в очереди {stats['waiting']} (макс. у одного пользователя {stats['max_user_depth']}), "
+        f"ожидание p50 {stats['wait_p50_ms']:.0f} мс / p99 {stats['wait_p99_ms']:.0f} мс"
     )
 
+def format_outbound_stats(outbound_queue: Optional[OutboundQueue]) -> str:
+    """Строка статистики исходящих сообщений для админа"""
+    if outbound_queue is None:
+        return ""
+    stats = outbound_queue.stats()
+    queued = stats['queued']
+    return (
+        f"\n\n📤 **Отправка:** доставлено {stats['sent']}, ошибок {stats['failed']}, "
+        f"повторов после 429 {stats['retried']}; в очереди {queued['reply']} ответов, "
+        f"{queued['notification']} уведомлений, {queued['bulk']} рассылок; "
+        f"ожидание p50 {stats['wait_p50_ms']:.0f} мс / p99 {stats['wait_p99_ms']:.0f} мс"
+    )
+
+def format_outbox_stats(outbox: Optional[OutboxDispatcher], pending: int) -> str:
+    """Строка статистики доставки уведомлений для админа"""
+    text = f"\n\n📬 **Уведомления:** ожидают доставки {pending}"
+    if outbox is not None:
+        stats = outbox.stats()
+        text += f", доставлено {stats['sent']}, повторов {stats['retried']}, не доставлено {stats['failed']}"
+    return text
+
 async def get_users_stats():
     """Получить статистику пользователей"""
-    async with db._connect() as conn:
-        cursor = await conn.execute("""
-            SELECT 
-                COUNT(*) as total,
-                SUM(CASE WHEN verification_status = 'approved' THEN 1 ELSE 0 END) as approved,
-                SUM(CASE WHEN verification_status = 'pending' THEN 1 ELSE 0 END) as pending,
-                SUM(CASE WHEN verification_status = 'rejected' THEN 1 ELSE 0 END) as rejected
-            FROM users 
-            WHERE name IS NOT NULL
-        """)
-        row = await cursor.fetchone()
-        return {
-            'total': row[0] or 0,
-            'approved': row[1] or 0,
-            'pending': row[2] or 0,
-            'rejected': row[3] or 0
-        }
+    return await db.get_users_stats()
 
 async def get_events_stats():
     """Получить статистику мероприятий"""
-    async with db._connect() as conn:
-        cursor = await conn.execute("""
-            SELECT 
-                COUNT(*) as total,
-                SUM(CASE WHEN is_active = TRUE THEN 1 ELSE 0 END) as active
-            FROM events
-        """)
-        row = await cursor.fetchone()
-        return {
-            'total': row[0] or 0,
-            'active': row[1] or 0
-        }
-
-# Добавляем метод для подключения к базе в класс Database
-def _connect(self):
-    """Прямое подключение к базе данных (для статистики)"""
-    import aiosqlite
-    return aiosqlite.connect(self.db_path)
-
-# Патчим класс Database
-Database._connect = _connect
+    return await db.get_events_stats()
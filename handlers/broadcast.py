@@ -0,0 +1,125 @@
+from aiogram import Router, F
+from aiogram.types import Message, CallbackQuery, InlineKeyboardButton, InlineKeyboardMarkup
+from aiogram.fsm.context import FSMContext
+from typing import Optional
+import logging
+
+from broadcast import BroadcastManager, format_broadcast_progress, get_broadcast_progress_keyboard
+from database import Database
+from config import DATABASE_URL
+from handlers.states import BroadcastStates
+
+router = Router()
+db = Database.shared(DATABASE_URL)
+logger = logging.getLogger(__name__)
+
+# Максимальная длина текста сообщения Telegram
+MAX_BROADCAST_LENGTH = 4096
+
+AUDIENCE_TITLES = {
+    'event': "участникам мероприятия",
+    'verified': "всем верифицированным пользователям",
+}
+
+def get_broadcast_confirm_keyboard():
+    """Клавиатура подтверждения рассылки"""
+    return InlineKeyboardMarkup(inline_keyboard=[
+        [InlineKeyboardButton(text="✅ Отправить", callback_data="broadcast_confirm")],
+        [InlineKeyboardButton(text="❌ Отмена", callback_data="broadcast_abort")],
+    ])
+
+@router.callback_query(F.data.startswith("admin_event_broadcast_"))
+@router.callback_query(F.data.startswith("admin_event_announce_"))
+async def admin_broadcast_callback(callback: CallbackQuery, state: FSMContext, is_user_admin: bool):
+    """Начать рассылку участникам мероприятия или анонс всем верифицированным"""
+    if not is_user_admin:
+        await callback.answer("❌ У вас нет прав администратора.", show_alert=True)
+        return
+    
+    event_id = int(callback.data.split("_")[3])
+    event = await db.get_event_by_id(event_id)
+    if not event:
+        await callback.answer("❌ Мероприятие не найдено.", show_alert=True)
+        return
+    
+    audience = 'event' if callback.data.startswith("admin_event_broadcast_") else 'verified'
+    recipients = await db.count_broadcast_recipients(audience, event_id)
+    if not recipients:
+        await callback.answer("📭 Получателей пока нет.", show_alert=True)
+        return
+    
+    await state.set_state(BroadcastStates.text)
+    await state.update_data(audience=audience, event_id=event_id)
+    await callback.message.edit_text(
+        f"📣 **Рассылка {AUDIENCE_TITLES[audience]}**\n\n"
+        f"🎉 {event['name']}\n"
+        f"👥 Получателей: {recipients}\n\n"
+        "Отправьте текст сообщения:",
+        reply_markup=InlineKeyboardMarkup(inline_keyboard=[
+            [InlineKeyboardButton(text="❌ Отмена", callback_data="broadcast_abort")]
+        ])
+    )
+
+@router.message(BroadcastStates.text)
+async def process_broadcast_text(message: Message, state: FSMContext):
+    """Текст рассылки и предпросмотр"""
+    text = (message.text or "").strip()
+    
+    if not text or len(text) > MAX_BROADCAST_LENGTH:
+        await message.answer(f"❌ Нужен текст до {MAX_BROADCAST_LENGTH} символов. Попробуйте еще раз:")
+        return
+    
+    data = await state.get_data()
+    await state.update_data(text=text)
+    await state.set_state(BroadcastStates.confirm)
+    
+    recipients = await db.count_broadcast_recipients(data['audience'], data['event_id'])
+    await message.answer(
+        f"👀 **Предпросмотр рассылки** ({recipients} получателей):\n\n{text}",
+        reply_markup=get_broadcast_confirm_keyboard()
+    )
+
+@router.callback_query(BroadcastStates.confirm, F.data == "broadcast_confirm")
+async def broadcast_confirm_callback(callback: CallbackQuery, state: FSMContext, is_user_admin: bool,
+                                     broadcasts: Optional[BroadcastManager] = None):
+    """Запустить рассылку"""
+    if not is_user_admin or broadcasts is None:
+        await callback.answer("❌ Рассылка недоступна.", show_alert=True)
+        return
+    
+    data = await state.get_data()
+    await state.clear()
+    
+    await callback.message.edit_reply_markup(reply_markup=None)
+    await broadcasts.create(
+        data['audience'], data['event_id'], data['text'],
+        created_by=callback.from_user.id,
+        progress_chat_id=callback.message.chat.id
+    )
+    await callback.answer("📣 Рассылка запущена!", show_alert=False)
+
+@router.callback_query(F.data == "broadcast_abort")
+async def broadcast_abort_callback(callback: CallbackQuery, state: FSMContext):
+    """Отменить подготовку рассылки"""
+    await state.clear()
+    await callback.message.edit_text("❌ Рассылка отменена.")
+
+@router.callback_query(F.data.startswith("broadcast_cancel_"))
+async def broadcast_cancel_callback(callback: CallbackQuery, is_user_admin: bool,
+                                    broadcasts: Optional[BroadcastManager] = None):
+    """Остановить идущую рассылку"""
+    if not is_user_admin or broadcasts is None:
+        await callback.answer("❌ У вас нет прав администратора.", show_alert=True)
+        return
+    
+    broadcast_id = int(callback.data.split("_")[2])
+    if not await broadcasts.cancel(broadcast_id):
+        await callback.answer("ℹ️ Рассылка уже завершена.", show_alert=True)
+        return
+    
+    broadcast = await db.get_broadcast(broadcast_id)
+    await callback.message.edit_text(
+        format_broadcast_progress(broadcast),
+        reply_markup=get_broadcast_progress_keyboard(broadcast)
+    )
+    await callback.answer("⏹ Рассылка остановлена", show_alert=False)
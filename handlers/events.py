@@ -1,20 +1,22 @@
 from aiogram import Router, F
 from aiogram.types import Message, CallbackQuery, InlineKeyboardButton, InlineKeyboardMarkup
 from aiogram.fsm.context import FSMContext
-from aiogram.filters import Command
+from aiogram.filters import Command, CommandObject
+from typing import Optional
 import logging
 
 from database import Database
 from config import DATABASE_URL
-from utils import is_admin
 from handlers.states import EventStates
+from event_catalog import EventCatalog
+from utils import get_page_navigation_row, get_search_navigation_row, is_message_unchanged, parse_page_callback
 
 router = Router()
-db = Database(DATABASE_URL)
+db = Database.shared(DATABASE_URL)
 logger = logging.getLogger(__name__)
 
-def get_events_list_keyboard(events, user_id=None):
-    """Клавиатура со списком мероприятий"""
+def get_events_list_keyboard(events, user_id=None, has_prev=False, has_next=False):
+    """Клавиатура со страницей мероприятий"""
     keyboard = []
     
     if not events:
@@ -28,11 +30,54 @@ def get_events_list_keyboard(events, user_id=None):
                 callback_data=f"event_view_{event['id']}"
             )])
     
-    keyboard.append([InlineKeyboardButton(text="🔄 Обновить", callback_data="events_refresh")])
+    navigation = get_page_navigation_row("events_page", events, has_prev, has_next)
+    if navigation:
+        keyboard.append(navigation)
+    
+    keyboard.append([
+        InlineKeyboardButton(text="🔎 Поиск", callback_data="events_search"),
+        InlineKeyboardButton(text="🔄 Обновить", callback_data="events_refresh")
+    ])
+    # Inline-режим: результаты появляются прямо над полем ввода, без редактирования сообщений
+    keyboard.append([InlineKeyboardButton(text="⚡ Быстрый поиск", switch_inline_query_current_chat="")])
     keyboard.append([InlineKeyboardButton(text="🏠 Главная", callback_data="events_close")])
     
     return InlineKeyboardMarkup(inline_keyboard=keyboard)
 
+def render_events_list(events, total, has_prev=False, has_next=False):
+    """Текст и клавиатура страницы списка (рисуются EventCatalog один раз на версию каталога)"""
+    text = (
+        f"🎉 **Мероприятия ({total})**\n\n"
+        "Выбери мероприятие для подробной информации:"
+    )
+    return text, get_events_list_keyboard(events, has_prev=has_prev, has_next=has_next)
+
+def get_event_search_keyboard(events, page=0, has_prev=False, has_next=False):
+    """Клавиатура со страницей результатов поиска мероприятий"""
+    keyboard = []
+    for event in events:
+        name = event['name'][:35] + "..." if len(event['name']) > 35 else event['name']
+        keyboard.append([InlineKeyboardButton(text=f"🎉 {name}", callback_data=f"event_view_{event['id']}")])
+    
+    navigation = get_search_navigation_row("events_search_page", page, has_prev, has_next)
+    if navigation:
+        keyboard.append(navigation)
+    
+    keyboard.append([
+        InlineKeyboardButton(text="🔎 Новый поиск", callback_data="events_search"),
+        InlineKeyboardButton(text="⬅️ К списку", callback_data="events_list")
+    ])
+    return InlineKeyboardMarkup(inline_keyboard=keyboard)
+
+async def build_event_search_page(query: str, page: int = 0):
+    """Текст и клавиатура страницы результатов поиска"""
+    events, has_prev, has_next = await db.search_events(query, page)
+    if not events and page == 0:
+        text = f"🔎 По запросу «{query}» активных мероприятий не найдено.\n\nПопробуй другие слова."
+    else:
+        text = f"🔎 **Мероприятия по запросу «{query}»**\n\nВыбери мероприятие:"
+    return text, get_event_search_keyboard(events, page, has_prev, has_next)
+
 def get_event_actions_keyboard(event_id, is_joined=False):
     """Клавиатура для действий с мероприятием"""
     keyboard = []
@@ -55,8 +100,8 @@ def get_event_actions_keyboard(event_id, is_joined=False):
     
     return InlineKeyboardMarkup(inline_keyboard=keyboard)
 
-def get_admin_events_keyboard(events):
-    """Админская клавиатура для управления мероприятиями"""
+def get_admin_events_keyboard(events, has_prev=False, has_next=False):
+    """Админская клавиатура для управления мероприятиями (одна страница)"""
     keyboard = []
     
     # Кнопка создания нового мероприятия
@@ -77,6 +122,10 @@ def get_admin_events_keyboard(events):
                 text=f"{status} {name} ({participants} чел.)",
                 callback_data=f"admin_event_manage_{event['id']}"
             )])
+        
+        navigation = get_page_navigation_row("admin_events_page", events, has_prev, has_next)
+        if navigation:
+            keyboard.append(navigation)
     
     keyboard.append([
         InlineKeyboardButton(text="🔄 Обновить", callback_data="admin_events_refresh"),
@@ -90,6 +139,8 @@ def get_admin_event_manage_keyboard(event_id, is_active=True):
     keyboard = [
         [InlineKeyboardButton(text="✏️ Изменить название", callback_data=f"admin_event_edit_name_{event_id}")],
         [InlineKeyboardButton(text="📝 Изменить описание", callback_data=f"admin_event_edit_desc_{event_id}")],
+        [InlineKeyboardButton(text="📣 Написать участникам", callback_data=f"admin_event_broadcast_{event_id}")],
+        [InlineKeyboardButton(text="📢 Анонс всем пользователям", callback_data=f"admin_event_announce_{event_id}")],
     ]
     
     if is_active:
@@ -132,27 +183,61 @@ def format_event_info(event, participant_count=None):
 # === ПОЛЬЗОВАТЕЛЬСКИЕ КОМАНДЫ ===
 
 @router.message(Command("events"))
-async def events_list_command(message: Message):
+async def events_list_command(message: Message, user: Optional[dict], event_catalog: EventCatalog):
     """Список мероприятий"""
-    user = await db.get_user(message.from_user.id)
+    if not user or user['verification_status'] != 'approved':
+        await message.answer("❌ Эта функция доступна только верифицированным пользователям.")
+        return
     
+    text, keyboard = await event_catalog.view()
+    await message.answer(text, reply_markup=keyboard)
+
+@router.message(Command("find_event"))
+async def find_event_command(message: Message, command: CommandObject, state: FSMContext, user: Optional[dict]):
+    """Поиск мероприятий: /find_event слова"""
     if not user or user['verification_status'] != 'approved':
         await message.answer("❌ Эта функция доступна только верифицированным пользователям.")
         return
     
-    events = await db.get_active_events()
+    if not command.args or not command.args.strip():
+        await state.set_state(EventStates.search)
+        await message.answer("🔎 Напиши, что ищешь: слова из названия или описания мероприятия.")
+        return
+    
+    await show_event_search(message, state, command.args.strip())
+
+@router.message(EventStates.search, ~F.text.startswith("/"))
+async def process_event_search(message: Message, state: FSMContext, user: Optional[dict]):
+    """Слова для поиска после кнопки 🔎 Поиск"""
+    if not user or user['verification_status'] != 'approved' or not message.text:
+        await state.clear()
+        return
+    
+    await show_event_search(message, state, message.text.strip())
+
+async def show_event_search(message: Message, state: FSMContext, query: str):
+    """Первая страница результатов; запрос запоминается для ◀ / ▶"""
+    await state.set_state(None)
+    await state.update_data(event_search_query=query)
+    text, keyboard = await build_event_search_page(query)
+    await message.answer(text, reply_markup=keyboard)
+
+async def send_event_card(message: Message, user: dict, event_id: int):
+    """Карточка мероприятия отдельным сообщением (ссылка из inline-результата)"""
+    event = await db.get_event_by_id(event_id)
+    if not event or not event['is_active']:
+        await message.answer("❌ Мероприятие не найдено или неактивно.")
+        return
     
+    is_joined = await db.is_user_joined_event(user['id'], event_id)
     await message.answer(
-        f"🎉 **Мероприятия ({len(events)})**\n\n"
-        "Выбери мероприятие для подробной информации:",
-        reply_markup=get_events_list_keyboard(events, user['id'])
+        format_event_info(event),
+        reply_markup=get_event_actions_keyboard(event_id, is_joined)
     )
 
 @router.message(Command("my_events"))
-async def my_events_command(message: Message):
+async def my_events_command(message: Message, user: Optional[dict]):
     """Мои мероприятия"""
-    user = await db.get_user(message.from_user.id)
-    
     if not user or user['verification_status'] != 'approved':
         await message.answer("❌ Эта функция доступна только верифицированным пользователям.")
         return
@@ -180,27 +265,56 @@ async def my_events_command(message: Message):
 
 @router.callback_query(F.data == "events_list")
 @router.callback_query(F.data == "events_refresh")
-async def events_list_callback(callback: CallbackQuery):
-    """Показать список мероприятий"""
-    user = await db.get_user(callback.from_user.id)
+@router.callback_query(F.data.startswith("events_page_"))
+async def events_list_callback(callback: CallbackQuery, user: Optional[dict], event_catalog: EventCatalog):
+    """Показать список мероприятий (с листанием ◀ / ▶)"""
+    if not user or user['verification_status'] != 'approved':
+        await callback.answer("❌ Доступно только верифицированным пользователям.", show_alert=True)
+        return
     
+    cursor, backward = None, False
+    if callback.data.startswith("events_page_"):
+        cursor, backward = parse_page_callback(callback.data)
+    
+    # Страница из каталога в памяти; база читается, только если каталог изменился
+    text, keyboard = await event_catalog.view(cursor, backward)
+    if is_message_unchanged(callback.message, text, keyboard):
+        await callback.answer("✅ Список актуален")
+        return
+    
+    await callback.message.edit_text(text, reply_markup=keyboard)
+
+@router.callback_query(F.data == "events_search")
+async def events_search_callback(callback: CallbackQuery, state: FSMContext, user: Optional[dict]):
+    """Кнопка 🔎 Поиск: следующее сообщение - поисковый запрос"""
     if not user or user['verification_status'] != 'approved':
         await callback.answer("❌ Доступно только верифицированным пользователям.", show_alert=True)
         return
     
-    events = await db.get_active_events()
+    await state.set_state(EventStates.search)
+    await callback.message.answer("🔎 Напиши, что ищешь: слова из названия или описания мероприятия.")
+    await callback.answer()
+
+@router.callback_query(F.data.startswith("events_search_page_"))
+async def events_search_page_callback(callback: CallbackQuery, state: FSMContext, user: Optional[dict]):
+    """Листание результатов поиска ◀ / ▶"""
+    if not user or user['verification_status'] != 'approved':
+        await callback.answer("❌ Доступно только верифицированным пользователям.", show_alert=True)
+        return
     
-    await callback.message.edit_text(
-        f"🎉 **Мероприятия ({len(events)})**\n\n"
-        "Выбери мероприятие для подробной информации:",
-        reply_markup=get_events_list_keyboard(events, user['id'])
-    )
+    query = (await state.get_data()).get('event_search_query')
+    if not query:
+        await callback.answer("🔎 Поиск устарел, повтори его.", show_alert=True)
+        return
+    
+    text, keyboard = await build_event_search_page(query, int(callback.data.rsplit("_", 1)[1]))
+    await callback.message.edit_text(text, reply_markup=keyboard)
+    await callback.answer()
 
 @router.callback_query(F.data.startswith("event_view_"))
-async def event_view_callback(callback: CallbackQuery):
+async def event_view_callback(callback: CallbackQuery, user: Optional[dict]):
     """Просмотр мероприятия"""
     event_id = int(callback.data.split("_")[2])
-    user = await db.get_user(callback.from_user.id)
     
     if not user or user['verification_status'] != 'approved':
         await callback.answer("❌ Доступно только верифицированным пользователям.", show_alert=True)
@@ -220,24 +334,20 @@ async def event_view_callback(callback: CallbackQuery):
     )
 
 @router.callback_query(F.data.startswith("event_join_"))
-async def event_join_callback(callback: CallbackQuery):
+async def event_join_callback(callback: CallbackQuery, user: Optional[dict]):
     """Записаться на мероприятие"""
     event_id = int(callback.data.split("_")[2])
-    user = await db.get_user(callback.from_user.id)
     
     if not user or user['verification_status'] != 'approved':
         await callback.answer("❌ Доступно только верифицированным пользователям.", show_alert=True)
         return
     
-    event = await db.get_event_by_id(event_id)
-    if not event or not event['is_active']:
+    # Проверка, запись и свежее состояние мероприятия - одной транзакцией
+    updated_event, joined = await db.join_event(user['id'], event_id)
+    if not updated_event:
         await callback.answer("❌ Мероприятие недоступно.", show_alert=True)
         return
     
-    await db.join_event(user['id'], event_id)
-    
-    # Обновляем информацию о мероприятии
-    updated_event = await db.get_event_by_id(event_id)
     event_text = format_event_info(updated_event)
     
     await callback.message.edit_text(
@@ -246,31 +356,32 @@ async def event_join_callback(callback: CallbackQuery):
     )
     
     await callback.answer("✅ Ты записался на мероприятие!", show_alert=False)
-    logger.info(f"User {user['id']} joined event {event_id}")
+    if joined:
+        logger.info(f"User {user['id']} joined event {event_id}")
 
 @router.callback_query(F.data.startswith("event_leave_"))
-async def event_leave_callback(callback: CallbackQuery):
+async def event_leave_callback(callback: CallbackQuery, user: Optional[dict]):
     """Отписаться от мероприятия"""
     event_id = int(callback.data.split("_")[2])
-    user = await db.get_user(callback.from_user.id)
     
     if not user or user['verification_status'] != 'approved':
         await callback.answer("❌ Доступно только верифицированным пользователям.", show_alert=True)
         return
     
-    await db.leave_event(user['id'], event_id)
+    updated_event, left = await db.leave_event(user['id'], event_id)
+    if not updated_event:
+        await callback.answer("❌ Мероприятие недоступно.", show_alert=True)
+        return
     
-    # Обновляем информацию о мероприятии
-    updated_event = await db.get_event_by_id(event_id)
-    if updated_event:
-        event_text = format_event_info(updated_event)
-        await callback.message.edit_text(
-            event_text,
-            reply_markup=get_event_actions_keyboard(event_id, False)
-        )
+    event_text = format_event_info(updated_event)
+    await callback.message.edit_text(
+        event_text,
+        reply_markup=get_event_actions_keyboard(event_id, False)
+    )
     
     await callback.answer("❌ Ты отписался от мероприятия.", show_alert=False)
-    logger.info(f"User {user['id']} left event {event_id}")
+    if left:
+        logger.info(f"User {user['id']} left event {event_id}")
 
 @router.callback_query(F.data == "events_close")
 async def events_close_callback(callback: CallbackQuery):
@@ -285,40 +396,47 @@ async def no_events_callback(callback: CallbackQuery):
 # === АДМИНСКИЕ КОМАНДЫ ===
 
 @router.message(Command("events_admin"))
-async def admin_events_command(message: Message):
+async def admin_events_command(message: Message, is_user_admin: bool):
     """Админское управление мероприятиями"""
-    if not is_admin(message):
+    if not is_user_admin:
         await message.answer("❌ У вас нет прав администратора.")
         return
     
-    events = await db.get_all_events()
+    events, has_prev, has_next = await db.get_all_events_page()
+    stats = await db.get_events_stats()
     
     await message.answer(
-        f"🔧 **Управление мероприятиями ({len(events)})**\n\n"
+        f"🔧 **Управление мероприятиями ({stats['total']})**\n\n"
         "Выберите действие:",
-        reply_markup=get_admin_events_keyboard(events)
+        reply_markup=get_admin_events_keyboard(events, has_prev, has_next)
     )
 
 @router.callback_query(F.data == "admin_events_list")
 @router.callback_query(F.data == "admin_events_refresh")
-async def admin_events_list_callback(callback: CallbackQuery):
-    """Список мероприятий для админа"""
-    if not is_admin(callback):
+@router.callback_query(F.data.startswith("admin_events_page_"))
+async def admin_events_list_callback(callback: CallbackQuery, is_user_admin: bool):
+    """Список мероприятий для админа (с листанием ◀ / ▶)"""
+    if not is_user_admin:
         await callback.answer("❌ У вас нет прав администратора.", show_alert=True)
         return
     
-    events = await db.get_all_events()
+    cursor, backward = None, False
+    if callback.data.startswith("admin_events_page_"):
+        cursor, backward = parse_page_callback(callback.data)
+    
+    events, has_prev, has_next = await db.get_all_events_page(cursor, backward)
+    stats = await db.get_events_stats()
     
     await callback.message.edit_text(
-        f"🔧 **Управление мероприятиями ({len(events)})**\n\n"
+        f"🔧 **Управление мероприятиями ({stats['total']})**\n\n"
         "Выберите действие:",
-        reply_markup=get_admin_events_keyboard(events)
+        reply_markup=get_admin_events_keyboard(events, has_prev, has_next)
     )
 
 @router.callback_query(F.data == "admin_event_create")
-async def admin_event_create_callback(callback: CallbackQuery, state: FSMContext):
+async def admin_event_create_callback(callback: CallbackQuery, state: FSMContext, is_user_admin: bool):
     """Начать создание мероприятия"""
-    if not is_admin(callback):
+    if not is_user_admin:
         await callback.answer("❌ У вас нет прав администратора.", show_alert=True)
         return
     
@@ -373,11 +491,11 @@ async def process_event_description(message: Message, state: FSMContext):
     logger.info(f"Admin {message.from_user.id} created event {event_id}")
 
 @router.callback_query(F.data.startswith("admin_event_manage_"))
-async def admin_event_manage_callback(callback: CallbackQuery):
+async def admin_event_manage_callback(callback: CallbackQuery, is_user_admin: bool):
     """Управление мероприятием"""
     event_id = int(callback.data.split("_")[3])
     
-    if not is_admin(callback):
+    if not is_user_admin:
         await callback.answer("❌ У вас нет прав администратора.", show_alert=True)
         return
     
@@ -394,11 +512,11 @@ async def admin_event_manage_callback(callback: CallbackQuery):
     )
 
 @router.callback_query(F.data.startswith("admin_event_activate_"))
-async def admin_event_activate_callback(callback: CallbackQuery):
+async def admin_event_activate_callback(callback: CallbackQuery, is_user_admin: bool):
     """Активировать мероприятие"""
     event_id = int(callback.data.split("_")[3])
     
-    if not is_admin(callback):
+    if not is_user_admin:
         await callback.answer("❌ У вас нет прав администратора.", show_alert=True)
         return
     
@@ -415,11 +533,11 @@ async def admin_event_activate_callback(callback: CallbackQuery):
     await callback.answer("🟢 Мероприятие активировано!", show_alert=False)
 
 @router.callback_query(F.data.startswith("admin_event_deactivate_"))
-async def admin_event_deactivate_callback(callback: CallbackQuery):
+async def admin_event_deactivate_callback(callback: CallbackQuery, is_user_admin: bool):
     """Деактивировать мероприятие"""
     event_id = int(callback.data.split("_")[3])
     
-    if not is_admin(callback):
+    if not is_user_admin:
         await callback.answer("❌ У вас нет прав администратора.", show_alert=True)
         return
     
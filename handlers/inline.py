@@ -0,0 +1,58 @@
+"""
+Inline-режим: "@бот запрос" в любом чате - поиск активных мероприятий
+"""
+from aiogram import Bot, Router
+from aiogram.types import (
+    InlineKeyboardButton, InlineKeyboardMarkup, InlineQuery, InlineQueryResultArticle,
+    InlineQueryResultsButton, InputTextMessageContent
+)
+from typing import Optional
+
+from config import INLINE_SEARCH
+from inline_search import InlineEventSearch
+
+router = Router()
+
+def format_event_share(event) -> str:
+    """Сообщение, которое отправляется в чат при выборе результата"""
+    return f"🎉 **{event['name']}**\n\n{event['description']}"
+
+def get_event_share_keyboard(event_id, bot_username):
+    """Кнопка открывает карточку мероприятия в боте (/start event_<id>)"""
+    return InlineKeyboardMarkup(inline_keyboard=[[InlineKeyboardButton(
+        text="🎉 Открыть в боте",
+        url=f"https://t.me/{bot_username}?start=event_{event_id}"
+    )]])
+
+@router.inline_query()
+async def inline_events_search(inline_query: InlineQuery, bot: Bot, user: Optional[dict],
+                               inline_search: InlineEventSearch):
+    """Результаты поиска мероприятий; пустой запрос - свежие мероприятия"""
+    # Ответ зависит от верификации пользователя - кэш Telegram только личный
+    if not user or user['verification_status'] != 'approved':
+        await inline_query.answer(
+            [],
+            cache_time=INLINE_SEARCH['cache_time'],
+            is_personal=True,
+            button=InlineQueryResultsButton(text="🎓 Мероприятия доступны после верификации", start_parameter="inline")
+        )
+        return
+    
+    events, next_offset = await inline_search.search(inline_query.query, inline_query.offset)
+    bot_username = (await bot.me()).username
+    results = [
+        InlineQueryResultArticle(
+            id=str(event['id']),
+            title=f"🎉 {event['name']}",
+            description=(event['description'] or '')[:100],
+            input_message_content=InputTextMessageContent(message_text=format_event_share(event)),
+            reply_markup=get_event_share_keyboard(event['id'], bot_username)
+        )
+        for event in events
+    ]
+    await inline_query.answer(
+        results,
+        cache_time=INLINE_SEARCH['cache_time'],
+        is_personal=True,
+        next_offset=next_offset
+    )
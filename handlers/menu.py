@@ -2,13 +2,16 @@ from aiogram import Router, F
 from aiogram.types import Message, CallbackQuery, InlineKeyboardButton, InlineKeyboardMarkup, ReplyKeyboardMarkup, KeyboardButton
 from aiogram.filters import Command
 from aiogram.fsm.context import FSMContext
+from typing import Optional
 
 from database import Database
 from config import DATABASE_URL
-from utils import is_admin
+from event_catalog import EventCatalog
+from feed import SwipeFeed
+from recommendations import SharedEventsIndex
 
 router = Router()
-db = Database(DATABASE_URL)
+db = Database.shared(DATABASE_URL)
 
 def determine_user_state(user):
     """Определить состояние пользователя на основе данных"""
@@ -130,29 +133,28 @@ def get_inline_menu_keyboard(user_status: str = None, is_user_admin: bool = Fals
     return InlineKeyboardMarkup(inline_keyboard=keyboard)
 
 @router.message(F.text == "🚀 Создать анкету")
-async def create_profile_menu(message: Message, state: FSMContext):
+async def create_profile_menu(message: Message, state: FSMContext, user: Optional[dict],
+                              is_user_admin: bool, admin_mode: bool):
     """Создание анкеты через меню"""
     from handlers.registration import start_command
-    await start_command(message, state)
+    await start_command(message, state, user, is_user_admin, admin_mode)
 
 @router.message(F.text == "👤 Моя анкета")
-async def view_profile_menu(message: Message):
+async def view_profile_menu(message: Message, user: Optional[dict]):
     """Просмотр анкеты через меню"""
     from handlers.registration import view_profile
-    await view_profile(message)
+    await view_profile(message, user)
 
 @router.message(F.text == "✏️ Редактировать")
 @router.message(F.text.in_(["✏️ Редактировать", "✏️ Изменить анкету"]))
-async def edit_profile_menu(message: Message, state: FSMContext):
+async def edit_profile_menu(message: Message, state: FSMContext, user: Optional[dict]):
     """Редактирование анкеты через меню (унификация названий кнопок)"""
     from handlers.registration import edit_profile_command
-    await edit_profile_command(message, state)
+    await edit_profile_command(message, state, user)
 
 @router.message(F.text == "📤 Подать на верификацию")
-async def submit_for_verification_menu(message: Message):
+async def submit_for_verification_menu(message: Message, state: FSMContext, user: Optional[dict]):
     """Подача анкеты на верификацию из состояния draft"""
-    user = await db.get_user(message.from_user.id)
-    
     if not user or not user.get('name'):
         await message.answer("❌ Сначала создай анкету!")
         return
@@ -173,60 +175,34 @@ async def submit_for_verification_menu(message: Message):
     )
     
     from handlers.states import VerificationStates
-    from aiogram.fsm.context import FSMContext
-    state = FSMContext.get_instance()
     await state.set_state(VerificationStates.student_card_photo)
 
 # Админская панель теперь обрабатывается в handlers/admin_mode.py
 
 @router.message(F.text == "🔍 Поиск людей")
-async def search_people_menu(message: Message):
-    """Поиск людей через меню"""
-    user = await db.get_user(message.from_user.id)
-    
+async def search_people_menu(message: Message, user: Optional[dict], feed: SwipeFeed,
+                             recommendations: SharedEventsIndex):
+    """Поиск людей через меню: лента анкет с лайками"""
     if not user or user['verification_status'] != 'approved':
         await message.answer("❌ Эта функция доступна только верифицированным пользователям.")
         return
     
-    # Проверяем участие в мероприятиях
-    events_count = await db.get_user_events_count(user['id'])
-    
-    if events_count == 0:
-        await message.answer(
-            "❌ **Для поиска людей нужно участие в мероприятиях**\n\n"
-            "Сначала запишись хотя бы на одно мероприятие:\n"
-            "🎉 Используй кнопку **Мероприятия**\n\n"
-            "Это поможет находить людей с общими интересами! 🤝"
-        )
-        return
-    
-    await message.answer(
-        f"🔍 **Поиск людей**\n\n"
-        f"👥 Ты участвуешь в {events_count} мероприятии(ях)\n\n"
-        "Функция поиска анкет будет доступна в следующем обновлении!\n"
-        "Скоро ты сможешь:\n"
-        "• Просматривать анкеты других студентов\n"
-        "• Ставить лайки и дизлайки\n"
-        "• Находить людей с общими мероприятиями\n\n"
-        "Следи за обновлениями! 🚀"
-    )
+    from handlers.people import start_people_search
+    await start_people_search(message, user, feed, recommendations)
 
 @router.message(F.text == "🎉 Мероприятия")
-async def events_menu(message: Message):
+async def events_menu(message: Message, user: Optional[dict], event_catalog: EventCatalog):
     """Мероприятия через меню"""
     from handlers.events import events_list_command
-    await events_list_command(message)
+    await events_list_command(message, user, event_catalog)
 
 @router.message(F.text == "📸 Повторная верификация")
-async def reverify_menu(message: Message):
+async def reverify_menu(message: Message, user: Optional[dict]):
     """Повторная верификация через меню"""
     from handlers.registration import resend_verification_callback
     from aiogram.fsm.context import FSMContext
     from aiogram.fsm.storage.base import StorageKey
     
-    # Создаем фейковый callback для переиспользования логики
-    user = await db.get_user(message.from_user.id)
-    
     if not user or user['verification_status'] != 'rejected':
         await message.answer("❌ Повторная верификация доступна только при отклоненной заявке.")
         return
@@ -252,10 +228,8 @@ async def reverify_menu(message: Message):
         await storage.set_state(key, VerificationStates.student_card_photo)
 
 @router.message(F.text == "ℹ️ Статус верификации")
-async def status_menu(message: Message):
+async def status_menu(message: Message, user: Optional[dict]):
     """Проверка статуса верификации через меню"""
-    user = await db.get_user(message.from_user.id)
-    
     if not user:
         await message.answer("❌ У тебя пока нет анкеты.")
         return
@@ -287,10 +261,9 @@ async def about_bot_menu(message: Message):
     )
 
 @router.message(F.text == "❓ Помощь")
-async def help_menu(message: Message):
+async def help_menu(message: Message, user: Optional[dict], is_user_admin: bool):
     """Помощь через меню"""
-    user = await db.get_user(message.from_user.id)
-    admin_text = "\n\n🔧 **Админские команды:**\n/admin_panel - панель администратора\n/pending - заявки на верификацию" if is_admin(message) else ""
+    admin_text = "\n\n🔧 **Админские команды:**\n/admin_panel - панель администратора\n/pending - заявки на верификацию\n/find_user - поиск пользователей" if is_user_admin else ""
     
     # Используем новую логику состояний
     user_state = determine_user_state(user) if user else 'new'
@@ -306,7 +279,9 @@ async def help_menu(message: Message):
             "**Команды:**\n"
             "/start - главное меню\n"
             "/profile - показать анкету\n"
-            "/edit - редактировать\n\n"
+            "/edit - редактировать\n"
+            "/find_event - поиск мероприятий\n"
+            "@бот запрос - поиск мероприятий в любом чате\n\n"
             "По вопросам обращайтесь к администраторам." + admin_text
         )
     elif user and user['verification_status'] == 'pending':
@@ -347,82 +322,72 @@ async def help_menu(message: Message):
 
 # Inline callback обработчики
 @router.callback_query(F.data == "menu_profile")
-async def inline_profile_callback(callback: CallbackQuery):
+async def inline_profile_callback(callback: CallbackQuery, user: Optional[dict]):
     """Просмотр профиля через inline"""
     from handlers.registration import view_profile
-    await view_profile(callback.message)
+    await view_profile(callback.message, user)
 
 @router.callback_query(F.data == "menu_edit")
-async def inline_edit_callback(callback: CallbackQuery):
+async def inline_edit_callback(callback: CallbackQuery, state: FSMContext, user: Optional[dict]):
     """Редактирование через inline"""
     from handlers.registration import edit_profile_command
-    await edit_profile_command(callback.message, None)
+    await edit_profile_command(callback.message, state, user)
 
 @router.callback_query(F.data == "menu_admin")
-async def inline_admin_callback(callback: CallbackQuery):
+async def inline_admin_callback(callback: CallbackQuery, is_user_admin: bool):
     """Админ панель через inline"""
-    if not is_admin(callback):
+    if not is_user_admin:
         await callback.answer("❌ У вас нет прав администратора.", show_alert=True)
         return
     
     from handlers.admin import admin_panel_callback
-    await admin_panel_callback(callback)
+    await admin_panel_callback(callback, is_user_admin)
 
 @router.callback_query(F.data == "menu_search")
-async def inline_search_callback(callback: CallbackQuery):
+async def inline_search_callback(callback: CallbackQuery, user: Optional[dict], feed: SwipeFeed,
+                                 recommendations: SharedEventsIndex):
     """Поиск через inline"""
-    user = await db.get_user(callback.from_user.id)
-    
     if not user or user['verification_status'] != 'approved':
         await callback.answer("❌ Доступно только верифицированным пользователям.", show_alert=True)
         return
     
-    # Проверяем участие в мероприятиях
-    events_count = await db.get_user_events_count(user['id'])
-    
-    if events_count == 0:
-        await callback.answer("❌ Для поиска людей нужно участие хотя бы в одном мероприятии!", show_alert=True)
-        return
-    
-    await callback.answer("🔍 Функция поиска будет добавлена в следующем обновлении!", show_alert=True)
+    from handlers.people import start_people_search
+    await start_people_search(callback.message, user, feed, recommendations)
+    await callback.answer()
 
 @router.callback_query(F.data == "menu_events")
-async def inline_events_callback(callback: CallbackQuery):
+async def inline_events_callback(callback: CallbackQuery, user: Optional[dict], event_catalog: EventCatalog):
     """События через inline"""
-    user = await db.get_user(callback.from_user.id)
-    
     if not user or user['verification_status'] != 'approved':
         await callback.answer("❌ Доступно только верифицированным пользователям.", show_alert=True)
         return
     
     from handlers.events import events_list_callback
-    await events_list_callback(callback)
+    await events_list_callback(callback, user, event_catalog)
 
 @router.callback_query(F.data == "menu_help")
-async def inline_help_callback(callback: CallbackQuery):
+async def inline_help_callback(callback: CallbackQuery, user: Optional[dict], is_user_admin: bool):
     """Помощь через inline"""
-    await help_menu(callback.message)
+    await help_menu(callback.message, user, is_user_admin)
 
 @router.callback_query(F.data == "menu_start")
-async def inline_start_callback(callback: CallbackQuery):
+async def inline_start_callback(callback: CallbackQuery, state: FSMContext, user: Optional[dict],
+                                is_user_admin: bool, admin_mode: bool):
     """Начать через inline"""
     from handlers.registration import start_command
-    await start_command(callback.message, None)
+    await start_command(callback.message, state, user, is_user_admin, admin_mode,
+                        telegram_id=callback.from_user.id)
 
 @router.callback_query(F.data == "menu_status")
-async def inline_status_callback(callback: CallbackQuery):
+async def inline_status_callback(callback: CallbackQuery, user: Optional[dict]):
     """Статус через inline"""
-    await status_menu(callback.message)
+    await status_menu(callback.message, user)
 
 @router.message(Command("menu"))
-async def show_menu_command(message: Message):
+async def show_menu_command(message: Message, user: Optional[dict], is_user_admin: bool, admin_mode: bool):
     """Показать меню"""
-    user = await db.get_user(message.from_user.id)
     # Используем новую логику состояний
     user_state = determine_user_state(user) if user else 'new'
-    is_user_admin = is_admin(message)
-    from handlers.admin_mode import is_in_admin_mode
-    admin_mode = is_in_admin_mode(message.from_user.id)
     
     await message.answer(
         "📋 **Главное меню**\n\n"
@@ -430,48 +395,8 @@ async def show_menu_command(message: Message):
         reply_markup=get_main_menu_keyboard(user_state, is_user_admin, admin_mode)
     )
 
-async def update_user_menu(message: Message, user_state: str, user_id: int = None):
-    """Обновить меню пользователя с правильным определением админа"""
-    from handlers.admin_mode import is_in_admin_mode
-    
-    # Если user_id не передан, используем из message
-    actual_user_id = user_id if user_id else message.from_user.id
-    
-    # Для проверки админа создаем правильный объект
-    class FakeMessage:
-        def __init__(self, from_user_data):
-            self.from_user = from_user_data
-    
-    # Получаем данные пользователя из Telegram для проверки админа
-    from aiogram import Bot
-    bot = Bot.get_current()
-    try:
-        user_info = await bot.get_chat(actual_user_id)
-        fake_message = FakeMessage(user_info)
-        is_user_admin = is_admin(fake_message)
-    except Exception:
-        # Если не удалось получить данные, используем исходную логику
-        is_user_admin = is_admin(message)
-    
-    admin_mode = is_in_admin_mode(actual_user_id)
-    
-    # Логируем для отладки
-    print(f"🔍 DEBUG update_user_menu:")
-    print(f"   user_id: {message.from_user.id}")
-    print(f"   username: {message.from_user.username}")
-    print(f"   user_state: {user_state}")
-    print(f"   is_admin: {is_user_admin}")
-    print(f"   admin_mode: {admin_mode}")
-    
-    # Дополнительная диагностика админского статуса
-    from config import ADMIN_IDS, ADMIN_USERNAMES
-    print(f"   ADMIN_IDS: {ADMIN_IDS}")
-    print(f"   ADMIN_USERNAMES: {ADMIN_USERNAMES}")
-    print(f"   user_id in ADMIN_IDS: {message.from_user.id in ADMIN_IDS}")
-    username_lower = message.from_user.username.lower() if message.from_user.username else None
-    print(f"   username_lower: {username_lower}")
-    print(f"   username in ADMIN_USERNAMES: {username_lower and username_lower in ADMIN_USERNAMES}")
-    
+async def update_user_menu(message: Message, user_state: str, is_user_admin: bool, admin_mode: bool):
+    """Обновить меню пользователя (флаги берутся из контекста апдейта)"""
     await message.answer(
         "📋 Меню обновлено!",
         reply_markup=get_main_menu_keyboard(user_state, is_user_admin, admin_mode)
@@ -0,0 +1,146 @@
+from aiogram import Bot, Router, F
+from aiogram.types import Message, CallbackQuery, InlineKeyboardButton, InlineKeyboardMarkup, InputMediaPhoto
+from typing import Any, Dict, Optional, List, Tuple
+import logging
+
+from database import Database
+from config import DATABASE_URL
+from feed import SwipeFeed
+from recommendations import SharedEventsIndex
+
+router = Router()
+db = Database.shared(DATABASE_URL)
+logger = logging.getLogger(__name__)
+
+# Подпись к фото - не больше 1024 символов
+MAX_DESCRIPTION_LENGTH = 400
+MAX_SHARED_EVENTS_SHOWN = 3
+
+# (текст, file_id фото, клавиатура)
+Card = Tuple[str, Optional[str], Optional[InlineKeyboardMarkup]]
+
+NO_EVENTS_TEXT = (
+    "❌ **Для поиска людей нужно участие в мероприятиях**\n\n"
+    "Сначала запишись хотя бы на одно мероприятие:\n"
+    "🎉 Используй кнопку **Мероприятия**\n\n"
+    "Это поможет находить людей с общими интересами! 🤝"
+)
+
+NO_CANDIDATES_TEXT = (
+    "😔 **Пока никого не нашлось**\n\n"
+    "Ты посмотрел все подходящие анкеты.\n"
+    "Запишись на другие мероприятия или загляни позже!"
+)
+
+def format_candidate_card(candidate: dict, shared_events: List[str]) -> str:
+    """Карточка кандидата с общими мероприятиями (или пометкой о похожей анкете)"""
+    description = candidate.get('description') or ''
+    if len(description) > MAX_DESCRIPTION_LENGTH:
+        description = description[:MAX_DESCRIPTION_LENGTH] + "..."
+    
+    if shared_events:
+        events_text = ", ".join(shared_events[:MAX_SHARED_EVENTS_SHOWN])
+        if len(shared_events) > MAX_SHARED_EVENTS_SHOWN:
+            events_text += f" и еще {len(shared_events) - MAX_SHARED_EVENTS_SHOWN}"
+        match_line = f"🤝 Общие мероприятия ({len(shared_events)}): {events_text}"
+    else:
+        # Кандидат из рейтинга по похожести анкеты
+        match_line = "✨ Общих мероприятий пока нет, но анкеты похожи"
+    
+    return (
+        f"👤 **{candidate['name']}**, {candidate['age']}\n"
+        f"📚 {candidate['course']} курс, {candidate['major']}\n\n"
+        f"📝 {description}\n\n"
+        f"{match_line}"
+    )
+
+def get_candidate_keyboard(candidate_id: int) -> InlineKeyboardMarkup:
+    """Кнопки ❤️ / 👎 под анкетой (id в callback - реакция относится к этой анкете)"""
+    return InlineKeyboardMarkup(inline_keyboard=[[
+        InlineKeyboardButton(text="👎 Дальше", callback_data=f"people_dislike_{candidate_id}"),
+        InlineKeyboardButton(text="❤️ Нравится", callback_data=f"people_like_{candidate_id}"),
+    ]])
+
+async def build_candidate_card(user: dict, candidate_id: int, recommendations: SharedEventsIndex) -> Optional[Card]:
+    """(текст, фото, клавиатура) карточки кандидата; None - анкета больше недоступна"""
+    candidate = await db.get_user_by_id(candidate_id)
+    if not candidate or not candidate['name']:
+        return None
+    
+    my_events = {event['id']: event['name'] for event in await db.get_user_events(user['id'])}
+    shared_ids = recommendations.shared_event_ids(candidate_id, list(my_events))
+    shared_events = [my_events[event_id] for event_id in shared_ids]
+    
+    text = format_candidate_card(candidate, shared_events)
+    return text, candidate['photo_file_id'], get_candidate_keyboard(candidate_id)
+
+async def next_candidate_card(user: dict, feed: SwipeFeed, recommendations: SharedEventsIndex) -> Card:
+    """Карточка из головы ленты; недоступные анкеты пропускаются как оцененные"""
+    while True:
+        candidate_id = await feed.current(user['id'])
+        if candidate_id is None:
+            return NO_CANDIDATES_TEXT, None, None
+        card = await build_candidate_card(user, candidate_id, recommendations)
+        if card is not None:
+            return card
+        await feed.react(user['id'], candidate_id, False)
+
+async def start_people_search(message: Message, user: dict, feed: SwipeFeed,
+                              recommendations: SharedEventsIndex):
+    """Текущая карточка ленты (из меню и inline-кнопки)"""
+    if await db.get_user_events_count(user['id']) == 0:
+        await message.answer(NO_EVENTS_TEXT)
+        return
+    
+    text, photo, keyboard = await next_candidate_card(user, feed, recommendations)
+    if photo:
+        await message.answer_photo(photo=photo, caption=text, reply_markup=keyboard)
+    else:
+        await message.answer(text, reply_markup=keyboard)
+
+@router.callback_query(F.data.startswith("people_"))
+async def people_reaction_callback(callback: CallbackQuery, user: Optional[dict], feed: SwipeFeed,
+                                   recommendations: SharedEventsIndex):
+    """❤️ / 👎 под анкетой: сохранить реакцию и показать следующую"""
+    if not user or user['verification_status'] != 'approved':
+        await callback.answer("❌ Доступно только верифицированным пользователям.", show_alert=True)
+        return
+    
+    _, action, candidate_id = callback.data.split("_")
+    matched = await feed.react(user['id'], int(candidate_id), action == "like")
+    text, photo, keyboard = await next_candidate_card(user, feed, recommendations)
+    
+    message = callback.message
+    if photo and message.photo:
+        await message.edit_media(InputMediaPhoto(media=photo, caption=text), reply_markup=keyboard)
+    elif not photo and not message.photo:
+        await message.edit_text(text, reply_markup=keyboard)
+    else:
+        # Текстовое сообщение нельзя превратить в фото (и наоборот) - отправляем заново
+        await message.delete()
+        if photo:
+            await message.answer_photo(photo=photo, caption=text, reply_markup=keyboard)
+        else:
+            await message.answer(text, reply_markup=keyboard)
+    
+    if matched:
+        await callback.answer("💞 Это взаимно! Подробности - в отдельном сообщении.", show_alert=True)
+    else:
+        await callback.answer()
+
+async def render_match(bot: Bot, chat_id: int, payload: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Уведомление о взаимной симпатии (каждому из пары)"""
+    other = await db.get_user_by_id(payload['user_id'])
+    if not other or not other['name']:
+        return None
+    return {
+        'text': "💞 **Взаимная симпатия!**\n\n"
+                f"Тебе и {other['name']} ({other['course']} курс, {other['major']}) "
+                "понравились анкеты друг друга.\n\n"
+                "🎉 Загляни на общие мероприятия - самое время познакомиться!",
+    }
+
+# Уведомления ленты анкет для OutboxDispatcher
+OUTBOX_RENDERERS = {
+    'people_match': render_match,
+}
@@ -1,15 +1,16 @@
 from aiogram import Router, F
 from aiogram.types import Message, CallbackQuery, InlineKeyboardButton, InlineKeyboardMarkup
 from aiogram.fsm.context import FSMContext
-from aiogram.filters import Command
+from aiogram.filters import Command, CommandObject
+from typing import Optional
 
 from handlers.states import RegistrationStates, VerificationStates
 from database import Database
 from config import PROFILE_LIMITS, DATABASE_URL
-from utils import is_admin
+from outbox import OutboxDispatcher
 
 router = Router()
-db = Database(DATABASE_URL)
+db = Database.shared(DATABASE_URL)
 
 def get_course_keyboard():
     """Клавиатура для выбора курса"""
@@ -47,19 +48,29 @@ def format_profile(user_data: dict) -> str:
 """
 
 @router.message(Command("start"))
-async def start_command(message: Message, state: FSMContext):
-    """Обработчик команды /start"""
+async def start_command(message: Message, state: FSMContext, user: Optional[dict],
+                        is_user_admin: bool, admin_mode: bool, command: Optional[CommandObject] = None,
+                        telegram_id: Optional[int] = None):
+    """Обработчик команды /start.
+    
+    telegram_id - кто нажал кнопку, если хендлер вызван из inline-кнопки:
+    там message - сообщение бота, и message.from_user - сам бот.
+    """
     from handlers.menu import get_main_menu_keyboard
-    from handlers.admin_mode import is_in_admin_mode
-    
-    user = await db.get_user(message.from_user.id)
-    is_user_admin = is_admin(message)
-    admin_mode = is_in_admin_mode(message.from_user.id)
     
     # Определяем состояние пользователя
     from handlers.menu import determine_user_state
     user_state = determine_user_state(user)
     
+    # Ссылка "🎉 Открыть в боте" из inline-результата: /start event_<id>
+    # (кнопки меню вызывают хендлер напрямую, без command)
+    if user_state == 'approved' and command and command.args and command.args.startswith("event_"):
+        event_id = command.args.split("_", 1)[1]
+        if event_id.isdigit():
+            from handlers.events import send_event_card
+            await send_event_card(message, user, int(event_id))
+            return
+    
     # Генерируем соответствующий ответ
     if user_state == 'approved':
         await message.answer(
@@ -122,7 +133,7 @@ async def start_command(message: Message, state: FSMContext):
     
     # Создаем пользователя, если его нет
     if not user:
-        await db.create_user(message.from_user.id)
+        await db.create_user(telegram_id or message.from_user.id)
 
 @router.callback_query(F.data.startswith("course_"))
 async def process_course(callback: CallbackQuery, state: FSMContext):
@@ -227,28 +238,30 @@ async def process_photo_invalid(message: Message, state: FSMContext):
     await message.answer("❌ Пожалуйста, отправь фотографию:")
 
 @router.callback_query(F.data == "save_profile")
-async def save_profile(callback: CallbackQuery, state: FSMContext):
+async def save_profile(callback: CallbackQuery, state: FSMContext, user: Optional[dict],
+                       is_user_admin: bool, admin_mode: bool):
     """Сохранение анкеты"""
     user_data = await state.get_data()
     
-    # Получаем текущий статус пользователя
-    user = await db.get_user(callback.from_user.id)
+    # Текущий статус пользователя из контекста апдейта
     current_status = user['verification_status'] if user else 'not_requested'
     
+    profile_fields = {
+        'name': user_data['name'],
+        'age': user_data['age'],
+        'course': user_data['course'],
+        'major': user_data['major'],
+        'description': user_data['description'],
+        'photo_file_id': user_data['photo_file_id'],
+    }
+    
     # Сохраняем данные в базу
-    await db.update_user(
-        telegram_id=callback.from_user.id,
-        name=user_data['name'],
-        age=user_data['age'],
-        course=user_data['course'],
-        major=user_data['major'],
-        description=user_data['description'],
-        photo_file_id=user_data['photo_file_id']
-    )
+    await db.update_user(telegram_id=callback.from_user.id, **profile_fields)
     
     # Проверяем состояние пользователя для принятия решения о верификации
+    # (обновленные данные известны без повторного запроса к базе)
     from handlers.menu import determine_user_state
-    user_updated = await db.get_user(callback.from_user.id)  # Получаем обновленные данные
+    user_updated = {**(user or {}), **profile_fields}
     new_state = determine_user_state(user_updated)
     
     if current_status == 'approved':
@@ -260,7 +273,7 @@ async def save_profile(callback: CallbackQuery, state: FSMContext):
         )
         # Меню НЕ обновляем - оно остается таким же (approved)
         await state.clear()
-
+    
     elif current_status == 'not_requested' and user and user.get('name') is None:
         # Это первое создание анкеты (new -> draft) - обновляем меню
         await callback.message.edit_caption(
@@ -271,12 +284,12 @@ async def save_profile(callback: CallbackQuery, state: FSMContext):
             "• Когда будешь готов - подай на верификацию\n\n"
             "Используй кнопки меню:"
         )
-
+        
         # Обновляем меню только при первом создании (new -> draft)
         from handlers.menu import update_user_menu
-        await update_user_menu(callback.message, new_state, callback.from_user.id)
+        await update_user_menu(callback.message, new_state, is_user_admin, admin_mode)
         await state.clear()
-
+    
     else:
         # Редактирование существующей анкеты - меню НЕ меняется
         await callback.message.edit_caption(
@@ -298,16 +311,13 @@ async def edit_profile_start(callback: CallbackQuery, state: FSMContext):
     await state.set_state(RegistrationStates.course)
 
 @router.message(VerificationStates.student_card_photo, F.photo)
-async def process_verification_photo(message: Message, state: FSMContext):
+async def process_verification_photo(message: Message, state: FSMContext, user: Optional[dict],
+                                     outbox: Optional[OutboxDispatcher] = None):
     """Обработка фото для верификации"""
     from handlers.admin import notify_admins_about_verification
-    from aiogram import Bot
     
     photo_file_id = message.photo[-1].file_id
     
-    # Получаем пользователя
-    user = await db.get_user(message.from_user.id)
-    
     # Проверяем, не был ли пользователь уже верифицирован
     if user['verification_status'] == 'approved':
         await message.answer(
@@ -327,15 +337,14 @@ async def process_verification_photo(message: Message, state: FSMContext):
         "Мы уведомим тебя, как только анкета будет проверена."
     )
     
-    # Уведомляем админов
-    bot = Bot.get_current()
+    # Уведомляем админов (через outbox, без ожидания Telegram)
     verification_data = {
         'name': user['name'],
         'course': user['course'],
         'major': user['major'],
         'id': request_id
     }
-    await notify_admins_about_verification(bot, verification_data)
+    await notify_admins_about_verification(verification_data, outbox)
     
     await state.clear()
 
@@ -345,10 +354,8 @@ async def process_verification_photo_invalid(message: Message, state: FSMContext
     await message.answer("❌ Пожалуйста, отправь фотографию со студенческим билетом:")
 
 @router.message(Command("profile"))
-async def view_profile(message: Message):
+async def view_profile(message: Message, user: Optional[dict]):
     """Просмотр анкеты"""
-    user = await db.get_user(message.from_user.id)
-    
     if not user or not user['name']:
         await message.answer("❌ У тебя пока нет анкеты. Используй /start для создания.")
         return
@@ -372,10 +379,8 @@ def get_rejected_user_menu():
     return InlineKeyboardMarkup(inline_keyboard=keyboard)
 
 @router.message(Command("edit"))
-async def edit_profile_command(message: Message, state: FSMContext = None):
+async def edit_profile_command(message: Message, state: FSMContext = None, user: Optional[dict] = None):
     """Команда редактирования анкеты"""
-    user = await db.get_user(message.from_user.id)
-    
     if not user:
         await message.answer("❌ У тебя пока нет анкеты. Используй /start для создания.")
         return
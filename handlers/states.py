@@ -20,3 +20,9 @@ class EventStates(StatesGroup):
     description = State()
     edit_name = State()
     edit_description = State()
+    search = State()
+
+class BroadcastStates(StatesGroup):
+    """Состояния для рассылки"""
+    text = State()
+    confirm = State()
@@ -0,0 +1,67 @@
+"""
+Inline-поиск мероприятий (@bot запрос): страницы результатов с кэшем по запросу
+"""
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+from cache import LRUCache
+from database import Database, MAX_SEARCH_TERMS
+
+# Слова запроса: "Хакатон!", "  хакатон" и "ХАКАТОН" - один ключ кэша
+TERM_RE = re.compile(r'\w+')
+
+def normalize_query(query: str) -> str:
+    return ' '.join(TERM_RE.findall(query.lower())[:MAX_SEARCH_TERMS])
+
+class InlineEventSearch:
+    """Страницы активных мероприятий для inline-запросов.
+    
+    Пока пользователь набирает "@bot хак...", Telegram присылает запрос на
+    каждый введенный префикс, и разные пользователи набирают одни и те же
+    префиксы. Страница результатов кэшируется по (нормализованный запрос,
+    offset); пустой запрос - свежие мероприятия по keyset-курсору, иначе
+    FTS5-поиск по номеру страницы.
+    
+    Кэш сбрасывается целиком, когда меняется Database.events_version
+    (create_event/update_event этого процесса). Изменения из других
+    процессов-воркеров видны не позже cache_ttl секунд.
+    """
+    
+    def __init__(self, db: Database, page_size: int = 20, cache_size: int = 1000, cache_ttl: float = 60.0):
+        self.db = db
+        # Telegram принимает не больше 50 результатов на ответ
+        self.page_size = min(page_size, 50)
+        self._cache = LRUCache(cache_size, cache_ttl)
+        self._version = db.events_version
+    
+    async def search(self, query: str, offset: str = '') -> Tuple[List[Dict[str, Any]], str]:
+        """Мероприятия для запроса и offset следующей страницы ('' - страниц больше нет)"""
+        if self._version != self.db.events_version:
+            self._version = self.db.events_version
+            self._cache.clear()
+        
+        key = (normalize_query(query), offset)
+        cached = self._cache.get(key)
+        if cached is not None:
+            return cached
+        
+        # Каталог поменялся во время запроса - результат в кэш не попадет
+        epoch = self._cache.epoch
+        version = self.db.events_version
+        result = await self._fetch(key[0], offset)
+        if version == self.db.events_version:
+            self._cache.set(key, result, epoch)
+        return result
+    
+    async def _fetch(self, query: str, offset: str) -> Tuple[List[Dict[str, Any]], str]:
+        position = int(offset) if offset.isdigit() else None
+        if not query:
+            events, _, has_next = await self.db.get_active_events_page(position, limit=self.page_size)
+            return events, str(events[-1]['id']) if has_next else ''
+        
+        page = position or 0
+        events, _, has_next = await self.db.search_events(query, page, limit=self.page_size)
+        return events, str(page + 1) if has_next else ''
+    
+    def stats(self) -> Dict[str, Any]:
+        return {**self._cache.stats(), 'version': self._version}
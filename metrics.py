@@ -0,0 +1,11 @@
+"""
+Статистика задержек: общая для middleware (stats()) и бенчмарков
+"""
+from typing import Iterable
+
+def percentile(samples: Iterable[float], q: float) -> float:
+    """Перцентиль q (0..1) выборки по ближайшему рангу; 0.0 для пустой выборки"""
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
@@ -0,0 +1 @@
+# middlewares package
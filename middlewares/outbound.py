@@ -0,0 +1,247 @@
+"""
+Очередь исходящих сообщений: лимиты Telegram на бота и на чат, повтор при 429, приоритеты
+"""
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional
+
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware, NextRequestMiddlewareType
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import Response, TelegramMethod
+
+from metrics import percentile
+
+logger = logging.getLogger(__name__)
+
+# Приоритеты: меньше - раньше
+PRIORITY_REPLY = 0
+PRIORITY_NOTIFICATION = 1
+PRIORITY_BULK = 2
+
+PRIORITY_NAMES = {PRIORITY_REPLY: 'reply', PRIORITY_NOTIFICATION: 'notification', PRIORITY_BULK: 'bulk'}
+
+# Методы, которые Telegram ограничивает по частоте (отправка и редактирование сообщений)
+LIMITED_PREFIXES = ('send', 'edit', 'copy', 'forward')
+
+# Ответы на апдейты - приоритет по умолчанию; уведомления и рассылки помечаются через outbound_priority
+_priority: ContextVar[int] = ContextVar('outbound_priority', default=PRIORITY_REPLY)
+
+@contextmanager
+def outbound_priority(priority: int):
+    """Отправлять сообщения внутри блока с указанным приоритетом"""
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+class TokenBucket:
+    """Ведро токенов: rate токенов в секунду, не больше burst подряд"""
+    
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+    
+    def _refill(self, now: float):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+    
+    def delay(self) -> float:
+        """Сколько секунд ждать до следующего токена"""
+        now = time.monotonic()
+        self._refill(now)
+        wait = max(0.0, self.paused_until - now)
+        if self.tokens < 1:
+            wait = max(wait, (1 - self.tokens) / self.rate)
+        return wait
+    
+    def take(self):
+        self.tokens -= 1
+    
+    def pause(self, seconds: float):
+        """Не выдавать токены seconds секунд (ответ 429 от Telegram)"""
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+        self.tokens = 0
+    
+    def idle(self) -> bool:
+        return self.delay() == 0 and self.tokens >= self.burst
+
+class _ChatLimit:
+    __slots__ = ('bucket', 'lock', 'pending')
+    
+    def __init__(self, bucket: TokenBucket):
+        self.bucket = bucket
+        self.lock = asyncio.Lock()
+        self.pending = 0
+
+class OutboundQueue(BaseRequestMiddleware):
+    """Middleware сессии бота: все отправки идут через общие лимиты.
+    
+    Запрос сначала ждет токен своего чата (сообщения в один чат уходят по
+    порядку), затем - общий токен бота. Общие токены выдаются по приоритету:
+    ответы пользователям раньше уведомлений, уведомления раньше рассылок.
+    TelegramRetryAfter приостанавливает ведро чата на retry_after секунд,
+    после чего запрос повторяется (до max_retries раз).
+    """
+    
+    def __init__(self, global_rate: float = 30.0, chat_rate: float = 1.0, chat_burst: int = 3,
+                 group_rate: float = 20 / 60, max_retries: int = 3, max_chats: int = 10000,
+                 wait_samples: int = 1000):
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self.group_rate = group_rate
+        self.max_retries = max_retries
+        self.max_chats = max_chats
+        self._global = TokenBucket(global_rate, max(1.0, global_rate))
+        self._chats: Dict[int, _ChatLimit] = {}
+        # (приоритет, порядковый номер, future) - ожидающие общего токена
+        self._heap: List[tuple] = []
+        self._seq = itertools.count()
+        self._wakeup = asyncio.Event()
+        self._dispatcher: Optional[asyncio.Task] = None
+        self._wait_times: deque = deque(maxlen=wait_samples)
+        self.queued = {priority: 0 for priority in PRIORITY_NAMES}
+        self.sent = 0
+        self.failed = 0
+        self.retried = 0
+    
+    def _chat(self, chat_id: int) -> _ChatLimit:
+        limit = self._chats.get(chat_id)
+        if limit is None:
+            if len(self._chats) >= self.max_chats:
+                self._prune()
+            # Отрицательный id - группа или канал, у них лимит в минуту
+            rate = self.chat_rate if chat_id > 0 else self.group_rate
+            limit = self._chats[chat_id] = _ChatLimit(TokenBucket(rate, self.chat_burst))
+        return limit
+    
+    def _prune(self):
+        """Забыть чаты без ожидающих запросов и с полным ведром"""
+        for chat_id in [chat_id for chat_id, limit in self._chats.items()
+                        if not limit.pending and limit.bucket.idle()]:
+            del self._chats[chat_id]
+    
+    async def _acquire_global(self, priority: int):
+        if not self._heap and self._global.delay() == 0:
+            self._global.take()
+            return
+        
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._heap, (priority, next(self._seq), future))
+        self._wakeup.set()
+        if self._dispatcher is None or self._dispatcher.done():
+            self._dispatcher = asyncio.create_task(self._dispatch())
+        await future
+    
+    async def _dispatch(self):
+        """Выдает общие токены ожидающим в порядке приоритета"""
+        while True:
+            while not self._heap:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+            
+            delay = self._global.delay()
+            if delay > 0:
+                await asyncio.sleep(delay)
+                continue
+            
+            _, _, future = heapq.heappop(self._heap)
+            # Ожидавший запрос могли отменить
+            if future.done():
+                continue
+            self._global.take()
+            future.set_result(None)
+    
+    async def _acquire(self, chat_id: Optional[int], priority: int):
+        if chat_id is None:
+            # Например, редактирование inline-сообщения - только общий лимит
+            await self._acquire_global(priority)
+            return
+        
+        limit = self._chat(chat_id)
+        limit.pending += 1
+        try:
+            async with limit.lock:
+                delay = limit.bucket.delay()
+                while delay > 0:
+                    await asyncio.sleep(delay)
+                    delay = limit.bucket.delay()
+                limit.bucket.take()
+            await self._acquire_global(priority)
+        finally:
+            limit.pending -= 1
+    
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType,
+        bot: Any,
+        method: TelegramMethod
+    ) -> Response:
+        if not method.__api_method__.startswith(LIMITED_PREFIXES):
+            return await make_request(bot, method)
+        
+        priority = _priority.get()
+        chat_id = getattr(method, 'chat_id', None)
+        # chat_id может быть @username канала - такие чаты ограничиваем только общим лимитом
+        if not isinstance(chat_id, int):
+            chat_id = None
+        
+        enqueued_at = time.monotonic()
+        self.queued[priority] += 1
+        try:
+            for attempt in range(self.max_retries + 1):
+                await self._acquire(chat_id, priority)
+                if attempt == 0:
+                    self._wait_times.append(time.monotonic() - enqueued_at)
+                try:
+                    response = await make_request(bot, method)
+                except TelegramRetryAfter as e:
+                    self.retried += 1
+                    if attempt == self.max_retries:
+                        self.failed += 1
+                        raise
+                    logger.warning(f"Flood control для чата {chat_id}: повтор через {e.retry_after} с")
+                    bucket = self._chat(chat_id).bucket if chat_id is not None else self._global
+                    bucket.pause(e.retry_after)
+                    continue
+                except Exception:
+                    self.failed += 1
+                    raise
+                self.sent += 1
+                return response
+        finally:
+            self.queued[priority] -= 1
+    
+    def stats(self) -> Dict[str, Any]:
+        """Доставка и ожидание в очереди (по последним сообщениям)"""
+        return {
+            'sent': self.sent,
+            'failed': self.failed,
+            'retried': self.retried,
+            'queued': {PRIORITY_NAMES[priority]: count for priority, count in self.queued.items()},
+            'chats_tracked': len(self._chats),
+            'wait_p50_ms': percentile(self._wait_times, 0.5) * 1000,
+            'wait_p99_ms': percentile(self._wait_times, 0.99) * 1000,
+        }
+    
+    async def close(self):
+        """Остановить выдачу токенов; ожидающие запросы отменяются"""
+        if self._dispatcher is not None:
+            self._dispatcher.cancel()
+            try:
+                await self._dispatcher
+            except asyncio.CancelledError:
+                pass
+            self._dispatcher = None
+        while self._heap:
+            _, _, future = heapq.heappop(self._heap)
+            future.cancel()
@@ -0,0 +1,94 @@
+"""
+Планировщик апдейтов: один пользователь - строго по порядку, разные пользователи - параллельно
+"""
+import asyncio
+import time
+from collections import deque
+from contextlib import nullcontext
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject
+
+from metrics import percentile
+
+class UpdateScheduler(BaseMiddleware):
+    """Внешний middleware апдейтов, регистрируется первым.
+    
+    Апдейты одного пользователя (или чата, если пользователя нет) ждут
+    своей очереди на asyncio.Lock - ожидающие получают его в порядке
+    прихода. Поверх этого общий семафор ограничивает число одновременно
+    обрабатываемых апдейтов max_concurrency. Очередь пользователя живет,
+    пока в ней есть апдейты, поэтому память не растет с числом пользователей.
+    """
+    
+    def __init__(self, max_concurrency: int = 64, wait_samples: int = 1000):
+        self.max_concurrency = max_concurrency
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        # ключ -> [lock, апдейтов в очереди пользователя, включая выполняемый]
+        self._queues: Dict[int, list] = {}
+        self._wait_times: deque = deque(maxlen=wait_samples)
+        self.waiting = 0
+        self.running = 0
+        self.processed = 0
+        self.max_user_depth = 0
+    
+    @staticmethod
+    def _key(data: Dict[str, Any]) -> Optional[int]:
+        user = data.get('event_from_user')
+        if user is not None:
+            return user.id
+        chat = data.get('event_chat')
+        return chat.id if chat is not None else None
+    
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any]
+    ) -> Any:
+        key = self._key(data)
+        queue = None
+        if key is not None:
+            queue = self._queues.get(key)
+            if queue is None:
+                queue = self._queues[key] = [asyncio.Lock(), 0]
+            queue[1] += 1
+            self.max_user_depth = max(self.max_user_depth, queue[1])
+        
+        enqueued_at = time.monotonic()
+        self.waiting += 1
+        started = False
+        try:
+            async with queue[0] if queue else nullcontext():
+                async with self._semaphore:
+                    self.waiting -= 1
+                    started = True
+                    self._wait_times.append(time.monotonic() - enqueued_at)
+                    self.running += 1
+                    try:
+                        return await handler(event, data)
+                    finally:
+                        self.running -= 1
+                        self.processed += 1
+        finally:
+            if not started:
+                self.waiting -= 1
+            if queue is not None:
+                queue[1] -= 1
+                if queue[1] == 0:
+                    del self._queues[key]
+    
+    def stats(self) -> Dict[str, Any]:
+        """Глубина очередей и время ожидания (по последним апдейтам)"""
+        return {
+            'waiting': self.waiting,
+            'running': self.running,
+            'processed': self.processed,
+            'users_queued': len(self._queues),
+            'deepest_user_queue': max((queue[1] for queue in self._queues.values()), default=0),
+            'max_user_depth': self.max_user_depth,
+            'max_concurrency': self.max_concurrency,
+            'wait_p50_ms': percentile(self._wait_times, 0.5) * 1000,
+            'wait_p99_ms': percentile(self._wait_times, 0.99) * 1000,
+        }
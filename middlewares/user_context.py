@@ -0,0 +1,63 @@
+"""
+Контекст пользователя на один апдейт: строка из БД, флаг админа и админский режим
+"""
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject
+
+from admin_sessions import AdminSessionStore, MemoryAdminSessionStore
+from config import ADMIN_USERNAMES
+from database import Database
+from utils import is_admin_user
+
+class UserContextMiddleware(BaseMiddleware):
+    """Внешний middleware: загружает контекст один раз и передает его в хендлеры.
+    
+    Хендлеры получают аргументы:
+    - user - строка пользователя из таблицы users (или None)
+    - is_user_admin - является ли пользователь администратором
+    - admin_mode - включен ли у пользователя админский режим
+    - admin_sessions - хранилище админского режима (для входа/выхода)
+    """
+    
+    def __init__(self, db: Database, admin_sessions: Optional[AdminSessionStore] = None):
+        self.db = db
+        self.admin_sessions = admin_sessions or MemoryAdminSessionStore()
+        # username -> telegram_id, уже сохраненные в admin_usernames этим процессом
+        self._known_admin_usernames: Dict[str, int] = {}
+    
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any]
+    ) -> Any:
+        telegram_user = data.get('event_from_user')
+        
+        data['admin_sessions'] = self.admin_sessions
+        
+        if telegram_user is None:
+            data['user'] = None
+            data['is_user_admin'] = False
+            data['admin_mode'] = False
+        else:
+            # Пользователя могли изменить в другом процессе-воркере (например, одобрить анкету)
+            await self.db.sync_user_cache()
+            data['user'] = await self.db.get_user(telegram_user.id)
+            data['is_user_admin'] = is_admin_user(telegram_user)
+            if data['is_user_admin'] and telegram_user.username:
+                await self._remember_admin_username(telegram_user.username.lower(), telegram_user.id)
+            # Хранилище опрашивается только для админов
+            data['admin_mode'] = (
+                data['is_user_admin'] and await self.admin_sessions.is_active(telegram_user.id)
+            )
+        
+        return await handler(event, data)
+    
+    async def _remember_admin_username(self, username: str, telegram_id: int):
+        """Запомнить ID админа из ADMIN_USERNAMES, чтобы слать ему уведомления"""
+        if username not in ADMIN_USERNAMES or self._known_admin_usernames.get(username) == telegram_id:
+            return
+        await self.db.remember_admin_username(username, telegram_id)
+        self._known_admin_usernames[username] = telegram_id
@@ -8,6 +8,7 @@ import asyncio
 import aiosqlite
 import os
 from config import DATABASE_URL
+from database import INDEXES, FTS_TABLES, fts_schema
 
 async def migrate_database():
     """Применить миграции к базе данных"""
@@ -23,7 +24,7 @@ async def migrate_database():
             if 'admin_id' not in column_names:
                 print("➕ Добавляю поле admin_id в verification_requests...")
                 await db.execute("ALTER TABLE verification_requests ADD COLUMN admin_id INTEGER")
-                
+            
             if 'processed_at' not in column_names:
                 print("➕ Добавляю поле processed_at в verification_requests...")
                 await db.execute("ALTER TABLE verification_requests ADD COLUMN processed_at TIMESTAMP")
@@ -77,13 +78,212 @@ async def migrate_database():
                     )
                 ''')
             
+            # Денормализованный счетчик участников мероприятий
+            cursor = await db.execute("PRAGMA table_info(events)")
+            event_columns = [column[1] for column in await cursor.fetchall()]
+            
+            if 'participant_count' not in event_columns:
+                print("➕ Добавляю поле participant_count в events...")
+                await db.execute(
+                    "ALTER TABLE events ADD COLUMN participant_count INTEGER NOT NULL DEFAULT 0"
+                )
+                print("🔢 Заполняю счетчики участников...")
+                await db.execute('''
+                    UPDATE events SET participant_count = (
+                        SELECT COUNT(*) FROM user_events ue WHERE ue.event_id = events.id
+                    )
+                ''')
+            
+            # Состояния FSM (SQLite-хранилище вместо MemoryStorage)
+            cursor = await db.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='fsm_states'")
+            if not await cursor.fetchone():
+                print("➕ Создаю таблицу fsm_states...")
+                await db.execute('''
+                    CREATE TABLE fsm_states (
+                        storage_key TEXT PRIMARY KEY,
+                        state TEXT,
+                        data BLOB,
+                        updated_at REAL NOT NULL
+                    )
+                ''')
+            
+            # Админский режим (вместо словаря в памяти процесса)
+            cursor = await db.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='admin_sessions'")
+            if not await cursor.fetchone():
+                print("➕ Создаю таблицу admin_sessions...")
+                await db.execute('''
+                    CREATE TABLE admin_sessions (
+                        telegram_id INTEGER PRIMARY KEY,
+                        expires_at REAL NOT NULL
+                    )
+                ''')
+            
+            # username -> telegram_id админов из ADMIN_USERNAMES
+            cursor = await db.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='admin_usernames'")
+            if not await cursor.fetchone():
+                print("➕ Создаю таблицу admin_usernames...")
+                await db.execute('''
+                    CREATE TABLE admin_usernames (
+                        username TEXT PRIMARY KEY,
+                        telegram_id INTEGER NOT NULL,
+                        updated_at REAL NOT NULL
+                    )
+                ''')
+            
+            # Рассылки с сохраняемым прогрессом
+            cursor = await db.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='broadcasts'")
+            if not await cursor.fetchone():
+                print("➕ Создаю таблицу broadcasts...")
+                await db.execute('''
+                    CREATE TABLE broadcasts (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        audience TEXT NOT NULL,
+                        event_id INTEGER,
+                        text TEXT NOT NULL,
+                        status TEXT DEFAULT 'running',
+                        cursor INTEGER DEFAULT 0,
+                        total INTEGER DEFAULT 0,
+                        sent INTEGER DEFAULT 0,
+                        failed INTEGER DEFAULT 0,
+                        created_by INTEGER NOT NULL,
+                        progress_chat_id INTEGER,
+                        progress_message_id INTEGER,
+                        lease_until REAL DEFAULT 0,
+                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                        finished_at TIMESTAMP,
+                        FOREIGN KEY (event_id) REFERENCES events (id)
+                    )
+                ''')
+            
+            # Журнал изменений участия для индекса общих мероприятий
+            cursor = await db.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='membership_changes'")
+            if not await cursor.fetchone():
+                print("➕ Создаю таблицу membership_changes...")
+                await db.execute('''
+                    CREATE TABLE membership_changes (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        user_id INTEGER,
+                        event_id INTEGER
+                    )
+                ''')
+            
+            # Журнал изменений пользователей для кэшей процессов-воркеров
+            cursor = await db.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='user_changes'")
+            if not await cursor.fetchone():
+                print("➕ Создаю таблицу user_changes...")
+                await db.execute('''
+                    CREATE TABLE user_changes (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        user_id INTEGER NOT NULL,
+                        telegram_id INTEGER NOT NULL
+                    )
+                ''')
+            
+            # Реакции и взаимные симпатии ленты анкет
+            cursor = await db.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='reactions'")
+            if not await cursor.fetchone():
+                print("➕ Создаю таблицы reactions и matches...")
+                await db.execute('''
+                    CREATE TABLE reactions (
+                        user_id INTEGER NOT NULL,
+                        target_id INTEGER NOT NULL,
+                        is_like BOOLEAN NOT NULL,
+                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                        PRIMARY KEY (user_id, target_id),
+                        FOREIGN KEY (user_id) REFERENCES users (id),
+                        FOREIGN KEY (target_id) REFERENCES users (id)
+                    )
+                ''')
+                await db.execute('''
+                    CREATE TABLE IF NOT EXISTS matches (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        user_a INTEGER NOT NULL,
+                        user_b INTEGER NOT NULL,
+                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                        UNIQUE (user_a, user_b),
+                        FOREIGN KEY (user_a) REFERENCES users (id),
+                        FOREIGN KEY (user_b) REFERENCES users (id)
+                    )
+                ''')
+            
+            # Outbox уведомлений (доставка в фоне с повторами)
+            cursor = await db.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='notification_outbox'")
+            if not await cursor.fetchone():
+                print("➕ Создаю таблицу notification_outbox...")
+                await db.execute('''
+                    CREATE TABLE notification_outbox (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        idempotency_key TEXT UNIQUE NOT NULL,
+                        chat_id INTEGER NOT NULL,
+                        kind TEXT NOT NULL,
+                        payload TEXT,
+                        status TEXT DEFAULT 'pending',
+                        attempts INTEGER DEFAULT 0,
+                        next_attempt_at REAL NOT NULL,
+                        last_error TEXT,
+                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                    )
+                ''')
+            
+            # Вторичные индексы для частых запросов
+            print("➕ Создаю недостающие индексы...")
+            for index_sql in INDEXES:
+                await db.execute(index_sql)
+            
+            # Полнотекстовый поиск по анкетам и мероприятиям
+            for fts_table in FTS_TABLES:
+                cursor = await db.execute("SELECT name FROM sqlite_master WHERE type='table' AND name=?", (fts_table,))
+                exists = await cursor.fetchone()
+                for statement in fts_schema(fts_table):
+                    await db.execute(statement)
+                if not exists:
+                    print(f"➕ Создаю {fts_table} и заполняю поисковый индекс...")
+                    await db.execute(f"INSERT INTO {fts_table} ({fts_table}) VALUES ('rebuild')")
+            
             await db.commit()
             print("✅ Миграция завершена успешно!")
-            
+        
         except Exception as e:
             print(f"❌ Ошибка миграции: {e}")
             await db.rollback()
 
+async def check_participant_counts(fix: bool = False) -> int:
+    """Сверить events.participant_count с фактическим числом записей в user_events.
+    
+    Проверка делает полный проход по таблице мероприятий, поэтому
+    запускается офлайн из этой утилиты, а не из бота.
+    Возвращает количество расхождений.
+    """
+    print("🔍 Проверяю счетчики участников...")
+    
+    async with aiosqlite.connect(DATABASE_URL) as db:
+        cursor = await db.execute('''
+            SELECT id, name, participant_count, actual_count FROM (
+                SELECT e.id, e.name, e.participant_count,
+                       (SELECT COUNT(*) FROM user_events ue WHERE ue.event_id = e.id) AS actual_count
+                FROM events e
+            )
+            WHERE participant_count != actual_count
+        ''')
+        mismatches = await cursor.fetchall()
+        
+        for event_id, name, stored, actual in mismatches:
+            print(f"⚠️ Мероприятие #{event_id} «{name}»: в счетчике {stored}, фактически {actual}")
+        
+        if not mismatches:
+            print("✅ Все счетчики участников совпадают")
+            return 0
+        
+        if fix:
+            await db.executemany(
+                'UPDATE events SET participant_count = ? WHERE id = ?',
+                [(actual, event_id) for event_id, _, _, actual in mismatches]
+            )
+            await db.commit()
+            print(f"🔧 Исправлено счетчиков: {len(mismatches)}")
+        
+        return len(mismatches)
+
 async def reset_database():
     """Полностью пересоздать базу данных"""
     print("🔄 Пересоздание базы данных...")
@@ -96,6 +296,7 @@ async def reset_database():
     from database import Database
     db = Database(DATABASE_URL)
     await db.init_db()
+    await db.close()
     
     print("✅ Новая база данных создана!")
 
@@ -107,9 +308,10 @@ async def main():
         print("\nВыберите действие:")
         print("1. Мигрировать существующую базу данных")
         print("2. Полностью пересоздать базу данных (⚠️ потеря данных)")
-        print("3. Выйти")
+        print("3. Проверить счетчики участников мероприятий")
+        print("4. Выйти")
         
-        choice = input("\nВвод (1-3): ").strip()
+        choice = input("\nВвод (1-4): ").strip()
         
         if choice == "1":
             await migrate_database()
@@ -122,6 +324,13 @@ async def main():
             else:
                 print("❌ Операция отменена")
         elif choice == "3":
+            mismatches = await check_participant_counts()
+            if mismatches:
+                confirm = input("Исправить расхождения? (yes/no): ").strip().lower()
+                if confirm == "yes":
+                    await check_participant_counts(fix=True)
+            break
+        elif choice == "4":
             print("👋 До свидания!")
             break
         else:
@@ -0,0 +1,141 @@
+"""
+Доставка уведомлений из outbox: фоновая отправка пачками с повторами
+"""
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramBadRequest, TelegramForbiddenError
+
+from database import Database
+from middlewares.outbound import PRIORITY_NOTIFICATION, outbound_priority
+
+logger = logging.getLogger(__name__)
+
+# kind -> функция (bot, chat_id, payload), возвращающая аргументы send_message кроме chat_id
+# (None - уведомление больше не актуально, отправлять нечего)
+Renderer = Callable[[Bot, int, Dict[str, Any]], Awaitable[Optional[Dict[str, Any]]]]
+
+# Повтор не поможет: пользователь заблокировал бота или чата не существует
+PERMANENT_ERRORS = (TelegramForbiddenError, TelegramBadRequest)
+
+class OutboxDispatcher:
+    """Отправляет уведомления из таблицы notification_outbox.
+    
+    Запись в outbox делается в той же транзакции, что и изменение, о котором
+    уведомляем, поэтому хендлер отвечает сразу после коммита, а уведомление
+    не теряется при сбое Telegram или падении процесса. Диспетчер забирает
+    пачки (с арендой на lease секунд - несколько процессов не возьмут одну
+    запись), отправляет их через очередь исходящих сообщений и повторяет
+    неудачные с экспоненциальной задержкой до max_attempts попыток.
+    Доставка - "хотя бы один раз": если процесс упадет между отправкой и
+    отметкой, сообщение уйдет повторно после истечения аренды.
+    """
+    
+    def __init__(self, db: Database, renderers: Dict[str, Renderer], interval: float = 1.0,
+                 batch_size: int = 50, max_attempts: int = 8, lease: float = 60.0,
+                 retry_delay: float = 5.0, retention: float = 7 * 24 * 3600):
+        self.db = db
+        self.renderers = renderers
+        self.interval = interval
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.lease = lease
+        self.retry_delay = retry_delay
+        self.retention = retention
+        self.bot: Optional[Bot] = None
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup = asyncio.Event()
+        self._stopping = False
+        self._cleanup_interval = min(retention, 3600)
+        self._last_cleanup = 0.0
+        self.sent = 0
+        self.retried = 0
+        self.failed = 0
+    
+    async def start(self, bot: Bot):
+        """Запуск вместе с диспетчером aiogram (startup)"""
+        self.bot = bot
+        self._stopping = False
+        self._task = asyncio.create_task(self._run())
+    
+    def wake(self):
+        """Отправить новые уведомления, не дожидаясь очередного интервала"""
+        self._wakeup.set()
+    
+    async def stop(self):
+        """Дождаться текущей пачки и остановиться (shutdown)"""
+        if self._task is None:
+            return
+        self._stopping = True
+        self._wakeup.set()
+        await self._task
+        self._task = None
+    
+    async def _run(self):
+        while not self._stopping:
+            try:
+                claimed = await self.deliver_batch()
+                if time.monotonic() - self._last_cleanup >= self._cleanup_interval:
+                    self._last_cleanup = time.monotonic()
+                    await self.db.delete_sent_outbox(time.time() - self.retention)
+            except Exception as e:
+                logger.error(f"Ошибка доставки уведомлений: {e}")
+                claimed = 0
+            
+            # Полная пачка - в очереди, скорее всего, есть еще
+            if claimed >= self.batch_size:
+                continue
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+    
+    async def deliver_batch(self) -> int:
+        """Забрать и отправить одну пачку; возвращает размер пачки"""
+        rows = await self.db.claim_outbox_batch(time.time(), self.batch_size, self.lease)
+        if not rows:
+            return 0
+        
+        # Темп отправки задает OutboundQueue, здесь пачка уходит параллельно
+        results = await asyncio.gather(*(self._deliver(row) for row in rows))
+        sent_ids = [row['id'] for row, delivered in zip(rows, results) if delivered]
+        if sent_ids:
+            await self.db.mark_outbox_sent(sent_ids, time.time())
+        return len(rows)
+    
+    async def _deliver(self, row: Dict[str, Any]) -> bool:
+        renderer = self.renderers.get(row['kind'])
+        try:
+            if renderer is None:
+                raise LookupError(f"неизвестный тип уведомления {row['kind']}")
+            message = await renderer(self.bot, row['chat_id'], row['payload'])
+            if message is None:
+                return True
+            with outbound_priority(PRIORITY_NOTIFICATION):
+                await self.bot.send_message(row['chat_id'], **message)
+        except (LookupError, *PERMANENT_ERRORS) as e:
+            self.failed += 1
+            logger.error(f"Уведомление {row['idempotency_key']} не доставлено: {e!r}")
+            await self.db.record_outbox_failure(row['id'], repr(e), None)
+            return False
+        except Exception as e:
+            if row['attempts'] >= self.max_attempts:
+                self.failed += 1
+                logger.error(f"Уведомление {row['idempotency_key']} не доставлено "
+                             f"за {row['attempts']} попыток: {e!r}")
+                await self.db.record_outbox_failure(row['id'], repr(e), None)
+            else:
+                self.retried += 1
+                delay = min(self.retry_delay * 2 ** (row['attempts'] - 1), 3600)
+                await self.db.record_outbox_failure(row['id'], repr(e), time.time() + delay)
+            return False
+        
+        self.sent += 1
+        return True
+    
+    def stats(self) -> Dict[str, Any]:
+        return {'sent': self.sent, 'retried': self.retried, 'failed': self.failed}
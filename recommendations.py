@@ -0,0 +1,461 @@
+"""
+Подбор людей по общим мероприятиям: индекс участников и ранжирование кандидатов
+"""
+import asyncio
+import heapq
+import itertools
+import logging
+from array import array
+from bisect import bisect_left
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+
+from cache import LRUCache
+from database import Database
+from similarity import ProfileMatrix
+
+logger = logging.getLogger(__name__)
+
+# Записей журнала membership_changes за один запрос
+CHANGES_BATCH = 1000
+
+# Мероприятия от стольких участников считаются через пересечение множеств, а не перебором
+LARGE_EVENT_SIZE = 5000
+
+# (число общих, id) упаковываются в одно целое: отбор лучших идет без key-функции
+ID_MASK = (1 << 32) - 1
+
+# Анкет за один запрос при загрузке матрицы профилей
+PROFILES_BATCH = 5000
+
+# Вклад похожести анкеты (от 0 до 1) в оценку: меньше одного общего мероприятия
+SIMILARITY_SHARE = 0.5
+
+# (users.id кандидата, число общих активных мероприятий)
+Candidate = Tuple[int, int]
+
+class SeenBitmap:
+    """Множество users.id битовой картой: бит на пользователя, проверка за O(1)"""
+    
+    def __init__(self, user_ids: Iterable[int] = ()):
+        self._bits = bytearray()
+        self._count = 0
+        for user_id in user_ids:
+            self.add(user_id)
+    
+    def __len__(self) -> int:
+        return self._count
+    
+    def __contains__(self, user_id: int) -> bool:
+        byte = user_id >> 3
+        return byte < len(self._bits) and bool(self._bits[byte] >> (user_id & 7) & 1)
+    
+    def add(self, user_id: int):
+        byte = user_id >> 3
+        if byte >= len(self._bits):
+            # Удвоение, чтобы рост по одному id не копировал карту каждый раз
+            self._bits.extend(bytes(max(byte + 1 - len(self._bits), len(self._bits))))
+        bit = 1 << (user_id & 7)
+        if not self._bits[byte] & bit:
+            self._bits[byte] |= bit
+            self._count += 1
+    
+    def mask(self, user_ids: np.ndarray) -> np.ndarray:
+        """Векторная проверка: True для id из множества (отрицательные - свободные строки)"""
+        bits = np.frombuffer(self._bits, np.uint8)
+        result = np.zeros(len(user_ids), bool)
+        inside = (user_ids >= 0) & (user_ids >> 3 < len(bits))
+        ids = user_ids[inside]
+        result[inside] = (bits[ids >> 3] >> (ids & 7)) & 1
+        return result
+    
+    @property
+    def nbytes(self) -> int:
+        return len(self._bits)
+
+class PendingLoad:
+    """Список участников мероприятия, который сейчас читается из базы"""
+    
+    __slots__ = ('patches', 'stale', 'done')
+    
+    def __init__(self):
+        # Изменения (user_id, участвует), примененные из журнала во время чтения
+        self.patches: List[Tuple[int, bool]] = []
+        # Активность мероприятия изменилась - прочитанный список устарел
+        self.stale = False
+        self.done = asyncio.Event()
+
+class SharedEventsIndex:
+    """Кандидаты для "🔍 Поиск людей": верифицированные пользователи по числу общих активных мероприятий.
+    
+    Матрица пар "пользователь - пользователь" не подходит: мероприятие на
+    N участников дает N² пар. Индекс хранит обратные списки - для каждого
+    активного мероприятия отсортированный массив id верифицированных
+    участников (4 байта на запись, загружается при первом обращении).
+    Рейтинг пользователя считается подсчетом по спискам его мероприятий
+    (без запросов к базе) и кэшируется до cache_ttl секунд: у каждого
+    загруженного списка есть версия, которая растет при любом его изменении,
+    и рейтинг берется из кэша, только если версии списков его мероприятий
+    не изменились (кто-то записался, отписался, потерял верификацию).
+    
+    Списки обновляются инкрементально по журналу membership_changes: он
+    пишется в одной транзакции с записью на мероприятие, отпиской, сменой
+    активности мероприятия, одобрением верификации и изменением анкеты,
+    поэтому до индекса доходят и изменения, сделанные другими воркерами.
+    
+    Общей блокировки на запрос нет: запросы к базе разных поисков идут
+    параллельно, а списки и рейтинги меняются только синхронным кодом между
+    await. Журнал читается в фоне (одно чтение за раз) - поиск его не ждет
+    и считает по уже примененным изменениям; изменения, примененные, пока
+    список мероприятия загружается, накладываются на загруженный список.
+    
+    С матрицей профилей (profiles) рейтинг считается векторно по всем
+    верифицированным анкетам: число общих мероприятий остается главным,
+    похожесть анкеты упорядочивает кандидатов внутри него и добирает
+    рейтинг людьми без общих мероприятий. Пока матрица загружается
+    (start), работает подсчет только по общим мероприятиям.
+    """
+    
+    def __init__(self, db: Database, max_candidates: int = 100, cache_size: int = 1000,
+                 cache_ttl: float = 600.0, profiles: Optional[ProfileMatrix] = None):
+        self.db = db
+        self.max_candidates = max_candidates
+        self.profiles = profiles
+        self.profiles_ready = False
+        self._profiles_task: Optional[asyncio.Task] = None
+        self._sync_task: Optional[asyncio.Task] = None
+        # event_id -> отсортированные id верифицированных участников
+        self._members: Dict[int, array] = {}
+        # Те же участники множеством - только для крупных мероприятий
+        self._member_sets: Dict[int, Set[int]] = {}
+        # event_id -> версия списка участников (новая при загрузке и каждом изменении)
+        self._event_versions: Dict[int, int] = {}
+        self._versions = itertools.count(1)
+        # user_id -> (мероприятия пользователя, версии их списков, рейтинг)
+        self._rankings = LRUCache(cache_size, cache_ttl)
+        self._last_change: Optional[int] = None
+        self._sync_lock = asyncio.Lock()
+        # Списки, которые сейчас загружаются
+        self._loading: Dict[int, PendingLoad] = {}
+        # Растет при каждом изменении анкет в матрице (загрузка страницы сверяется с ним)
+        self._profiles_version = 0
+        self.loads = 0
+        self.changes_applied = 0
+        self.resets = 0
+        # Рейтинги, посчитанные заново: оцененные анкеты вытеснили весь кэшированный
+        self.reranks = 0
+    
+    async def start(self):
+        """Загрузка матрицы профилей в фоне (startup)"""
+        if self.profiles is not None:
+            self._profiles_task = asyncio.create_task(self._load_profiles())
+    
+    async def stop(self):
+        """Прервать загрузку профилей и чтение журнала (shutdown)"""
+        for task in (self._profiles_task, self._sync_task):
+            if task is not None:
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        self._profiles_task = self._sync_task = None
+    
+    async def sync(self):
+        """Дождаться применения всех записей журнала, сделанных до вызова"""
+        await self._sync()
+    
+    async def get_candidates(self, user_id: int, exclude: Optional[SeenBitmap] = None,
+                             limit: Optional[int] = None) -> List[Candidate]:
+        """Рейтинг кандидатов: по убыванию числа общих мероприятий, при равенстве - по похожести анкеты или по id.
+        
+        exclude - анкеты, которые не нужны в рейтинге (уже оцененные в ленте).
+        Кэшируется полный рейтинг из max_candidates анкет, exclude отсекается
+        от него; заново (и без кэша) рейтинг считается, только если после
+        этого остается меньше limit анкет, а в базе кандидатов больше.
+        """
+        limit = limit or self.max_candidates
+        self._schedule_sync()
+        event_ids = await self.db.get_candidate_event_ids(user_id)
+        # Мероприятие могут выгрузить (смена активности), пока загружается другое
+        while any(event_id not in self._members for event_id in event_ids):
+            for event_id in event_ids:
+                if event_id not in self._members:
+                    await self._load(event_id)
+        
+        # Дальше до return нет await: рейтинг считается по согласованным спискам
+        versions = [self._event_versions[event_id] for event_id in event_ids]
+        cached = self._rankings.get(user_id)
+        if cached is not None and self._is_fresh(cached, event_ids, versions):
+            ranking = cached[2]
+        else:
+            ranking = self._rank_any(user_id, event_ids, self.max_candidates, None)
+            # Пустой рейтинг не кэшируется: первые участники могут записаться в любой момент
+            if ranking:
+                self._rankings.set(user_id, (event_ids, versions, ranking))
+        
+        remaining = ranking if exclude is None else [item for item in ranking if item[0] not in exclude]
+        # Рейтинг короче max_candidates - в нем все кандидаты, считать заново незачем
+        if len(remaining) >= limit or len(ranking) < self.max_candidates:
+            return remaining[:limit]
+        self.reranks += 1
+        return self._rank_any(user_id, event_ids, limit, exclude)
+    
+    def shared_event_ids(self, candidate_id: int, event_ids: List[int]) -> List[int]:
+        """Какие из мероприятий event_ids есть у кандидата (по загруженным спискам)"""
+        return [event_id for event_id in event_ids
+                if self._contains(self._members.get(event_id), candidate_id)]
+    
+    def reset(self):
+        """Забыть все списки и рейтинги - они перечитаются из базы по мере обращений"""
+        self._members.clear()
+        self._member_sets.clear()
+        self._event_versions.clear()
+        self._rankings.clear()
+        for pending in self._loading.values():
+            pending.stale = True
+        self.resets += 1
+        if self.profiles is not None and self._profiles_task is not None:
+            # Пропущенные изменения анкет тоже не восстановить - матрица строится заново
+            self._profiles_task.cancel()
+            self._profiles_task = asyncio.create_task(self._load_profiles())
+    
+    def _rank_any(self, user_id: int, event_ids: List[int], limit: int,
+                  exclude: Optional[SeenBitmap]) -> List[Candidate]:
+        scores = self.profiles.score(user_id) if self.profiles_ready else None
+        if scores is None:
+            return self._rank(user_id, event_ids, limit, exclude)
+        return self._rank_by_profile(event_ids, scores, limit, exclude)
+    
+    def _is_fresh(self, cached: Tuple[List[int], List[int], List[Candidate]],
+                  event_ids: List[int], versions: List[int]) -> bool:
+        if cached[0] != event_ids or cached[1] != versions:
+            return False
+        if not self.profiles_ready:
+            return True
+        # Кандидаты без общих мероприятий попали в рейтинг по анкете - она должна остаться в матрице
+        return all(self.profiles.row_of(candidate) >= 0 for candidate, shared in cached[2] if shared == 0)
+    
+    def _rank(self, user_id: int, event_ids: List[int], limit: int,
+              exclude: Optional[SeenBitmap]) -> List[Candidate]:
+        event_ids = sorted(event_ids, key=lambda event_id: len(self._members[event_id]))
+        largest = None
+        if event_ids and len(self._members[event_ids[-1]]) >= LARGE_EVENT_SIZE:
+            # Крупнейшее мероприятие не перебирается: его участникам, найденным в
+            # остальных списках, добавляется единица через пересечение множеств
+            largest = event_ids.pop()
+        
+        counts = Counter()
+        for event_id in event_ids:
+            counts.update(self._members[event_id])
+        if largest is not None and counts:
+            counts.update(counts.keys() & self._member_set(largest))
+        counts.pop(user_id, None)
+        excluded = exclude if exclude is not None else ()
+        
+        packed = [candidate - (shared << 32) for candidate, shared in counts.items() if candidate not in excluded]
+        keys = heapq.nsmallest(limit, packed)
+        ranking = [(key & ID_MASK, -(key >> 32)) for key in keys]
+        if largest is None or (len(ranking) == limit and ranking[-1][1] > 1):
+            return ranking
+        
+        # Хвост рейтинга - кандидаты с одним общим мероприятием по возрастанию id,
+        # включая тех, кто есть только в крупнейшем мероприятии
+        top = [item for item in ranking if item[1] > 1]
+        need = limit - len(top)
+        singles = (candidate for candidate, shared in ranking if shared == 1)
+        largest_only = (candidate for candidate in self._members[largest]
+                        if candidate != user_id and candidate not in counts and candidate not in excluded)
+        tail = heapq.nsmallest(need, itertools.chain(singles, itertools.islice(largest_only, need)))
+        return top + [(candidate, 1) for candidate in tail]
+    
+    def _rank_by_profile(self, event_ids: List[int], scores: np.ndarray, limit: int,
+                         exclude: Optional[SeenBitmap]) -> List[Candidate]:
+        """Оценка всех анкет сразу: общие мероприятия + SIMILARITY_SHARE * похожесть"""
+        shared = np.zeros(len(scores), np.int16)
+        for event_id in event_ids:
+            rows = self.profiles.rows_of(np.frombuffer(self._members[event_id], np.int32))
+            shared[rows[rows >= 0]] += 1
+        
+        # scores уже -inf для свободных строк и самого пользователя
+        total = shared + SIMILARITY_SHARE * scores
+        if exclude is not None:
+            total[exclude.mask(self.profiles.ids)] = -np.inf
+        limit = min(limit, int(np.count_nonzero(total > -np.inf)))
+        if limit == 0:
+            return []
+        top = np.argpartition(-total, limit - 1)[:limit]
+        ids = self.profiles.ids[top]
+        order = np.lexsort((ids, -total[top]))
+        return [(int(ids[i]), int(shared[top[i]])) for i in order]
+    
+    def _member_set(self, event_id: int) -> Set[int]:
+        members = self._member_sets.get(event_id)
+        if members is None:
+            members = self._member_sets[event_id] = set(self._members[event_id])
+        return members
+    
+    async def _load(self, event_id: int):
+        pending = self._loading.get(event_id)
+        if pending is not None:
+            # Список уже загружает другой запрос - ждем его, а не читаем второй раз
+            await pending.done.wait()
+            return
+        
+        pending = self._loading[event_id] = PendingLoad()
+        try:
+            members = array('i', await self.db.get_event_candidate_ids(event_id))
+        finally:
+            del self._loading[event_id]
+            pending.done.set()
+        if pending.stale:
+            # Активность мероприятия изменилась во время загрузки - список перечитается
+            return
+        self._members[event_id] = members
+        self._event_versions[event_id] = next(self._versions)
+        for user_id, present in pending.patches:
+            self._set_member(event_id, user_id, present)
+        self.loads += 1
+    
+    async def _load_profiles(self):
+        self.profiles_ready = False
+        # Изменения анкет после этой точки придут через журнал
+        await self._sync()
+        self.profiles.clear()
+        
+        after_id = 0
+        while True:
+            # Страница, прочитанная до применения изменения анкет из журнала, могла
+            # бы вернуть старую анкету - такая страница перечитывается
+            version = self._profiles_version
+            page = await self.db.get_verified_profiles_page(after_id, PROFILES_BATCH)
+            if version != self._profiles_version:
+                continue
+            self.profiles.load(page)
+            if len(page) < PROFILES_BATCH:
+                break
+            after_id = page[-1]['id']
+        
+        self.profiles_ready = True
+        self._rankings.clear()
+        logger.info(f"Матрица профилей загружена: {len(self.profiles)} анкет")
+    
+    def _schedule_sync(self):
+        """Прочитать журнал в фоне, если его уже не читают"""
+        if self._sync_task is None or self._sync_task.done():
+            self._sync_task = asyncio.create_task(self._background_sync())
+    
+    async def _background_sync(self):
+        try:
+            await self._sync()
+        except Exception as e:
+            logger.error(f"Ошибка обновления индекса общих мероприятий: {e}")
+    
+    async def _sync(self):
+        """Применить новые записи журнала membership_changes"""
+        async with self._sync_lock:
+            if self._last_change is None:
+                # Индекс пуст - история до этого момента не нужна
+                self._last_change = await self.db.get_last_membership_change_id()
+                return
+            
+            while True:
+                changes = await self.db.get_membership_changes(self._last_change, CHANGES_BATCH)
+                if not changes:
+                    return
+                if changes[0][0] > self._last_change + 1:
+                    # Процесс отстал дольше, чем хранится журнал
+                    logger.warning("Журнал membership_changes обрезан, индекс общих мероприятий перестраивается")
+                    self.reset()
+                else:
+                    await self._apply(changes)
+                self._last_change = changes[-1][0]
+                if len(changes) < CHANGES_BATCH:
+                    return
+    
+    async def _apply(self, changes: List[Tuple[int, Optional[int], Optional[int]]]):
+        # user_id -> мероприятия для сверки (None - все загруженные)
+        recheck: Dict[int, Optional[Set[int]]] = {}
+        # Пользователи, чья анкета или верификация изменились
+        profile_ids: Set[int] = set()
+        for _, user_id, event_id in changes:
+            if user_id is None:
+                # Мероприятие включили или выключили - список перечитается при обращении
+                self._unload(event_id)
+            elif event_id is None:
+                recheck[user_id] = None
+                profile_ids.add(user_id)
+            elif recheck.get(user_id, ()) is not None:
+                recheck.setdefault(user_id, set()).add(event_id)
+        
+        # Сначала все чтения из базы, затем изменения списков без await между ними.
+        # Журнал говорит, что изменилось, а актуальное участие читается из базы -
+        # повторное применение записи ничего не ломает
+        actual = await self.db.get_candidate_event_ids_many(list(recheck))
+        profiles = None
+        if self.profiles is not None and profile_ids:
+            profiles = await self.db.get_verified_profiles(sorted(profile_ids))
+        
+        for user_id, event_ids in recheck.items():
+            for event_id in (list(self._members) + list(self._loading) if event_ids is None else event_ids):
+                present = event_id in actual[user_id]
+                if event_id in self._members:
+                    self._set_member(event_id, user_id, present)
+                elif event_id in self._loading:
+                    self._loading[event_id].patches.append((user_id, present))
+        
+        if profiles is not None:
+            self.profiles.load(profiles)
+            for user_id in profile_ids - {profile['id'] for profile in profiles}:
+                self.profiles.remove(user_id)
+            self._profiles_version += 1
+            # Собственный рейтинг зависит от своей анкеты
+            self._rankings.invalidate(*profile_ids)
+        self.changes_applied += len(changes)
+    
+    def _unload(self, event_id: int):
+        self._members.pop(event_id, None)
+        self._member_sets.pop(event_id, None)
+        self._event_versions.pop(event_id, None)
+        if event_id in self._loading:
+            self._loading[event_id].stale = True
+    
+    @staticmethod
+    def _contains(members: Optional[array], user_id: int) -> bool:
+        if members is None:
+            return False
+        position = bisect_left(members, user_id)
+        return position < len(members) and members[position] == user_id
+    
+    def _set_member(self, event_id: int, user_id: int, present: bool):
+        members = self._members[event_id]
+        position = bisect_left(members, user_id)
+        found = position < len(members) and members[position] == user_id
+        if present == found:
+            return
+        if present:
+            members.insert(position, user_id)
+        else:
+            del members[position]
+        self._event_versions[event_id] = next(self._versions)
+        
+        member_set = self._member_sets.get(event_id)
+        if member_set is not None:
+            if present:
+                member_set.add(user_id)
+            else:
+                member_set.discard(user_id)
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'events_loaded': len(self._members),
+            'members': sum(len(members) for members in self._members.values()),
+            'loads': self.loads,
+            'changes_applied': self.changes_applied,
+            'resets': self.resets,
+            'reranks': self.reranks,
+            'rankings': self._rankings.stats(),
+            'profiles': self.profiles.stats() if self.profiles_ready else None,
+        }
@@ -47,6 +47,8 @@ async def main():
         
         else:
             print("❌ Неверный выбор. Попробуйте снова.")
+    
+    await db.close()
 
 if __name__ == "__main__":
     asyncio.run(main())
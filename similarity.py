@@ -0,0 +1,173 @@
+"""
+Похожесть анкет: матрица признаков верифицированных профилей в NumPy
+"""
+import re
+import zlib
+from typing import Any, Dict, Iterable, Optional
+
+import numpy as np
+
+# Слова описания (от трех букв) для мешка слов
+WORD_RE = re.compile(r'\w{3,}')
+
+# Курс или возраст не указан - разница с любым значением вне шкалы
+UNKNOWN = -1000
+
+INITIAL_CAPACITY = 1024
+
+def hash_major(major: Optional[str]) -> int:
+    """Хэш направления без учета регистра и лишних пробелов (0 - не указано)"""
+    normalized = ' '.join((major or '').lower().split())
+    return (zlib.crc32(normalized.encode()) or 1) if normalized else 0
+
+class ProfileMatrix:
+    """Признаки анкет построчно: курс, возраст, хэш направления и мешок слов описания.
+    
+    Описание кодируется хэшированием слов в dims корзин с L2-нормировкой,
+    поэтому скалярное произведение строк - косинусная близость текстов.
+    score() оценивает одного пользователя против всех строк несколькими
+    векторными операциями (на 100k анкет - единицы миллисекунд вместо
+    секунд для цикла по строкам). Похожесть лежит в [0, 1]: веса признаков
+    нормируются на их сумму.
+    
+    Строки добавляются и обновляются по одной (upsert/remove), освободившиеся
+    переиспользуются, емкость удваивается по мере роста.
+    """
+    
+    def __init__(self, dims: int = 64, course_weight: float = 0.3, age_weight: float = 0.2,
+                 major_weight: float = 0.3, description_weight: float = 0.2, age_range: int = 10):
+        self.dims = dims
+        total = course_weight + age_weight + major_weight + description_weight
+        self.course_weight = course_weight / total
+        self.age_weight = age_weight / total
+        self.major_weight = major_weight / total
+        self.description_weight = description_weight / total
+        self.age_range = age_range
+        
+        self._size = 0
+        self._free = []
+        # users.id -> номер строки (-1 - анкеты нет в матрице)
+        self._rows = np.full(INITIAL_CAPACITY, -1, np.int32)
+        self._allocate(INITIAL_CAPACITY)
+    
+    def __len__(self) -> int:
+        return self._size - len(self._free)
+    
+    @property
+    def ids(self) -> np.ndarray:
+        """users.id по номерам строк (-1 - свободная строка)"""
+        return self._ids[:self._size]
+    
+    def row_of(self, user_id: int) -> int:
+        return int(self._rows[user_id]) if user_id < len(self._rows) else -1
+    
+    def rows_of(self, user_ids: np.ndarray) -> np.ndarray:
+        """Номера строк для массива users.id (-1 для отсутствующих)"""
+        rows = np.full(len(user_ids), -1, np.int32)
+        inside = user_ids < len(self._rows)
+        rows[inside] = self._rows[user_ids[inside]]
+        return rows
+    
+    def upsert(self, profile: Dict[str, Any]):
+        """Добавить или обновить анкету (id, course, age, major, description)"""
+        user_id = profile['id']
+        row = self.row_of(user_id)
+        if row < 0:
+            row = self._take_row()
+            if user_id >= len(self._rows):
+                grown = np.full(max(user_id + 1, 2 * len(self._rows)), -1, np.int32)
+                grown[:len(self._rows)] = self._rows
+                self._rows = grown
+            self._rows[user_id] = row
+            self._ids[row] = user_id
+        
+        self._course[row] = UNKNOWN if profile.get('course') is None else profile['course']
+        self._age[row] = UNKNOWN if profile.get('age') is None else profile['age']
+        self._major[row] = hash_major(profile.get('major'))
+        self._words[row] = self.encode_description(profile.get('description'))
+    
+    def remove(self, user_id: int):
+        row = self.row_of(user_id)
+        if row < 0:
+            return
+        self._rows[user_id] = -1
+        self._ids[row] = -1
+        self._words[row] = 0
+        self._free.append(row)
+    
+    def clear(self):
+        self._size = 0
+        self._free.clear()
+        self._rows.fill(-1)
+        self._ids.fill(-1)
+    
+    def encode_description(self, description: Optional[str]) -> np.ndarray:
+        """Хэшированный мешок слов с L2-нормировкой"""
+        vector = np.zeros(self.dims, np.float32)
+        for word in WORD_RE.findall((description or '').lower()):
+            vector[zlib.crc32(word.encode()) % self.dims] += 1
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+    
+    def score(self, user_id: int) -> Optional[np.ndarray]:
+        """Похожесть анкеты user_id на каждую строку (-inf для свободных строк и самого пользователя).
+        
+        None - анкеты пользователя нет в матрице.
+        """
+        row = self.row_of(user_id)
+        if row < 0:
+            return None
+        size = self._size
+        
+        scores = self._words[:size] @ (self._words[row] * self.description_weight)
+        course = self._course[row]
+        if course != UNKNOWN:
+            # Соседние курсы ближе: разница в 4 курса и больше - ноль
+            distance = np.abs(self._course[:size] - course)
+            scores += self.course_weight * np.clip(1 - distance / 4, 0, 1, dtype=np.float32)
+        age = self._age[row]
+        if age != UNKNOWN:
+            distance = np.abs(self._age[:size] - age)
+            scores += self.age_weight * np.clip(1 - distance / self.age_range, 0, 1, dtype=np.float32)
+        major = self._major[row]
+        if major:
+            scores += self.major_weight * (self._major[:size] == major)
+        
+        scores[self._ids[:size] < 0] = -np.inf
+        scores[row] = -np.inf
+        return scores
+    
+    def load(self, profiles: Iterable[Dict[str, Any]]):
+        for profile in profiles:
+            self.upsert(profile)
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'profiles': len(self),
+            'rows': self._size,
+            'capacity': len(self._ids),
+            'megabytes': round((self._words.nbytes + self._ids.nbytes + self._course.nbytes
+                                + self._age.nbytes + self._major.nbytes + self._rows.nbytes) / 2 ** 20, 1),
+        }
+    
+    def _take_row(self) -> int:
+        if self._free:
+            return self._free.pop()
+        if self._size == len(self._ids):
+            self._allocate(2 * self._size)
+        self._size += 1
+        return self._size - 1
+    
+    def _allocate(self, capacity: int):
+        """Выделить столбцы емкостью capacity строк, сохранив занятые"""
+        columns = {
+            '_ids': np.full(capacity, -1, np.int32),
+            '_course': np.full(capacity, UNKNOWN, np.int16),
+            '_age': np.full(capacity, UNKNOWN, np.int16),
+            '_major': np.zeros(capacity, np.uint32),
+            '_words': np.zeros((capacity, self.dims), np.float32),
+        }
+        for name, column in columns.items():
+            if self._size:
+                column[:self._size] = getattr(self, name)[:self._size]
+            setattr(self, name, column)
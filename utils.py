@@ -1,5 +1,5 @@
-from typing import Union
-from aiogram.types import Message, CallbackQuery
+from typing import Optional, Union, List, Tuple
+from aiogram.types import Message, CallbackQuery, User, InlineKeyboardButton, InlineKeyboardMarkup
 from config import ADMIN_IDS, ADMIN_USERNAMES
 
 def is_admin(user: Union[Message, CallbackQuery]) -> bool:
@@ -12,6 +12,10 @@ def is_admin(user: Union[Message, CallbackQuery]) -> bool:
     else:
         return False
     
+    return is_admin_user(telegram_user)
+
+def is_admin_user(telegram_user: Optional[User]) -> bool:
+    """Проверка по объекту пользователя Telegram (ID или username из конфига)"""
     if not telegram_user:
         return False
     
@@ -36,3 +40,32 @@ def get_user_display_name(telegram_user) -> str:
         return name
     else:
         return f"User {telegram_user.id}"
+
+def get_page_navigation_row(prefix: str, items: list, has_prev: bool, has_next: bool) -> List[InlineKeyboardButton]:
+    """Кнопки ◀ / ▶ для постраничного списка (курсор - id крайней записи страницы)"""
+    row = []
+    if items and has_prev:
+        row.append(InlineKeyboardButton(text="◀", callback_data=f"{prefix}_p_{items[0]['id']}"))
+    if items and has_next:
+        row.append(InlineKeyboardButton(text="▶", callback_data=f"{prefix}_n_{items[-1]['id']}"))
+    return row
+
+def get_search_navigation_row(prefix: str, page: int, has_prev: bool, has_next: bool) -> List[InlineKeyboardButton]:
+    """Кнопки ◀ / ▶ для результатов поиска (страницы по номеру: результаты упорядочены по релевантности)"""
+    row = []
+    if has_prev:
+        row.append(InlineKeyboardButton(text="◀", callback_data=f"{prefix}_{page - 1}"))
+    if has_next:
+        row.append(InlineKeyboardButton(text="▶", callback_data=f"{prefix}_{page + 1}"))
+    return row
+
+def is_message_unchanged(message: Message, text: str, reply_markup: Optional[InlineKeyboardMarkup]) -> bool:
+    """Сообщение уже показывает этот текст и клавиатуру (edit_text не нужен: Telegram ответил бы "message is not modified")"""
+    # Клавиатуры сравниваются по содержимому: у пришедшей от Telegram есть ссылка на бота
+    current = message.reply_markup.model_dump() if message.reply_markup else None
+    return message.text == text and current == (reply_markup.model_dump() if reply_markup else None)
+
+def parse_page_callback(data: str) -> Tuple[int, bool]:
+    """Разбор callback_data кнопки ◀ / ▶: (курсор, назад)"""
+    direction, cursor = data.rsplit("_", 2)[1:]
+    return int(cursor), direction == "p"
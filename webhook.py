@@ -0,0 +1,153 @@
+"""
+Режим webhook: aiohttp-сервер принимает апдейты от Telegram вместо long polling
+"""
+import asyncio
+import logging
+import signal
+from contextlib import suppress
+from typing import Any, Dict, List, Optional, Set
+
+from aiogram import Bot, Dispatcher
+from aiohttp import web
+
+logger = logging.getLogger(__name__)
+
+SECRET_HEADER = 'X-Telegram-Bot-Api-Secret-Token'
+
+# Компоненты диспетчера (ключ в workflow data), чьи stats() попадают в /health
+HEALTH_COMPONENTS = (
+    ('scheduler', 'update_scheduler'),
+    ('outbound', 'outbound_queue'),
+    ('outbox', 'outbox'),
+    ('recommendations', 'recommendations'),
+    ('feed', 'feed'),
+    ('inline_search', 'inline_search'),
+    ('event_catalog', 'event_catalog'),
+)
+
+class WebhookServer:
+    """Прием апдейтов по HTTP с обработкой в фоне.
+    
+    Telegram получает ответ 200 сразу после разбора тела запроса, апдейты
+    обрабатываются конкурентно; порядок и лимит параллельности задает
+    UpdateScheduler диспетчера.
+    При остановке сервер перестает принимать апдейты (503 - Telegram
+    повторит их позже) и ждет завершения уже принятых до drain_timeout.
+    """
+    
+    def __init__(self, bot: Bot, dp: Optional[Dispatcher], path: str = '/webhook',
+                 secret_token: Optional[str] = None, drain_timeout: float = 30.0):
+        self.bot = bot
+        self.dp = dp
+        self.path = path
+        self.secret_token = secret_token
+        self.drain_timeout = drain_timeout
+        self._tasks: Set[asyncio.Task] = set()
+        self.draining = False
+        self.received = 0
+        self.processed = 0
+        self.failed = 0
+    
+    def create_app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post(self.path, self.handle_update)
+        app.router.add_get('/health', self.handle_health)
+        return app
+    
+    async def handle_update(self, request: web.Request) -> web.Response:
+        if self.draining:
+            return web.Response(status=503, text='draining')
+        if self.secret_token and request.headers.get(SECRET_HEADER) != self.secret_token:
+            return web.Response(status=401, text='unauthorized')
+        
+        try:
+            update = await request.json()
+        except ValueError:
+            return web.Response(status=400, text='bad json')
+        
+        self.received += 1
+        task = asyncio.create_task(self._process(update))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return web.Response()
+    
+    def health(self) -> Dict[str, Any]:
+        health = {
+            'status': 'draining' if self.draining else 'ok',
+            'in_flight': len(self._tasks),
+            'received': self.received,
+            'processed': self.processed,
+            'failed': self.failed,
+        }
+        for name, key in HEALTH_COMPONENTS:
+            component = self.dp.get(key) if self.dp is not None else None
+            if component is not None:
+                health[name] = component.stats()
+        return health
+    
+    async def handle_health(self, request: web.Request) -> web.Response:
+        return web.json_response(self.health(), status=503 if self.draining else 200)
+    
+    @property
+    def allowed_updates(self) -> List[str]:
+        return self.dp.resolve_used_update_types()
+    
+    async def process_update(self, update: dict):
+        """Обработать один апдейт (в многопроцессном режиме - передать воркеру)"""
+        await self.dp.feed_raw_update(self.bot, update)
+    
+    async def _process(self, update: dict):
+        try:
+            await self.process_update(update)
+            self.processed += 1
+        except Exception as e:
+            self.failed += 1
+            logger.error(f"Ошибка обработки апдейта {update.get('update_id')}: {e}")
+    
+    async def drain(self):
+        """Перестать принимать апдейты и дождаться обработки принятых"""
+        self.draining = True
+        if not self._tasks:
+            return
+        
+        logger.info(f"Ожидание обработки {len(self._tasks)} апдейтов...")
+        done, pending = await asyncio.wait(set(self._tasks), timeout=self.drain_timeout)
+        for task in pending:
+            task.cancel()
+        if pending:
+            logger.warning(f"Не дождались {len(pending)} апдейтов за {self.drain_timeout} с")
+    
+    async def run(self, host: str, port: int, webhook_url: Optional[str] = None):
+        """Запустить сервер и работать до SIGINT/SIGTERM"""
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            with suppress(NotImplementedError):
+                loop.add_signal_handler(sig, stop.set)
+        
+        runner = web.AppRunner(self.create_app())
+        await runner.setup()
+        site = web.TCPSite(runner, host, port)
+        
+        if self.dp is not None:
+            await self.dp.emit_startup(bot=self.bot, dispatcher=self.dp)
+        try:
+            await site.start()
+            logger.info(f"Webhook-сервер слушает {host}:{port}{self.path}")
+            
+            # Без URL сервер работает локально (например, для отправки записанных апдейтов)
+            if webhook_url:
+                await self.bot.set_webhook(
+                    webhook_url,
+                    secret_token=self.secret_token,
+                    allowed_updates=self.allowed_updates,
+                    drop_pending_updates=True
+                )
+                logger.info(f"Webhook зарегистрирован: {webhook_url}")
+            
+            await stop.wait()
+        finally:
+            await self.drain()
+            await runner.cleanup()
+            if self.dp is not None:
+                await self.dp.emit_shutdown(bot=self.bot, dispatcher=self.dp)
@@ -0,0 +1,207 @@
+"""
+Многопроцессный режим: супервизор принимает апдейты и раздает их воркерам по from_user.id
+"""
+import asyncio
+import logging
+import multiprocessing
+import signal
+from queue import Empty
+from typing import Any, Callable, Dict, List, Optional
+
+from aiogram import Bot
+
+from webhook import WebhookServer
+
+logger = logging.getLogger(__name__)
+
+# Поля события, в которых Telegram передает автора апдейта
+_USER_FIELDS = ('from', 'user', 'voter_chat')
+
+def shard_key(update: Dict[str, Any]) -> int:
+    """Ключ шардирования: id пользователя, иначе id чата, иначе update_id"""
+    for name, event in update.items():
+        if not isinstance(event, dict):
+            continue
+        for field in _USER_FIELDS:
+            author = event.get(field)
+            if isinstance(author, dict) and 'id' in author:
+                return author['id']
+        chat = event.get('chat') or (event.get('message') or {}).get('chat')
+        if isinstance(chat, dict) and 'id' in chat:
+            return chat['id']
+    return update.get('update_id', 0)
+
+def run_worker(index: int, queue: multiprocessing.Queue):
+    """Точка входа процесса-воркера: свой event loop, пул соединений и диспетчер"""
+    # Сигналы остановки получает вся группа процессов - воркер останавливает супервизор,
+    # дождавшись обработки очереди
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+    asyncio.run(_worker_loop(index, queue))
+
+async def _worker_loop(index: int, queue: multiprocessing.Queue):
+    from bot import create_bot, create_dispatcher, init_database
+    
+    db = await init_database()
+    bot, outbound = create_bot()
+    dp = create_dispatcher(db, outbound)
+    loop = asyncio.get_running_loop()
+    
+    tasks = set()
+    
+    async def process(update: dict):
+        try:
+            await dp.feed_raw_update(bot, update)
+        except Exception as e:
+            logger.error(f"Воркер {index}: ошибка обработки апдейта {update.get('update_id')}: {e}")
+    
+    await dp.emit_startup(bot=bot, dispatcher=dp)
+    logger.info(f"Воркер {index} запущен")
+    try:
+        while True:
+            try:
+                update = await loop.run_in_executor(None, queue.get, True, 1.0)
+            except Empty:
+                # Супервизор упал, не прислав сигнал остановки
+                if not multiprocessing.parent_process().is_alive():
+                    break
+                continue
+            if update is None:
+                break
+            # Апдейты одного пользователя приходят в один воркер, порядок внутри держит UpdateScheduler
+            task = asyncio.create_task(process(update))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+        
+        if tasks:
+            await asyncio.wait(set(tasks))
+    finally:
+        await dp.emit_shutdown(bot=bot, dispatcher=dp)
+        await outbound.close()
+        await bot.session.close()
+        await db.close()
+        logger.info(f"Воркер {index} остановлен")
+
+class UpdateSupervisor:
+    """Запуск N процессов-воркеров и маршрутизация апдейтов между ними.
+    
+    Все апдейты пользователя попадают в один воркер (shard_key % N), поэтому
+    сохраняется их порядок и локальность кэшей FSM/пользователей. Общее
+    состояние (пользователи, FSM, админский режим) хранится в SQLite, но кэш
+    пользователей у каждого воркера свой: строку пользователя может изменить
+    воркер другого шарда (админ одобрил анкету), и такие изменения воркер
+    узнает из журнала user_changes (Database.sync_user_cache) - не позже
+    USER_CACHE_SYNC_INTERVAL секунд, а не через USER_CACHE_TTL.
+    """
+    
+    def __init__(self, workers: int, target: Callable = run_worker, target_args: tuple = ()):
+        self.workers = workers
+        self.target = target
+        self.target_args = target_args
+        self._context = multiprocessing.get_context('spawn')
+        self._queues: List[multiprocessing.Queue] = []
+        self._processes: List[multiprocessing.Process] = []
+        self.routed = [0] * workers
+    
+    def start(self):
+        for index in range(self.workers):
+            queue = self._context.Queue()
+            process = self._context.Process(
+                target=self.target,
+                args=(index, queue, *self.target_args),
+                name=f"unimeet-worker-{index}"
+            )
+            process.start()
+            self._queues.append(queue)
+            self._processes.append(process)
+        logger.info(f"Запущено воркеров: {self.workers}")
+    
+    def route(self, update: Dict[str, Any]):
+        """Отправить апдейт воркеру, отвечающему за его пользователя"""
+        index = shard_key(update) % self.workers
+        self._queues[index].put(update)
+        self.routed[index] += 1
+    
+    def alive(self) -> int:
+        return sum(process.is_alive() for process in self._processes)
+    
+    async def stop(self, timeout: float = 30.0):
+        """Дождаться обработки очередей и остановить воркеров"""
+        for queue in self._queues:
+            queue.put(None)
+        
+        loop = asyncio.get_running_loop()
+        for process in self._processes:
+            await loop.run_in_executor(None, process.join, timeout)
+            if process.is_alive():
+                logger.warning(f"{process.name} не остановился за {timeout} с, завершаю")
+                process.terminate()
+        self._processes.clear()
+        self._queues.clear()
+
+class ShardedWebhookServer(WebhookServer):
+    """Webhook-сервер супервизора: апдейты не обрабатываются, а раздаются воркерам"""
+    
+    def __init__(self, bot: Bot, supervisor: UpdateSupervisor, allowed_updates: List[str], **kwargs):
+        super().__init__(bot, None, **kwargs)
+        self.supervisor = supervisor
+        self._allowed_updates = allowed_updates
+    
+    @property
+    def allowed_updates(self) -> List[str]:
+        return self._allowed_updates
+    
+    async def process_update(self, update: dict):
+        self.supervisor.route(update)
+    
+    def health(self) -> Dict[str, Any]:
+        return {**super().health(), 'workers_alive': self.supervisor.alive(), 'routed': self.supervisor.routed}
+
+async def poll_updates(bot: Bot, supervisor: UpdateSupervisor, allowed_updates: List[str],
+                       stop: asyncio.Event, polling_timeout: int = 30):
+    """Long polling в супервизоре: getUpdates и раздача апдейтов воркерам"""
+    offset: Optional[int] = None
+    delay = 1.0
+    while not stop.is_set():
+        try:
+            updates = await bot.get_updates(
+                offset=offset, timeout=polling_timeout, allowed_updates=allowed_updates
+            )
+        except Exception as e:
+            logger.error(f"Ошибка получения апдейтов: {e}")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 30.0)
+            continue
+        
+        delay = 1.0
+        for update in updates:
+            supervisor.route(update.model_dump(mode='json', by_alias=True, exclude_none=True))
+            offset = update.update_id + 1
+
+async def run_supervisor(bot: Bot, allowed_updates: List[str], workers: int, mode: str,
+                         webhook: Dict[str, Any]):
+    """Запустить воркеров и фронтенд (webhook или polling) до SIGINT/SIGTERM"""
+    supervisor = UpdateSupervisor(workers)
+    supervisor.start()
+    try:
+        if mode == 'webhook':
+            server = ShardedWebhookServer(
+                bot, supervisor, allowed_updates,
+                path=webhook['path'],
+                secret_token=webhook['secret_token'],
+                drain_timeout=webhook['drain_timeout']
+            )
+            await server.run(webhook['host'], webhook['port'], webhook['url'])
+        else:
+            # Как в однопроцессном режиме: снять webhook (иначе getUpdates вернет конфликт)
+            # и пропустить накопившиеся апдейты
+            await bot.delete_webhook(drop_pending_updates=True)
+            stop = asyncio.Event()
+            loop = asyncio.get_running_loop()
+            for sig in (signal.SIGINT, signal.SIGTERM):
+                loop.add_signal_handler(sig, stop.set)
+            polling = asyncio.create_task(poll_updates(bot, supervisor, allowed_updates, stop))
+            await stop.wait()
+            polling.cancel()
+    finally:
+        await supervisor.stop()